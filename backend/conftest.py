@@ -0,0 +1,24 @@
+import pytest
+
+from ecommerce.celery import app as celery_app
+
+
+@pytest.fixture(autouse=True, scope='session')
+def celery_eager():
+    # Run tasks inline with an in-memory broker; no worker or RabbitMQ needed.
+    # Settings are loaded with the CELERY_ namespace, so override those keys.
+    celery_app.conf.update(
+        CELERY_TASK_ALWAYS_EAGER=True,
+        CELERY_TASK_EAGER_PROPAGATES=True,
+        CELERY_BROKER_URL='memory://',
+    )
+
+
+@pytest.fixture(autouse=True)
+def plain_static_storage(settings):
+    # Hashed static names come from the manifest written by collectstatic,
+    # which the test run does not build.
+    settings.STORAGES = {
+        **settings.STORAGES,
+        'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    }
@@ -3,6 +3,12 @@ ASGI config for ecommerce project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Requests under ``ASYNC_READ_PREFIX`` (the native async catalogue views in
+``products/async_views.py``) go to a handler built with the shorter
+``ASYNC_READ_MIDDLEWARE`` chain; everything else uses ``MIDDLEWARE``.
+
+Run with: gunicorn ecommerce.asgi:application -k uvicorn_worker.UvicornWorker
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -13,4 +19,32 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ecommerce.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from django.conf import settings  # noqa: E402
+from django.core.handlers.asgi import ASGIHandler  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+
+ASYNC_READ_PREFIX = '/api/async/'
+
+
+class AsyncReadHandler(ASGIHandler):
+    """
+    ASGIHandler whose middleware chain is ASYNC_READ_MIDDLEWARE.
+
+    `BaseHandler.load_middleware` only reads ``settings.MIDDLEWARE``, so
+    the chain is built with that setting pointed at the shorter list.
+    """
+
+    def load_middleware(self, is_async=False):
+        with override_settings(MIDDLEWARE=settings.ASYNC_READ_MIDDLEWARE):
+            super().load_middleware(is_async)
+
+
+async_read_application = AsyncReadHandler()
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['path'].startswith(ASYNC_READ_PREFIX):
+        return await async_read_application(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -0,0 +1,220 @@
+"""
+`POST /api/batch/`: several API calls in one round trip.
+
+    {"requests": [
+        {"method": "GET", "path": "/api/products/?limit=12"},
+        {"method": "POST", "path": "/api/cart-items/", "body": {"product_id": 1}}
+    ]}
+
+returns ``{"responses": [{"status": 200, "body": {...}}, ...]}`` in the same
+order. Each sub-request is resolved against the normal URLconf and runs
+the same view, permissions and throttles as a direct call. It is
+authenticated as the batch caller, so credentials are checked once.
+Sub-requests skip the middleware stack.
+
+Consecutive GETs do not depend on each other. Each such run executes on a
+small thread pool (``BATCH_MAX_WORKERS``). Any other method waits for the
+requests before it, so a write is visible to the reads that follow it.
+
+Settings:
+- ``BATCH_MAX_REQUESTS``  sub-requests allowed per batch
+- ``BATCH_MAX_WORKERS``   threads for concurrent GETs (1 runs everything in order)
+"""
+import contextvars
+import io
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.wsgi import WSGIRequest
+from django.db import close_old_connections, connection
+from django.http import Http404
+from django.urls import Resolver404, resolve
+from rest_framework import status
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+logger = logging.getLogger(__name__)
+
+BATCH_PATH = '/api/batch/'
+METHODS = {'GET', 'POST', 'PUT', 'PATCH', 'DELETE'}
+CONCURRENT_METHODS = {'GET'}
+# Response headers worth passing back to the client
+FORWARDED_HEADERS = ('ETag', 'Last-Modified', 'Location', 'Retry-After')
+# Parent headers that describe the batch request itself, not its parts
+DROPPED_META = ('CONTENT_TYPE', 'CONTENT_LENGTH', 'HTTP_CONTENT_ENCODING', 'HTTP_IF_NONE_MATCH',
+                'HTTP_IF_MODIFIED_SINCE', 'HTTP_IF_MATCH', 'HTTP_IF_UNMODIFIED_SINCE')
+
+
+class BatchError(ValueError):
+    pass
+
+
+def parse_operations(data, limit):
+    """Validate the batch body; returns `[(method, path, body, headers), ...]`."""
+    operations = data.get('requests') if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        raise BatchError('"requests" must be a non-empty list')
+    if len(operations) > limit:
+        raise BatchError(f'At most {limit} requests per batch')
+
+    parsed = []
+    for i, op in enumerate(operations):
+        if not isinstance(op, dict):
+            raise BatchError(f'Request {i}: must be an object')
+        method = str(op.get('method', 'GET')).upper()
+        path = op.get('path')
+        headers = op.get('headers') or {}
+        if method not in METHODS:
+            raise BatchError(f'Request {i}: unsupported method {method}')
+        if not isinstance(path, str) or not path.startswith('/api/'):
+            raise BatchError(f'Request {i}: path must start with /api/')
+        if urlsplit(path).path.rstrip('/') + '/' == BATCH_PATH:
+            raise BatchError(f'Request {i}: batches cannot be nested')
+        if not isinstance(headers, dict):
+            raise BatchError(f'Request {i}: headers must be an object')
+        parsed.append((method, path, op.get('body'), headers))
+    return parsed
+
+
+def build_request(parent, method, path, body, headers):
+    """A request for `path` that carries `parent`'s identity and client details."""
+    parts = urlsplit(path)
+    content = b'' if body is None else json.dumps(body).encode()
+    environ = {key: value for key, value in parent.META.items() if key not in DROPPED_META}
+    environ.update({
+        'REQUEST_METHOD': method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': parts.path,
+        'QUERY_STRING': parts.query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(content)),
+        'wsgi.input': io.BytesIO(content),
+    })
+    for name, value in headers.items():
+        environ['HTTP_' + str(name).upper().replace('-', '_')] = str(value)
+    request = WSGIRequest(environ)
+    if parent.user.is_authenticated:
+        # Picked up by DRF's Request: skips re-running the authenticators.
+        # Anonymous callers carry no credentials, so their sub-requests
+        # authenticate (and answer 401) exactly like direct calls.
+        request._force_auth_user = parent.user
+        request._force_auth_token = parent.auth
+    return request
+
+
+def dispatch(request):
+    """Run the view `request` resolves to and return its response."""
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    request.resolver_match = match
+    view = match.func
+    if iscoroutinefunction(view):
+        view = async_to_sync(view)
+    try:
+        return view(request, *match.args, **match.kwargs)
+    except Http404:
+        return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+    except PermissionDenied:
+        return Response({'detail': 'Permission denied.'}, status=status.HTTP_403_FORBIDDEN)
+    except Exception:
+        logger.exception('Batch sub-request failed: %s %s', request.method, request.get_full_path())
+        return Response({'detail': 'Server error.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def to_result(response):
+    result = {'status': response.status_code}
+    if isinstance(response, Response):
+        body = response.data
+    elif getattr(response, 'streaming', False):
+        body = None  # e.g. exports; fetch those directly
+    elif 'json' in response.get('Content-Type', '') and response.content:
+        body = json.loads(response.content)
+    else:
+        body = response.content.decode(response.charset) or None
+    result['body'] = body
+    headers = {name: response[name] for name in FORWARDED_HEADERS if response.has_header(name)}
+    if headers:
+        result['headers'] = headers
+    return result
+
+
+def run_one(parent, operation):
+    return to_result(dispatch(build_request(parent, *operation)))
+
+
+def _run_pooled(parent, operation):
+    # Pool threads outlive requests; recycle their connections the way
+    # Django does around each request (honours CONN_MAX_AGE).
+    close_old_connections()
+    try:
+        return run_one(parent, operation)
+    finally:
+        close_old_connections()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BATCH_MAX_WORKERS', 4), thread_name_prefix='api-batch'
+            )
+        return _executor
+
+
+def run_batch(parent, operations):
+    """Execute `operations` in order, running each stretch of GETs concurrently."""
+    results = [None] * len(operations)
+    # Pool threads use their own DB connections and would not see this
+    # connection's uncommitted writes (e.g. ATOMIC_REQUESTS or tests).
+    concurrent = getattr(settings, 'BATCH_MAX_WORKERS', 4) > 1 and not connection.in_atomic_block
+
+    i = 0
+    while i < len(operations):
+        j = i
+        while j < len(operations) and operations[j][0] in CONCURRENT_METHODS:
+            j += 1
+        if concurrent and j - i > 1:
+            executor = get_executor()
+            futures = [
+                # A copy of the context per task keeps request-scoped
+                # context variables (e.g. metrics) in the pool threads
+                executor.submit(contextvars.copy_context().run, _run_pooled, parent, operations[k])
+                for k in range(i, j)
+            ]
+            for k, future in zip(range(i, j), futures):
+                results[k] = future.result()
+            i = j
+        else:
+            results[i] = run_one(parent, operations[i])
+            i += 1
+    return results
+
+
+class BatchView(APIView):
+    """
+    Run several API requests in one round trip.
+    Sub-requests are authorised individually, so anonymous callers can
+    batch public reads.
+    """
+    permission_classes = [AllowAny]
+
+    def post(self, request):
+        try:
+            operations = parse_operations(request.data, getattr(settings, 'BATCH_MAX_REQUESTS', 20))
+        except BatchError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'responses': run_batch(request, operations)})
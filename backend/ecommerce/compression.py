@@ -0,0 +1,210 @@
+"""
+Negotiated compression for API responses.
+
+`CompressionMiddleware` picks the best encoding the client accepts. The
+preference order is ``zstd``, then ``br``, then ``gzip``, and zstd and br
+are only offered when `zstandard` / `brotli` are installed. It applies to
+compressible responses under ``/api/`` once they reach a size threshold.
+Streaming responses (the CSV/NDJSON exports) are compressed chunk by
+chunk as they are sent.
+
+Static files are not handled here. WhiteNoise serves the ``.br``/``.gz``
+files that `CompressedManifestStaticFilesStorage` writes at collectstatic.
+Admin and other HTML pages are left alone because they carry CSRF tokens
+(BREACH). The API authenticates with bearer tokens, not cookies.
+
+Settings:
+- ``COMPRESSION_MIN_SIZE``   smallest body (bytes) worth compressing
+- ``COMPRESSION_ENCODINGS``  encodings to offer, in preference order
+"""
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional
+    zstandard = None
+
+DEFAULT_MIN_SIZE = 1024
+PATH_PREFIXES = ('/api/',)
+COMPRESSIBLE_TYPES = (
+    'application/json', 'application/x-ndjson', 'application/javascript',
+    'application/xml', 'text/',
+)
+
+# Levels tuned for per-request work, not for static assets: past these
+# the CPU cost rises much faster than the size falls.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+ZSTD_LEVEL = 3
+
+
+class _Gzip:
+    def __init__(self):
+        self._obj = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        self._obj = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def compress(self, data):
+        return self._obj.process(data)
+
+    def flush(self):
+        return self._obj.finish()
+
+
+class _Zstd:
+    def __init__(self):
+        self._obj = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+
+    def compress(self, data):
+        return self._obj.compress(data)
+
+    def flush(self):
+        return self._obj.flush()
+
+
+def available_encoders():
+    """`{encoding: compressor class}` for the libraries installed here, best first."""
+    encoders = {}
+    if zstandard is not None:
+        encoders['zstd'] = _Zstd
+    if brotli is not None:
+        encoders['br'] = _Brotli
+    encoders['gzip'] = _Gzip
+    return encoders
+
+
+ENCODERS = available_encoders()
+
+
+def compress(encoding, data):
+    compressor = ENCODERS[encoding]()
+    return compressor.compress(data) + compressor.flush()
+
+
+def parse_accept_encoding(header):
+    """`{coding: q}` from an Accept-Encoding header; malformed q-values count as 0."""
+    accepted = {}
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(header, offered):
+    """The first of `offered` the client accepts with q > 0, or None."""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get('*', 0.0)
+    for encoding in offered:
+        if accepted.get(encoding, wildcard) > 0:
+            return encoding
+    return None
+
+
+def _compress_stream(encoding, chunks):
+    compressor = ENCODERS[encoding]()
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+async def _acompress_stream(encoding, chunks):
+    compressor = ENCODERS[encoding]()
+    async for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class CompressionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE)
+        self.offered = [
+            encoding for encoding in getattr(settings, 'COMPRESSION_ENCODINGS', list(ENCODERS))
+            if encoding in ENCODERS
+        ]
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if not request.path.startswith(PATH_PREFIXES) or not self._compressible(response):
+            return response
+        # Caches must key on Accept-Encoding even when this client gets identity
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''), self.offered)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _acompress_stream(encoding, response.streaming_content)
+            else:
+                response.streaming_content = _compress_stream(encoding, response.streaming_content)
+            del response.headers['Content-Length']
+        else:
+            if len(response.content) < self.min_size:
+                return response
+            compressed = compress(encoding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+
+        etag = response.headers.get('ETag')
+        if etag and etag.startswith('"'):
+            # The bytes differ per encoding, so a strong validator no longer holds
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def _compressible(self, response):
+        if response.has_header('Content-Encoding') or response.status_code in (204, 304):
+            return False
+        if 'no-transform' in response.get('Cache-Control', ''):
+            return False
+        content_type = response.get('Content-Type', '').split(';', 1)[0].strip().lower()
+        return content_type.startswith(COMPRESSIBLE_TYPES)
@@ -0,0 +1,305 @@
+"""
+In-process request metrics, exposed in Prometheus text format.
+
+`MetricsMiddleware` records, per resolved route name (e.g. ``product-list``)
+and method:
+
+- request count, by status code
+- total latency
+- number of DB queries and time spent in them
+- time spent producing serializer output (``serializer.data`` on serializers
+  using `TimedSerializerMixin`, plus any block under `serializer_timer()`)
+
+Values go into fixed-bucket histograms held in this process; each worker
+exposes its own numbers at ``/api/_metrics`` and Prometheus sums them.
+
+Settings:
+- ``METRICS_ENABLED``       turn the middleware into a no-op
+- ``METRICS_SAMPLE_RATE``   fraction of requests whose DB/serializer time is
+                            measured (counts and latency are always recorded)
+- ``METRICS_TOKEN``         scrape token for the ``X-Metrics-Token`` header; without
+                            it (or a valid one) only staff sessions may read metrics
+- ``SLOW_QUERY_MS``         queries slower than this are logged (0 disables)
+"""
+import contextlib
+import contextvars
+import logging
+import random
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.crypto import constant_time_compare
+from rest_framework.serializers import ListSerializer
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+UNMATCHED_ROUTE = 'unmatched'
+METRICS_PATH = '/api/_metrics'
+
+
+class Histogram:
+    """Cumulative bucket histogram; not thread-safe on its own."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class Registry:
+    HISTOGRAMS = {
+        'http_request_duration_seconds': ('Total request latency', LATENCY_BUCKETS),
+        'http_db_queries': ('DB queries per request', QUERY_COUNT_BUCKETS),
+        'http_db_duration_seconds': ('Time spent in DB queries per request', LATENCY_BUCKETS),
+        'http_serializer_duration_seconds': ('Time spent building serializer output per request', LATENCY_BUCKETS),
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._requests = {}
+            self._histograms = {name: {} for name in self.HISTOGRAMS}
+
+    def record(self, route, method, status, duration, queries=None, db_time=None, serializer_time=None):
+        labels = (route, method)
+        observations = {'http_request_duration_seconds': duration}
+        if queries is not None:
+            observations['http_db_queries'] = queries
+            observations['http_db_duration_seconds'] = db_time
+            observations['http_serializer_duration_seconds'] = serializer_time
+        with self._lock:
+            key = labels + (str(status),)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            for name, value in observations.items():
+                series = self._histograms[name]
+                if labels not in series:
+                    series[labels] = Histogram(self.HISTOGRAMS[name][1])
+                series[labels].observe(value)
+
+    def snapshot(self):
+        """`{(route, method, status): count}` plus per-histogram count/sum, for tests and debugging."""
+        with self._lock:
+            return {
+                'requests': dict(self._requests),
+                **{
+                    name: {labels: (h.count, h.sum) for labels, h in series.items()}
+                    for name, series in self._histograms.items()
+                },
+            }
+
+    def render(self):
+        lines = [
+            '# HELP http_requests_total Requests handled, by route, method and status',
+            '# TYPE http_requests_total counter',
+        ]
+        with self._lock:
+            for (route, method, status), count in sorted(self._requests.items()):
+                lines.append(
+                    f'http_requests_total{{route="{route}",method="{method}",status="{status}"}} {count}'
+                )
+            for name, (help_text, _) in self.HISTOGRAMS.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for (route, method), h in sorted(self._histograms[name].items()):
+                    labels = f'route="{route}",method="{method}"'
+                    for bound, count in zip(h.buckets, h.counts):
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {h.count}')
+                    lines.append(f'{name}_sum{{{labels}}} {h.sum:.6f}')
+                    lines.append(f'{name}_count{{{labels}}} {h.count}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+class RequestTimings:
+    """Per-request accumulator shared by the DB wrapper and serializer hook."""
+
+    def __init__(self, route_hint=''):
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.route_hint = route_hint
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.queries += 1
+            self.db_time += elapsed
+            threshold = getattr(settings, 'SLOW_QUERY_MS', 0)
+            if threshold and elapsed * 1000 >= threshold:
+                logger.warning(
+                    'Slow query (%.1f ms) on %s: %s', elapsed * 1000, self.route_hint, sql[:1000]
+                )
+
+
+_current = contextvars.ContextVar('request_timings', default=None)
+
+
+def _timed_execute(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    return timings(execute, sql, params, many, context)
+
+
+def _install_db_timing(connection, **kwargs):
+    """
+    Add the timing wrapper to `connection` once.
+
+    The wrapper stays installed and reads the current request's timings
+    from a context variable, which sync_to_async copies into the threads
+    the async ORM runs on; a per-request `execute_wrapper()` would only
+    reach the calling thread's connection.
+    """
+    if _timed_execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_timed_execute)
+
+
+@contextlib.contextmanager
+def serializer_timer():
+    """
+    Count the time spent in the block as serializer time of the measured
+    request. Nested blocks are counted once, as part of the outermost one.
+    """
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    timings.serializer_depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.serializer_depth -= 1
+        if timings.serializer_depth == 0:
+            timings.serializer_time += time.perf_counter() - start
+
+
+class TimedSerializerMixin:
+    """
+    Adds the time spent in `serializer.data` to the measured request.
+
+    Nested serializers go through `to_representation`, not `.data`, so only
+    the outermost call is counted; the depth guard covers views that read
+    `.data` from inside another serializer. For `many=True` set
+    ``Meta.list_serializer_class = TimedListSerializer``.
+    """
+
+    @property
+    def data(self):
+        with serializer_timer():
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, ListSerializer):
+    pass
+
+
+class MetricsMiddleware:
+    # Works in both modes so async views keep running on the event loop
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'METRICS_ENABLED', True)
+        if self.enabled:
+            connection_created.connect(_install_db_timing, dispatch_uid='ecommerce.metrics')
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self._should_measure(request):
+            return self.get_response(request)
+
+        timings, start = self._start(request)
+        if timings is None:
+            response = self.get_response(request)
+        else:
+            # Connections opened before the middleware was loaded
+            for alias in connections:
+                _install_db_timing(connections[alias])
+            token = _current.set(timings)
+            try:
+                response = self.get_response(request)
+            finally:
+                _current.reset(token)
+        self._finish(request, response, timings, start)
+        return response
+
+    async def __acall__(self, request):
+        if not self._should_measure(request):
+            return await self.get_response(request)
+
+        timings, start = self._start(request)
+        if timings is None:
+            response = await self.get_response(request)
+        else:
+            token = _current.set(timings)
+            try:
+                response = await self.get_response(request)
+            finally:
+                _current.reset(token)
+        self._finish(request, response, timings, start)
+        return response
+
+    def _should_measure(self, request):
+        return self.enabled and request.path.rstrip('/') != METRICS_PATH
+
+    def _start(self, request):
+        sample_rate = getattr(settings, 'METRICS_SAMPLE_RATE', 1.0)
+        timings = RequestTimings(request.path) if random.random() < sample_rate else None
+        return timings, time.perf_counter()
+
+    def _finish(self, request, response, timings, start):
+        duration = time.perf_counter() - start
+        match = getattr(request, 'resolver_match', None)
+        route = (match.view_name if match else '') or UNMATCHED_ROUTE
+        if timings is None:
+            registry.record(route, request.method, response.status_code, duration)
+        else:
+            registry.record(
+                route, request.method, response.status_code, duration,
+                queries=timings.queries, db_time=timings.db_time,
+                serializer_time=timings.serializer_time,
+            )
+
+
+def metrics_view(request):
+    # Per-route traffic and timings are not public: scrapers send the
+    # configured token, people use a staff session.
+    expected = getattr(settings, 'METRICS_TOKEN', '')
+    supplied = request.headers.get('X-Metrics-Token', '')
+    has_token = bool(expected and supplied) and constant_time_compare(supplied, expected)
+    user = getattr(request, 'user', None)
+    if not (has_token or (user is not None and user.is_staff)):
+        return HttpResponseForbidden()
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,31 @@
+"""
+JSON parser backed by orjson when it is installed.
+
+orjson always rejects NaN/Infinity, which is what DRF's strict mode asks
+for; non-strict settings and non-UTF-8 bodies use DRF's stdlib parser.
+"""
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from ecommerce.renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            utf8 = codecs.lookup(encoding).name == 'utf-8'
+        except LookupError:
+            utf8 = False
+        if orjson is None or not self.strict or not utf8:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
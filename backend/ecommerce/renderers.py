@@ -0,0 +1,44 @@
+"""
+JSON renderer backed by orjson when it is installed.
+
+Output matches DRF's `JSONRenderer` (``Z`` for UTC datetimes, Decimals as
+numbers, U+2028/U+2029 escaped); anything orjson cannot encode natively is
+handed to DRF's encoder, and the stdlib path is used when orjson is missing,
+for indented (browsable/``indent=``) output, or when orjson rejects the data.
+
+One difference remains: orjson writes NaN and Infinity as ``null`` without
+raising, where DRF raises under ``STRICT_JSON`` (the default) or emits a
+bare ``NaN`` otherwise. No model field here stores such values.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised when orjson is absent
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+_fallback_encoder = JSONEncoder()
+
+
+def _default(obj):
+    # Decimal, lazy strings, timedelta, QuerySet, generators, ...
+    return _fallback_encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+        except TypeError:
+            # e.g. integers beyond 64 bits (NaN does not raise; see above)
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
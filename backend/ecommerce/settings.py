@@ -34,15 +34,51 @@ CELERY_RESULT_BACKEND = 'django-db'
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
+# Run tasks inline (no broker) when CELERY_TASK_ALWAYS_EAGER=True, e.g. in tests
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER', 'False') == 'True'
+CELERY_TASK_EAGER_PROPAGATES = True
+if CELERY_TASK_ALWAYS_EAGER:
+    CELERY_BROKER_URL = 'memory://'
+# Run a scheduler with the worker (`celery -A ecommerce worker -B`, or a
+# separate `celery -A ecommerce beat`)
+CELERY_BEAT_SCHEDULE = {
+    'sweep-expired-stock-holds': {
+        'task': 'products.tasks.sweep_expired_stock_holds',
+        'schedule': float(os.environ.get('STOCK_HOLD_SWEEP_SECONDS', '60')),
+    },
+}
+
+# How long a checkout's stock holds last (products/reservations.py)
+STOCK_HOLD_SECONDS = int(os.environ.get('STOCK_HOLD_SECONDS', '600'))
+
+# Outgoing mail is sent by Celery workers, one SMTP connection per batch
+EMAIL_BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE', '100'))
 
 # Sentry configuration
+# Tracing every request is expensive; aggregate numbers come from
+# /api/_metrics, so only a sample of requests is traced by default.
 sentry_sdk.init(
     dsn=os.environ.get("SENTRY_DSN", ""),
     integrations=[DjangoIntegration()],
-    traces_sample_rate=1.0,
+    traces_sample_rate=float(os.environ.get('SENTRY_TRACES_SAMPLE_RATE', '0.05')),
     send_default_pii=True
 )
 
+# Request metrics (ecommerce/metrics.py)
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'True') == 'True'
+# Fraction of requests whose DB and serializer time is measured
+METRICS_SAMPLE_RATE = float(os.environ.get('METRICS_SAMPLE_RATE', '1.0'))
+# Scrape token for /api/_metrics (X-Metrics-Token header); without it only
+# staff sessions can read the endpoint
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+# Log queries slower than this many milliseconds (0 disables)
+SLOW_QUERY_MS = int(os.environ.get('SLOW_QUERY_MS', '200'))
+
+# POST /api/batch/ (ecommerce/batch.py)
+BATCH_MAX_REQUESTS = int(os.environ.get('BATCH_MAX_REQUESTS', '20'))
+# Threads running consecutive GET sub-requests concurrently (1 disables)
+BATCH_MAX_WORKERS = int(os.environ.get('BATCH_MAX_WORKERS', '4'))
+
 # WhiteNoise for static file serving
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -77,13 +113,14 @@ INSTALLED_APPS = [
     'products',
     'users',
     'django_extensions',
+    'django_celery_results',
 ]
 
 INSTALLED_APPS += ['corsheaders']
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'ecommerce.middleware.AsyncWhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -92,7 +129,22 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
-MIDDLEWARE = ['corsheaders.middleware.CorsMiddleware'] + MIDDLEWARE
+MIDDLEWARE = [
+    'ecommerce.metrics.MetricsMiddleware',
+    'ecommerce.compression.CompressionMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+] + MIDDLEWARE
+
+# Middleware for the native async read endpoints (/api/async/, see
+# ecommerce/asgi.py). Under ASGI every MiddlewareMixin hook costs a thread
+# hop, so these anonymous JSON GETs skip sessions, auth, CSRF and messages.
+ASYNC_READ_MIDDLEWARE = [
+    'ecommerce.metrics.MetricsMiddleware',
+    'ecommerce.compression.CompressionMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
 
 ROOT_URLCONF = 'ecommerce.urls'
 
@@ -125,6 +177,31 @@ DATABASES = {
 }
 
 
+# Cache
+# Set CACHE_URL=redis://host:6379/0 to share the cache across workers;
+# without it each process uses local memory (fine for tests and dev).
+CACHE_URL = os.environ.get('CACHE_URL', '')
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'ecommerce',
+        }
+    }
+
+# Catalogue response cache (products/cache.py); invalidated by signals,
+# the timeout is only a backstop.
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = int(os.environ.get('CATALOG_CACHE_TIMEOUT', '300'))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -160,8 +237,23 @@ USE_TZ = True
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
-# WhiteNoise settings (optional, for better caching)
-STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    # Hashed file names plus .gz/.br copies written at collectstatic
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
+# WhiteNoise serves hashed files (app.3f1c2a.css) with a 10-year
+# "public, max-age=315360000, immutable"; this max-age only applies to the
+# unhashed names, which can change in place.
+WHITENOISE_MAX_AGE = 0 if DEBUG else int(os.environ.get('WHITENOISE_MAX_AGE', '3600'))
+
+# API response compression (ecommerce/compression.py)
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
 
 
 # Default primary key field type
@@ -171,24 +263,61 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework & JWT settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # Builds request.user from token claims instead of a query per request
+        # (users/authentication.py); JWT_STATELESS_AUTH=False restores the lookup
+        'users.authentication.StatelessJWTAuthentication'
+        if os.environ.get('JWT_STATELESS_AUTH', 'True') == 'True'
+        else 'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.AllowAny',
     ),
+    # orjson-backed JSON (ecommerce/renderers.py, ecommerce/parsers.py);
+    # both fall back to DRF's stdlib implementation without orjson
+    'DEFAULT_RENDERER_CLASSES': (
+        'ecommerce.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'ecommerce.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend'],
+    # GCRA throttles (ecommerce/throttling.py); state lives in the
+    # THROTTLE_CACHE_ALIAS cache, so set CACHE_URL to share it across workers
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.UserRateThrottle',
-        'rest_framework.throttling.AnonRateThrottle',
+        'ecommerce.throttling.UserGCRAThrottle',
+        'ecommerce.throttling.AnonGCRAThrottle',
+        'ecommerce.throttling.ScopedGCRAThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
-        'user': '100/minute',
-        'anon': '10/minute',
+        'user': os.environ.get('THROTTLE_USER_RATE', '100/minute'),
+        'anon': os.environ.get('THROTTLE_ANON_RATE', '10/minute'),
+        # Views with a throttle_scope use these instead of user/anon
+        'catalog': os.environ.get('THROTTLE_CATALOG_RATE', '120/minute'),
+        'checkout': os.environ.get('THROTTLE_CHECKOUT_RATE', '10/minute'),
     },
 }
 
+THROTTLE_CACHE_ALIAS = 'default'
+
+SIMPLE_JWT = {
+    # Stamp email/is_staff into every token pair for StatelessJWTAuthentication
+    'TOKEN_OBTAIN_SERIALIZER': 'users.tokens.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.tokens.ClaimsTokenRefreshSerializer',
+}
+
+# Seconds each process reuses its set of inactive users
+JWT_STALE_USERS_REFRESH = int(os.environ.get('JWT_STALE_USERS_REFRESH', '30'))
+# Holds the per-user stale marks; token claims are only trusted when every
+# process shares it. None decides from the backend (local memory is not
+# shared); True is fine for a single process.
+AUTH_CACHE_ALIAS = 'default'
+AUTH_CACHE_SHARED = None
+
 SESSION_ENGINE = "django.contrib.sessions.backends.db"
 
 CORS_ALLOW_ALL_ORIGINS = False
@@ -197,6 +326,6 @@ CORS_ALLOWED_ORIGINS = [
     'http://localhost:3000',
 ]
 
-SECURE_SSL_REDIRECT = True
+SECURE_SSL_REDIRECT = os.environ.get('SECURE_SSL_REDIRECT', 'True') == 'True'
 SESSION_COOKIE_SECURE = True
 CSRF_COOKIE_SECURE = True
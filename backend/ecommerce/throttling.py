@@ -0,0 +1,217 @@
+"""
+GCRA rate limiting: a token bucket kept as one timestamp per key.
+
+For a rate of ``N/period`` each request advances the key's theoretical
+arrival time (TAT) by ``period / N``. A request is refused while the TAT
+would run more than one full period ahead of now. Up to N requests may
+burst, then one more every ``period / N`` seconds. State is a single
+number with a TTL, unlike DRF's SimpleRateThrottle, which keeps a list
+of every timestamp in the window.
+
+Backends:
+- `RedisBackend`  one Lua call per request, timed by the Redis clock;
+                  exact across workers and hosts
+- `CacheBackend`  get/set under a process lock on any Django cache; exact
+                  within one process, the stand-in for tests and dev
+
+The backend follows ``THROTTLE_CACHE_ALIAS`` (default ``'default'``): a
+``RedisCache`` there gets `RedisBackend`, anything else `CacheBackend`.
+
+Scopes: a view with ``throttle_scope = 'checkout'`` (or any scope in
+``DEFAULT_THROTTLE_RATES``) is limited by that scope's rate, per user or
+client IP, instead of the generic ``user``/``anon`` rates.
+
+Views outside DRF (the async catalogue reads) call `ahit` with the same
+scope and identity, so both paths draw on one budget.
+"""
+import math
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# KEYS[1]: bucket; ARGV: interval and tolerance in microseconds.
+# Returns 0 when allowed, else microseconds until the next request fits.
+GCRA_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) * 1000000 + tonumber(now[2])
+local interval = tonumber(ARGV[1])
+local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+if tat < now then tat = now end
+local new_tat = tat + interval
+local allow_at = new_tat - tonumber(ARGV[2])
+if now < allow_at then
+    return allow_at - now
+end
+-- %.0f: Lua's default number format would round the timestamp
+redis.call('SET', KEYS[1], string.format('%.0f', new_tat), 'PX', math.ceil((new_tat - now) / 1000))
+return 0
+"""
+
+
+def parse_rate(rate):
+    """``'100/minute'`` -> ``(seconds between requests, burst size)``."""
+    try:
+        num, period = rate.split('/')
+        num = int(num)
+        seconds = PERIODS[period.strip()[0]]
+    except (ValueError, KeyError, IndexError):
+        raise ImproperlyConfigured(f'Invalid throttle rate {rate!r}; expected e.g. "100/minute"')
+    if num < 1:
+        raise ImproperlyConfigured(f'Invalid throttle rate {rate!r}')
+    return seconds / num, num
+
+
+class CacheBackend:
+    """GCRA on a Django cache; the lock makes each check-and-set atomic within the process."""
+
+    _lock = threading.Lock()
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def hit(self, key, interval, burst):
+        """Record a request; returns 0 if allowed, else seconds to wait."""
+        now = time.time()
+        with self._lock:
+            tat = max(self.cache.get(key) or now, now)
+            new_tat = tat + interval
+            allow_at = new_tat - interval * burst
+            if now < allow_at:
+                return allow_at - now
+            self.cache.set(key, new_tat, math.ceil(new_tat - now))
+        return 0.0
+
+
+class RedisBackend:
+    """GCRA as a Lua script on the Redis server behind a Django `RedisCache`."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._scripts = {}
+
+    def _client(self, key):
+        return self.cache._cache.get_client(key, write=True)
+
+    def hit(self, key, interval, burst):
+        key = self.cache.make_key(key)
+        client = self._client(key)
+        script = self._scripts.get(id(client))
+        if script is None:
+            script = self._scripts[id(client)] = client.register_script(GCRA_SCRIPT)
+        interval_us = max(1, round(interval * 1_000_000))
+        wait_us = script(keys=[key], args=[interval_us, interval_us * burst])
+        return int(wait_us) / 1_000_000
+
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend():
+    alias = getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')
+    with _backends_lock:
+        if alias not in _backends:
+            cache = caches[alias]
+            _backends[alias] = RedisBackend(cache) if isinstance(cache, RedisCache) else CacheBackend(cache)
+        return _backends[alias]
+
+
+def _scope_rate(scope):
+    """`(interval, burst)` for `scope`, or None if the scope is unlimited."""
+    rates = api_settings.DEFAULT_THROTTLE_RATES
+    if scope not in rates:
+        raise ImproperlyConfigured(f"No default throttle rate set for '{scope}' scope")
+    if rates[scope] is None:
+        return None
+    return parse_rate(rates[scope])
+
+
+async def ahit(scope, ident):
+    """
+    Async check for views outside DRF: records a request by `ident`
+    against `scope`'s rate and returns 0 if allowed, else seconds to wait.
+    """
+    rate = _scope_rate(scope)
+    if rate is None:
+        return 0.0
+    key = GCRAThrottle.cache_format % {'scope': scope, 'ident': ident}
+    # Both backends block (a Redis round trip, or the process lock)
+    return await sync_to_async(get_backend().hit)(key, *rate)
+
+
+class GCRAThrottle(BaseThrottle):
+    """Base class: subclasses set `scope` (or override `get_scope`) and `get_ident_key`."""
+
+    scope = None
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    def __init__(self):
+        self._wait = None
+
+    def get_scope(self, view):
+        return self.scope
+
+    def get_ident_key(self, request, view):
+        """Identity to limit, or None to skip the throttle."""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(view)
+        if scope is None:
+            return True
+        ident = self.get_ident_key(request, view)
+        if ident is None:
+            return True
+        rate = _scope_rate(scope)
+        if rate is None:
+            return True
+        key = self.cache_format % {'scope': scope, 'ident': ident}
+        self._wait = get_backend().hit(key, *rate)
+        return self._wait == 0
+
+    def wait(self):
+        # DRF rounds this up into the Retry-After header
+        return self._wait or None
+
+
+class UserGCRAThrottle(GCRAThrottle):
+    """`user` rate per authenticated user (anonymous requests fall to `AnonGCRAThrottle`)."""
+
+    scope = 'user'
+
+    def get_ident_key(self, request, view):
+        if getattr(view, 'throttle_scope', None) or not (request.user and request.user.is_authenticated):
+            return None
+        return request.user.pk
+
+
+class AnonGCRAThrottle(GCRAThrottle):
+    """`anon` rate per client IP for unauthenticated requests."""
+
+    scope = 'anon'
+
+    def get_ident_key(self, request, view):
+        if getattr(view, 'throttle_scope', None) or (request.user and request.user.is_authenticated):
+            return None
+        return self.get_ident(request)
+
+
+class ScopedGCRAThrottle(GCRAThrottle):
+    """The view's `throttle_scope` rate, per user or client IP."""
+
+    def get_scope(self, view):
+        return getattr(view, 'throttle_scope', None)
+
+    def get_ident_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
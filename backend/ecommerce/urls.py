@@ -22,6 +22,9 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from ecommerce.batch import BatchView
+from ecommerce.metrics import metrics_view
+
 schema_view = get_schema_view(
     openapi.Info(
         title="E-Commerce API",
@@ -34,6 +37,8 @@ schema_view = get_schema_view(
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/_metrics', metrics_view, name='metrics'),
+    path('api/batch/', BatchView.as_view(), name='batch'),
     path('api/auth/', include('users.urls')),
     path('api/', include('products.urls')),
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
@@ -0,0 +1,182 @@
+"""
+Compare the catalogue read path under WSGI and ASGI.
+
+Starts each server with the same number of worker processes (so roughly
+the same memory), drives it with concurrent keep-alive clients and prints
+requests/sec, latency percentiles and server RSS:
+
+    python loadtest.py --workers 2 --concurrency 64 --duration 20
+
+WSGI serves the DRF endpoints (/api/products/, ...) with gunicorn sync
+workers; ASGI serves the native async ones (/api/async/products/, ...)
+with gunicorn + uvicorn workers. Point it at already running servers with
+--wsgi-url / --asgi-url instead. Uses only the standard library.
+"""
+import argparse
+import http.client
+import itertools
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_PATHS = ['products/?limit=12', 'products/?view=card&limit=50', 'categories/']
+
+SERVERS = {
+    'wsgi': ['gunicorn', 'ecommerce.wsgi:application'],
+    'asgi': ['gunicorn', 'ecommerce.asgi:application', '-k', 'uvicorn_worker.UvicornWorker'],
+}
+
+SERVER_ENV = {
+    # Local HTTP, and no throttling, so the numbers measure the read path
+    'SECURE_SSL_REDIRECT': 'False',
+    'THROTTLE_ANON_RATE': '1000000/second',
+    'THROTTLE_USER_RATE': '1000000/second',
+    'THROTTLE_CATALOG_RATE': '1000000/second',
+    'THROTTLE_CHECKOUT_RATE': '1000000/second',
+    'METRICS_ENABLED': 'True',
+    'DEBUG': 'False',
+}
+
+
+def rss_kb(pid):
+    """Resident memory of `pid` and its children (Linux /proc)."""
+    total = 0
+    pids = [pid]
+    try:
+        children = subprocess.run(['pgrep', '-P', str(pid)], capture_output=True, text=True).stdout.split()
+        pids += [int(p) for p in children]
+    except FileNotFoundError:
+        pass
+    for p in pids:
+        try:
+            with open(f'/proc/{p}/status') as fh:
+                for line in fh:
+                    if line.startswith('VmRSS:'):
+                        total += int(line.split()[1])
+        except OSError:
+            pass
+    return total
+
+
+def start_server(kind, port, workers):
+    cmd = SERVERS[kind] + ['-w', str(workers), '-b', f'127.0.0.1:{port}', '--log-level', 'warning']
+    process = subprocess.Popen(cmd, env={**os.environ, **SERVER_ENV}, start_new_session=True)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/api/', headers={'Host': 'localhost'})
+            conn.getresponse().read()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f'{kind} server did not start on port {port}')
+
+
+def stop_server(process):
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=10)
+    except (ProcessLookupError, subprocess.TimeoutExpired):
+        os.killpg(process.pid, signal.SIGKILL)
+
+
+def run_load(base_url, paths, concurrency, duration, bust_cache):
+    parts = urlsplit(base_url)
+    prefix = parts.path.rstrip('/') + '/'
+    latencies = []
+    statuses = {}
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+    counter = itertools.count()
+
+    def client():
+        conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+        local_latencies = []
+        local_statuses = {}
+        for path in itertools.cycle(paths):
+            if time.perf_counter() >= stop_at:
+                break
+            url = prefix + path
+            if bust_cache:
+                url += ('&' if '?' in url else '?') + f'_={next(counter)}'
+            start = time.perf_counter()
+            try:
+                conn.request('GET', url, headers={'Host': 'localhost'})
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+                status = 'error'
+            local_latencies.append(time.perf_counter() - start)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return latencies, statuses, elapsed
+
+
+def report(label, latencies, statuses, elapsed, rss):
+    if not latencies:
+        print(f'{label}: no requests completed')
+        return
+    ordered = sorted(latencies)
+
+    def pct(p):
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p))] * 1000
+
+    print(
+        f'{label:>5}  {len(latencies) / elapsed:>9.1f} req/s  '
+        f'p50 {pct(0.50):>7.1f} ms  p95 {pct(0.95):>7.1f} ms  p99 {pct(0.99):>7.1f} ms  '
+        f'mean {statistics.mean(latencies) * 1000:>7.1f} ms  '
+        f'rss {rss / 1024 if rss else 0:>6.0f} MiB  status {statuses}'
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=2, help='Worker processes per server')
+    parser.add_argument('--concurrency', type=int, default=32, help='Concurrent clients')
+    parser.add_argument('--duration', type=float, default=15, help='Seconds per run')
+    parser.add_argument('--paths', default=','.join(DEFAULT_PATHS), help='Comma-separated paths under /api/')
+    parser.add_argument('--bust-cache', action='store_true', help='Make every request a cache miss')
+    parser.add_argument('--wsgi-url', help='Use a running WSGI server, e.g. http://127.0.0.1:8000/api/')
+    parser.add_argument('--asgi-url', help='Use a running ASGI server, e.g. http://127.0.0.1:8001/api/async/')
+    parser.add_argument('--port', type=int, default=8700)
+    args = parser.parse_args(argv)
+
+    paths = [p.strip().lstrip('/') for p in args.paths.split(',') if p.strip()]
+    print(f'{args.concurrency} clients, {args.duration:.0f}s per server, {args.workers} workers, paths: {paths}')
+    for kind, url, port in (('wsgi', args.wsgi_url, args.port), ('asgi', args.asgi_url, args.port + 1)):
+        process = None
+        if url is None:
+            process = start_server(kind, port, args.workers)
+            url = f'http://127.0.0.1:{port}/api/' + ('async/' if kind == 'asgi' else '')
+        try:
+            run_load(url, paths, min(args.concurrency, 4), 2, args.bust_cache)  # warm up
+            latencies, statuses, elapsed = run_load(url, paths, args.concurrency, args.duration, args.bust_cache)
+            report(kind, latencies, statuses, elapsed, rss_kb(process.pid) if process else 0)
+        finally:
+            if process:
+                stop_server(process)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,9 @@
 from django.contrib import admin
 from .models import (
     Category, Product, Address, Cart, CartItem, 
-    Order, OrderItem, Review
+    Order, OrderEvent, OrderItem, Review, StockHold
 )
+from .order_status import transition_orders
 
 
 @admin.register(Category)
@@ -15,24 +16,24 @@ class CategoryAdmin(admin.ModelAdmin):
 
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
-    list_display = ['name', 'category', 'price', 'stock', 'rating', 'is_active', 'created_at']
+    list_display = ['name', 'category', 'price', 'stock', 'reserved', 'rating', 'is_active', 'created_at']
     list_filter = ['category', 'brand', 'is_active', 'created_at']
     search_fields = ['name', 'description', 'brand']
     list_editable = ['price', 'stock', 'is_active']
     ordering = ['-created_at']
-    readonly_fields = ['rating', 'num_reviews', 'created_at', 'updated_at']
+    readonly_fields = ['reserved', 'rating', 'rating_sum', 'num_reviews', 'created_at', 'updated_at']
     fieldsets = (
         ('Basic Information', {
             'fields': ('name', 'description', 'category', 'brand')
         }),
         ('Pricing & Stock', {
-            'fields': ('price', 'stock', 'is_active')
+            'fields': ('price', 'stock', 'reserved', 'is_active')
         }),
         ('Media', {
             'fields': ('image',)
         }),
         ('Ratings', {
-            'fields': ('rating', 'num_reviews'),
+            'fields': ('rating', 'rating_sum', 'num_reviews'),
             'classes': ('collapse',)
         }),
         ('Timestamps', {
@@ -76,21 +77,60 @@ class CartItemAdmin(admin.ModelAdmin):
     ordering = ['-added_at']
 
 
+@admin.register(StockHold)
+class StockHoldAdmin(admin.ModelAdmin):
+    list_display = ['user', 'product', 'quantity', 'expires_at', 'created_at']
+    search_fields = ['user__username', 'product__name']
+    ordering = ['expires_at']
+    # Holds and Product.reserved move together; edit them through the API
+    readonly_fields = ['user', 'product', 'quantity', 'expires_at', 'created_at']
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
 class OrderItemInline(admin.TabularInline):
     model = OrderItem
     extra = 0
     readonly_fields = ['product', 'quantity', 'price']
 
 
+class OrderEventInline(admin.TabularInline):
+    model = OrderEvent
+    extra = 0
+    can_delete = False
+    readonly_fields = ['from_status', 'to_status', 'actor', 'source', 'note', 'created_at']
+
+    def has_add_permission(self, request, obj=None):
+        return False
+
+
+def transition_action(target):
+    """Admin action moving the selected orders to `target` in one batch."""
+    @admin.action(description=f'Mark selected orders as {target}')
+    def action(modeladmin, request, queryset):
+        ids = list(queryset.values_list('pk', flat=True))
+        moved = transition_orders(ids, target, actor=request.user, source='admin')
+        modeladmin.message_user(
+            request, f'{len(moved)} order(s) marked {target}; {len(ids) - len(moved)} skipped.'
+        )
+    action.__name__ = f'mark_{target}'
+    return action
+
+
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'total', 'status', 'created_at', 'updated_at']
     list_filter = ['status', 'created_at']
     search_fields = ['user__username', 'user__email']
-    list_editable = ['status']
     ordering = ['-created_at']
-    readonly_fields = ['created_at', 'updated_at']
-    inlines = [OrderItemInline]
+    # Status only changes through the actions, which follow ORDER_TRANSITIONS and log events
+    readonly_fields = ['status', 'created_at', 'updated_at']
+    actions = [transition_action(s) for s in ('processing', 'shipped', 'delivered', 'cancelled')]
+    inlines = [OrderItemInline, OrderEventInline]
     fieldsets = (
         ('Order Information', {
             'fields': ('user', 'address', 'total', 'status')
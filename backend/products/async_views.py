@@ -0,0 +1,249 @@
+"""
+Native async read-only catalogue endpoints (``/api/async/...``).
+
+These are plain Django ``async def`` views rather than DRF viewsets, which
+run synchronously. Rows are read with the async ORM (`aiterator`, `acount`,
+`aget`) and responses are cached through the async cache API under the same
+namespaces as the DRF views, so the signal-driven invalidation in
+`products/signals.py` covers both. Under ASGI (see README) a worker keeps
+serving other requests while one waits on the database or cache.
+
+Endpoints are anonymous and read-only, and accept the same query params as
+their DRF counterparts, cursor pagination included. Each request is counted
+against the ``catalog`` throttle rate under the same client-IP key as the
+DRF views, so switching paths does not reset a client's budget.
+"""
+import functools
+import math
+from decimal import Decimal, InvalidOperation
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+from rest_framework.throttling import BaseThrottle
+
+from ecommerce.metrics import serializer_timer
+from ecommerce.renderers import FastJSONRenderer
+from ecommerce.throttling import ahit
+
+from .cache import acached_data, product_namespace
+from .exports import parse_bool
+from .models import Category, Product, Review
+from .pagination import DEFAULT_CURSOR_SORT, TOTAL_MODES, KeysetPaginator, estimate_count
+from .search import search_products
+from .serializers import CategorySerializer, ProductCardEncoder, ProductSerializer, ReviewSerializer
+from .views import CATEGORY_NAMESPACES, MAX_PAGE_SIZE, ProductViewSet
+
+DEFAULT_LIMIT = 12
+THROTTLE_SCOPE = ProductViewSet.throttle_scope
+
+_renderer = FastJSONRenderer()
+
+
+class NotFound(Exception):
+    pass
+
+
+def _json(data, status=200):
+    with serializer_timer():
+        content = _renderer.render(data)
+    return HttpResponse(content, content_type='application/json', status=status)
+
+
+def throttled(view):
+    """Refuse with 429 once the client IP is over the catalogue rate."""
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        wait = await ahit(THROTTLE_SCOPE, f'ip:{BaseThrottle().get_ident(request)}')
+        if wait:
+            seconds = math.ceil(wait)
+            response = _json({'detail': f'Request was throttled. Expected available in {seconds} seconds.'}, status=429)
+            response['Retry-After'] = str(seconds)
+            return response
+        return await view(request, *args, **kwargs)
+    return wrapper
+
+
+def _limit(params, default_limit=DEFAULT_LIMIT):
+    try:
+        limit = int(params.get('limit', default_limit))
+    except ValueError:
+        limit = default_limit
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _page_bounds(params, default_limit=DEFAULT_LIMIT):
+    limit = _limit(params, default_limit)
+    try:
+        page = max(int(params.get('page', '1')), 1)
+    except ValueError:
+        page = 1
+    start = (page - 1) * limit
+    return start, start + limit
+
+
+async def _count(queryset, params, default='exact'):
+    mode = params.get('total', default)
+    if mode not in TOTAL_MODES:
+        mode = default
+    if mode == 'exact':
+        return await queryset.acount()
+    if mode == 'estimate':
+        return await sync_to_async(estimate_count)(queryset)
+    return None
+
+
+async def _instances(queryset, chunk_size):
+    # chunk_size is required for aiterator() to honour prefetch_related()
+    return [obj async for obj in queryset.aiterator(chunk_size=chunk_size)]
+
+
+async def _serve(request, namespaces, build):
+    try:
+        data = await acached_data(request, namespaces, build)
+    except NotFound as e:
+        return _json({'detail': str(e)}, status=404)
+    except ValueError as e:
+        return _json({'error': str(e)}, status=400)
+    return _json(data)
+
+
+def _filter_products(queryset, params):
+    category = params.get('category')
+    if category:
+        if category.isdigit():
+            queryset = queryset.filter(category__id=category)
+        else:
+            queryset = queryset.filter(category__name__iexact=category)
+    if params.get('brand'):
+        queryset = queryset.filter(brand=params['brand'])
+    if params.get('is_active'):
+        queryset = queryset.filter(is_active=parse_bool(params['is_active']))
+    if params.get('price'):
+        try:
+            price = Decimal(params['price'])
+        except InvalidOperation:
+            price = None
+        if price is None or not price.is_finite():
+            raise ValueError('Invalid price')
+        queryset = queryset.filter(price=price)
+    return queryset
+
+
+def _sort_products(queryset, params):
+    # ?ordering= as DRF's OrderingFilter reads it; ?sort= takes precedence
+    fields = [term.strip() for term in params.get('ordering', '').split(',')]
+    ordering = [term for term in fields if term.lstrip('-') in ProductViewSet.ordering_fields]
+    queryset = queryset.order_by(*(ordering or ProductViewSet.ordering))
+    sort = params.get('sort')
+    if sort in ['price', '-price', 'rating', '-rating']:
+        return queryset.order_by(sort, 'id')
+    if sort == 'relevance' and 'relevance' in queryset.query.annotations:
+        return queryset.order_by('-relevance', 'id')
+    return queryset
+
+
+async def _cursor_page(queryset, params, cards):
+    sort = params.get('sort') or params.get('ordering') or DEFAULT_CURSOR_SORT
+    paginator = KeysetPaginator(sort=sort, limit=_limit(params))
+    page_queryset = queryset
+    if cards:
+        # The sort column is needed to build the next cursor
+        page_queryset = queryset.prefetch_related(None).values(*cards.columns(paginator.field))
+    rows, next_cursor, prev_cursor = await paginator.apaginate(page_queryset, params.get('cursor'))
+    items = cards.encode(rows) if cards else ProductSerializer(rows, many=True).data
+    data = {'items': items, 'next': next_cursor, 'prev': prev_cursor}
+    total = await _count(queryset, params, default='none')
+    if total is not None:
+        data['total'] = total
+    return data
+
+
+@require_GET
+@throttled
+async def product_list(request):
+    params = request.GET
+
+    async def build():
+        queryset = _filter_products(Product.objects.with_related(), params)
+        q = params.get('q') or params.get('search')
+        if q:
+            # The in-memory search backend may read the DB to build its index
+            queryset = await sync_to_async(search_products)(queryset, q)
+        cards = None
+        if params.get('view') == 'card' or 'fields' in params:
+            cards = ProductCardEncoder.from_param(params.get('fields'))
+        if params.get('pagination') == 'cursor' or params.get('cursor'):
+            return await _cursor_page(queryset, params, cards)
+
+        queryset = _sort_products(queryset, params)
+        start, end = _page_bounds(params)
+        if cards:
+            rows = queryset.prefetch_related(None).values(*cards.columns())[start:end]
+            items = cards.encode([row async for row in rows.aiterator()])
+        else:
+            products = await _instances(queryset[start:end], end - start)
+            items = ProductSerializer(products, many=True).data
+        data = {'items': items}
+        total = await _count(queryset, params)
+        if total is not None:
+            data['total'] = total
+        return data
+
+    return await _serve(request, 'products', build)
+
+
+@require_GET
+@throttled
+async def product_detail(request, pk):
+    async def build():
+        try:
+            product = await Product.objects.with_related().aget(pk=pk)
+        except Product.DoesNotExist:
+            raise NotFound('No Product matches the given query.')
+        return ProductSerializer(product).data
+
+    return await _serve(request, [product_namespace(pk), 'categories'], build)
+
+
+@require_GET
+@throttled
+async def product_reviews(request, pk):
+    async def build():
+        if not await Product.objects.filter(pk=pk).aexists():
+            raise NotFound('No Product matches the given query.')
+        reviews = Review.objects.with_related().filter(product_id=pk).order_by('-created_at')
+        return ReviewSerializer([review async for review in reviews.aiterator()], many=True).data
+
+    return await _serve(request, [product_namespace(pk)], build)
+
+
+@require_GET
+@throttled
+async def category_list(request):
+    params = request.GET
+
+    async def build():
+        queryset = Category.objects.order_by('name')
+        start, end = _page_bounds(params, default_limit=MAX_PAGE_SIZE)
+        categories = [category async for category in queryset[start:end].aiterator()]
+        data = {'items': CategorySerializer(categories, many=True).data}
+        total = await _count(queryset, params)
+        if total is not None:
+            data['total'] = total
+        return data
+
+    return await _serve(request, CATEGORY_NAMESPACES, build)
+
+
+@require_GET
+@throttled
+async def category_detail(request, pk):
+    async def build():
+        try:
+            category = await Category.objects.aget(pk=pk)
+        except Category.DoesNotExist:
+            raise NotFound('No Category matches the given query.')
+        return CategorySerializer(category).data
+
+    return await _serve(request, CATEGORY_NAMESPACES, build)
@@ -0,0 +1,269 @@
+"""
+Versioned read-through cache for catalogue responses.
+
+Cached entries are keyed by the request path, the normalised query
+string and the versions of their namespaces. Writes never delete keys;
+they bump the version of every namespace whose output they affect (see
+`products/signals.py`), which makes all older entries unreachable at
+once. TTL is only a backstop.
+
+The versions also serve as HTTP validators. `cached_response` derives
+the ETag from the cache key and Last-Modified from the time of the
+latest bump, once that bump is a whole second old. A conditional GET that still matches is answered with
+`304 Not Modified` before the view touches the database.
+
+Namespaces:
+- ``categories``      category list/detail responses
+- ``products``        product list pages
+- ``product:<pk>``    one product's detail and reviews responses
+- ``category_stats``  category responses again, bumped when the figures
+                      in `products/category_stats.py` move
+
+The backing store is the cache named by ``CATALOG_CACHE_ALIAS`` so
+deployments can point it at Redis while tests use local memory.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.response import Response
+
+
+KEY_PREFIX = 'catalog'
+
+_stats_lock = threading.Lock()
+_stats = Counter()
+
+
+def get_cache():
+    return caches[getattr(settings, 'CATALOG_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+
+
+def _version_key(namespace):
+    return f'{KEY_PREFIX}:version:{namespace}'
+
+
+def _modified_key(namespace):
+    return f'{KEY_PREFIX}:modified:{namespace}'
+
+
+def _initial_version():
+    # Seed from the clock so a version evicted from the cache can never
+    # resurface an entry written under an earlier, equal number.
+    return time.time_ns() // 1000
+
+
+def _initial_modified():
+    # Unknown history: "now" is the only time that cannot be too early
+    return time.time()
+
+
+def get_version(namespace):
+    cache = get_cache()
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def get_validators(namespaces):
+    """
+    `(versions, last_modified)` for `namespaces`, where `last_modified` is
+    the latest bump (epoch seconds). One cache round trip unless some key
+    has to be seeded.
+    """
+    cache = get_cache()
+    version_keys = [_version_key(ns) for ns in namespaces]
+    modified_keys = [_modified_key(ns) for ns in namespaces]
+    found = cache.get_many(version_keys + modified_keys)
+    missing = [key for key in version_keys + modified_keys if key not in found]
+    for key in missing:
+        cache.add(key, _initial_version() if key in version_keys else _initial_modified(), None)
+    if missing:
+        found.update(cache.get_many(missing))
+    return [found[key] for key in version_keys], max(found[key] for key in modified_keys)
+
+
+def bump(*namespaces):
+    """Invalidate every entry cached under the given namespaces."""
+    cache = get_cache()
+    for namespace in namespaces:
+        key = _version_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _initial_version(), None)
+    now = time.time()
+    cache.set_many({_modified_key(namespace): now for namespace in namespaces}, None)
+
+
+def normalize_params(query_params):
+    """Order-independent representation of a QueryDict."""
+    return '&'.join(
+        f'{key}={value}'
+        for key in sorted(query_params)
+        for value in sorted(query_params.getlist(key))
+    )
+
+
+def _compose_key(namespaces, versions, path, query_params):
+    versions = '.'.join(str(version) for version in versions)
+    params = normalize_params(query_params) if query_params is not None else ''
+    # The path keeps list and detail responses (and the sync and async
+    # views) apart when they share namespaces and a query string.
+    digest = hashlib.sha1(f'{path}?{params}'.encode()).hexdigest()
+    return f'{KEY_PREFIX}:{namespaces[0]}:{versions}:{digest}'
+
+
+def build_key(namespaces, query_params=None, path=''):
+    versions, _ = get_validators(namespaces)
+    return _compose_key(namespaces, versions, path, query_params)
+
+
+def make_etag(key, media_type=''):
+    # Weak: the same data is served through several renderers
+    return 'W/"%s"' % hashlib.sha1(f'{key}|{media_type}'.encode()).hexdigest()
+
+
+def record(namespace, outcome):
+    with _stats_lock:
+        _stats[f'{namespace}:{outcome}'] += 1
+
+
+def cache_stats():
+    """Snapshot of hit/miss counters for this process, by namespace."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def cached_response(request, namespaces, build, query_params=None):
+    """
+    Serve `build()`'s response data from cache when possible.
+
+    `namespaces` lists every namespace the response depends on; the first
+    one labels the entry and its hit/miss counters. Only successful
+    responses are stored. `query_params` narrows the key to the parameters
+    that matter (default: the whole query string).
+
+    Successful responses carry `ETag` and `Last-Modified` built from the
+    namespace versions (`Last-Modified` only once the newest bump is at
+    least a second old). A request whose `If-None-Match` or
+    `If-Modified-Since` still matches gets an empty 304 without `build()`
+    or a cache read.
+    """
+    if isinstance(namespaces, str):
+        namespaces = [namespaces]
+    label = namespaces[0].split(':', 1)[0]
+    cache = get_cache()
+    versions, modified = get_validators(namespaces)
+    if query_params is None:
+        query_params = request.query_params
+    key = _compose_key(namespaces, versions, request.path, query_params)
+    accepted = getattr(request, 'accepted_media_type', '')
+    validators = {'ETag': make_etag(key, accepted)}
+    # HTTP dates have one-second resolution. While the newest bump is in
+    # the current second, another bump in that second would carry the same
+    # date, so Last-Modified (and If-Modified-Since) wait for the next one;
+    # the version-based ETag still applies.
+    last_modified = int(modified) if int(modified) < int(time.time()) else None
+    if last_modified is not None:
+        validators['Last-Modified'] = http_date(last_modified)
+
+    conditional = get_conditional_response(
+        request, etag=validators['ETag'], last_modified=last_modified
+    )
+    if conditional is not None:
+        record(label, 'not_modified')
+        return Response(status=conditional.status_code, headers=validators)
+
+    data = cache.get(key)
+    if data is not None:
+        record(label, 'hit')
+        response = Response(data)
+    else:
+        record(label, 'miss')
+        response = build()
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, get_timeout())
+    if response.status_code == status.HTTP_200_OK:
+        for header, value in validators.items():
+            response[header] = value
+        # Revalidate on every use instead of trusting heuristic freshness
+        response.setdefault('Cache-Control', 'no-cache')
+    return response
+
+
+async def _acall(cache, method, *args):
+    # Django's a*() cache methods run the sync call in a thread; local
+    # memory never blocks, so it is called directly.
+    if isinstance(cache, LocMemCache):
+        return getattr(cache, method)(*args)
+    return await getattr(cache, f'a{method}')(*args)
+
+
+async def aget_versions(namespaces):
+    """Versions for `namespaces`, fetched in one round trip."""
+    cache = get_cache()
+    keys = [_version_key(ns) for ns in namespaces]
+    found = await _acall(cache, 'get_many', keys)
+    missing = [key for key in keys if key not in found]
+    for key in missing:
+        await _acall(cache, 'add', key, _initial_version(), None)
+    if missing:
+        found.update(await _acall(cache, 'get_many', missing))
+    return [found[key] for key in keys]
+
+
+async def abuild_key(namespaces, query_params=None, path=''):
+    versions = await aget_versions(namespaces)
+    return _compose_key(namespaces, versions, path, query_params)
+
+
+async def acached_data(request, namespaces, build):
+    """
+    Async counterpart of `cached_response` for plain Django views.
+
+    `build` is a coroutine function returning the payload; exceptions it
+    raises propagate and nothing is stored.
+    """
+    if isinstance(namespaces, str):
+        namespaces = [namespaces]
+    label = namespaces[0].split(':', 1)[0]
+    cache = get_cache()
+    key = await abuild_key(namespaces, request.GET, request.path)
+    data = await _acall(cache, 'get', key)
+    if data is not None:
+        record(label, 'hit')
+        return data
+
+    record(label, 'miss')
+    data = await build()
+    await _acall(cache, 'set', key, data, get_timeout())
+    return data
+
+
+def product_namespace(pk):
+    return f'product:{pk}'
+
+
+def bump_products(product_ids):
+    """Invalidate product pages after writes that bypass model signals."""
+    bump('products', *(product_namespace(pk) for pk in product_ids))
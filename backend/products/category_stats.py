@@ -0,0 +1,230 @@
+"""
+Materialized category statistics.
+
+`Category` stores `products_count`, `active_products_count`, `min_price`,
+`max_price` and `avg_rating`, so category listings (and product payloads
+that nest the category) read columns instead of aggregating products.
+Product payloads nest only `products_count`. `avg_rating` is kept with
+its running `rating_total` and `rated_products_count`.
+
+Single writes shift the figures, like `ratings.apply_rating_delta`:
+- the Product and Review signals work out what the product added to its
+  category before and after the write (`contribution`) and
+  `apply_contribution_change` moves each category by the difference with
+  one `F()` UPDATE, no read of the category's products
+- counts and the rating sums move by deltas; a new price widens the
+  min/max with LEAST/GREATEST, and only a product leaving at the current
+  min or max re-reads that one aggregate
+Bulk imports, rating reconciles and the `reconcile_category_stats`
+command instead use `refresh_category_stats`, which recomputes the
+categories involved. It runs one SELECT to find categories whose stored
+figures differ, then one UPDATE, and bumps the cache only when something
+moved. Run the command to repair drift from writes that bypass both
+paths (e.g. raw ``QuerySet.update``).
+"""
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db.models import (
+    Avg, Case, Count, DecimalField, F, FloatField, IntegerField, Max, Min, OuterRef, Q, QuerySet, Subquery, Sum,
+    Value, When
+)
+from django.db.models.functions import Cast, Coalesce, Greatest, Least, Round
+
+from .cache import bump
+from .models import CATEGORY_STATS_SOURCES, Category, Product
+
+# Category responses depend on this as well as 'categories'; product
+# responses do not.
+STATS_NAMESPACE = 'category_stats'
+PRICE = DecimalField(max_digits=10, decimal_places=2)
+# Stands in for NULL when comparing stored and actual figures
+MISSING = -1
+
+
+def _product_stat(expression, output_field, **filters):
+    return Subquery(
+        Product.objects.filter(category=OuterRef('pk'), **filters)
+        .order_by()
+        .values('category')
+        .annotate(value=expression)
+        .values('value'),
+        output_field=output_field,
+    )
+
+
+def actual_stats():
+    """Expressions for each stored statistic, computed from the products table."""
+    return {
+        'products_count': Coalesce(_product_stat(Count('id'), IntegerField()), 0),
+        'active_products_count': Coalesce(
+            _product_stat(Count('id'), IntegerField(), is_active=True), 0
+        ),
+        'min_price': _product_stat(Min('price'), PRICE, is_active=True),
+        'max_price': _product_stat(Max('price'), PRICE, is_active=True),
+        'avg_rating': _product_stat(
+            Round(Avg('rating'), 1), FloatField(), is_active=True, num_reviews__gt=0
+        ),
+        'rated_products_count': Coalesce(
+            _product_stat(Count('id'), IntegerField(), is_active=True, num_reviews__gt=0), 0
+        ),
+        'rating_total': Coalesce(
+            _product_stat(Round(Sum('rating'), 1), FloatField(), is_active=True, num_reviews__gt=0), 0.0
+        ),
+    }
+
+
+def _differs(field):
+    output = Category._meta.get_field(field)
+    return ~Q(**{f'{field}_cmp': F(f'actual_{field}_cmp')}), {
+        f'{field}_cmp': Coalesce(F(field), MISSING, output_field=output),
+        f'actual_{field}_cmp': Coalesce(F(f'actual_{field}'), MISSING, output_field=output),
+    }
+
+
+def refresh_category_stats(category_ids=None):
+    """
+    Recompute statistics for `category_ids` (default: every category).
+    `category_ids` may be an iterable of ids or a ``values()`` queryset.
+
+    Returns the number of categories whose figures changed.
+    """
+    stats = actual_stats()
+    candidates = Category.objects.all()
+    if isinstance(category_ids, QuerySet):
+        candidates = candidates.filter(pk__in=category_ids)
+    elif category_ids is not None:
+        candidates = candidates.filter(pk__in=[pk for pk in set(category_ids) if pk is not None])
+    candidates = candidates.annotate(**{f'actual_{field}': expression for field, expression in stats.items()})
+
+    drift = Q()
+    for field in stats:
+        condition, comparisons = _differs(field)
+        candidates = candidates.annotate(**comparisons)
+        drift |= condition
+        if field == 'products_count':
+            count_moved = condition
+    stale = list(
+        candidates.filter(drift)
+        .annotate(count_moved=Case(When(count_moved, then=True), default=False))
+        .values_list('pk', 'count_moved')
+    )
+    if not stale:
+        return 0
+    updated = Category.objects.filter(pk__in=[pk for pk, _ in stale]).update(**stats)
+    # Product payloads nest the category with products_count only
+    # (NestedCategorySerializer), so price and rating moves leave them valid.
+    if any(moved for _, moved in stale):
+        bump(STATS_NAMESPACE, 'categories', 'products')
+    else:
+        bump(STATS_NAMESPACE)
+    return updated
+
+
+def refresh_for_products(product_ids):
+    """Refresh the categories of `product_ids` after writes that bypass signals."""
+    # Passed as a subquery, so finding the categories costs no extra query
+    return refresh_category_stats(Product.objects.filter(pk__in=list(product_ids)).values('category_id'))
+
+
+# What one product adds to its category's figures. `price` is None for
+# inactive products; `rating` is 0 unless the product is active and rated.
+Contribution = namedtuple('Contribution', 'category_id active price rated rating')
+
+
+def contribution(values):
+    """
+    The `Contribution` of a product given its column values (a dict such
+    as a model's ``__dict__`` or a ``values()`` row), or None if any of
+    the columns it needs are missing (deferred).
+    """
+    if any(field not in values for field in CATEGORY_STATS_SOURCES):
+        return None
+    active = bool(values['is_active'])
+    rated = active and values['num_reviews'] > 0
+    return Contribution(
+        category_id=values['category_id'],
+        active=active,
+        price=Decimal(str(values['price'])) if active else None,
+        rated=rated,
+        rating=values['rating'] if rated else 0.0,
+    )
+
+
+def product_contribution(product_id, lock=False):
+    """Read the current `Contribution` of one product (None if it is gone)."""
+    queryset = Product.objects.select_for_update() if lock else Product.objects
+    row = queryset.filter(pk=product_id).values(*CATEGORY_STATS_SOURCES).first()
+    return contribution(row) if row else None
+
+
+def _shifted_price(field, removed, added, recompute, widen):
+    # Re-read the aggregate only when a departing price was the extreme;
+    # otherwise an arriving price can only widen the range.
+    value = F(field)
+    if added:
+        value = widen(Coalesce(F(field), Value(added[0])), *(Value(price) for price in added))
+    if removed:
+        value = Case(When(**{f'{field}__in': removed}, then=recompute), default=value)
+    return value
+
+
+def _deltas(parts):
+    count = sum(sign for sign, part in parts)
+    active = sum(sign for sign, part in parts if part.active)
+    rated = sum(sign for sign, part in parts if part.rated)
+    rating = sum(sign * part.rating for sign, part in parts)
+    removed = [part.price for sign, part in parts if sign < 0 and part.active]
+    added = [part.price for sign, part in parts if sign > 0 and part.active]
+
+    fields = {}
+    if count:
+        fields['products_count'] = F('products_count') + count
+    if active:
+        fields['active_products_count'] = F('active_products_count') + active
+    if removed or added:
+        stats = actual_stats()
+        fields['min_price'] = _shifted_price('min_price', removed, added, stats['min_price'], Least)
+        fields['max_price'] = _shifted_price('max_price', removed, added, stats['max_price'], Greatest)
+    if rated or rating:
+        # Every right-hand side sees the row's old values
+        new_total = Round(F('rating_total') + rating, 1, output_field=FloatField())
+        new_rated = F('rated_products_count') + rated
+        fields['rated_products_count'] = new_rated
+        fields['rating_total'] = new_total
+        fields['avg_rating'] = Case(
+            When(rated_products_count__lte=-rated, then=Value(None)),
+            default=Round(new_total / Cast(new_rated, FloatField()), 1),
+            output_field=FloatField(),
+        )
+    return fields
+
+
+def apply_contribution_change(old, new):
+    """
+    Move category figures from contribution `old` to `new` (None for a
+    product that did not exist before, or no longer does).
+
+    One UPDATE per category involved, none if nothing the figures depend
+    on changed. Returns the number of categories updated.
+    """
+    if old == new:
+        return 0
+    parts = {}
+    for sign, part in ((-1, old), (1, new)):
+        if part is not None:
+            parts.setdefault(part.category_id, []).append((sign, part))
+    updated = 0
+    count_moved = False
+    for category_id, category_parts in parts.items():
+        fields = _deltas(category_parts)
+        if fields:
+            updated += Category.objects.filter(pk=category_id).update(**fields)
+            count_moved = count_moved or 'products_count' in fields
+    if updated:
+        # Same rule as refresh_category_stats: product payloads only nest the count
+        if count_moved:
+            bump(STATS_NAMESPACE, 'categories', 'products')
+        else:
+            bump(STATS_NAMESPACE)
+    return updated
@@ -0,0 +1,122 @@
+"""
+Streaming product catalogue export.
+
+Rows are read with `.values().iterator()` (server-side cursors on
+PostgreSQL) and encoded chunk by chunk, so memory use is bounded by
+`chunk_size` no matter how large the catalogue is. The same generators
+back the `/api/products/export/` endpoint and the `export_products`
+management command.
+"""
+import csv
+import io
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .models import Product
+
+
+EXPORT_FIELDS = [
+    'id', 'sku', 'name', 'description', 'price', 'brand', 'stock', 'rating',
+    'num_reviews', 'is_active', 'image', 'category_id', 'category__name',
+    'created_at', 'updated_at',
+]
+
+# Friendlier column names for the flattened category
+COLUMN_NAMES = {'category__name': 'category'}
+
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+class ExportError(ValueError):
+    """Raised for invalid export parameters."""
+
+
+def parse_updated_since(value):
+    """Accept an ISO datetime or date; naive values are taken as UTC."""
+    try:
+        # Both parsers raise ValueError for well-formed but impossible
+        # values such as 2024-02-30
+        parsed = parse_datetime(value)
+        date = parse_date(value) if parsed is None else None
+    except ValueError:
+        parsed = date = None
+    if parsed is None:
+        if date is None:
+            raise ExportError(f'Invalid updated_since: {value}')
+        parsed = datetime(date.year, date.month, date.day)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, dt_timezone.utc)
+    return parsed
+
+
+def parse_bool(value):
+    lowered = str(value).lower()
+    if lowered in ('1', 'true', 'yes'):
+        return True
+    if lowered in ('0', 'false', 'no'):
+        return False
+    raise ExportError(f'Invalid boolean: {value}')
+
+
+def export_rows(category=None, is_active=None, updated_since=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield product rows as dicts, filtered for incremental feeds."""
+    queryset = Product.objects.all()
+    if category:
+        if str(category).isdigit():
+            queryset = queryset.filter(category_id=category)
+        else:
+            queryset = queryset.filter(category__name__iexact=category)
+    if is_active is not None:
+        queryset = queryset.filter(is_active=is_active)
+    if updated_since is not None:
+        queryset = queryset.filter(updated_at__gte=updated_since)
+    rows = queryset.order_by('pk').values(*EXPORT_FIELDS)
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield {COLUMN_NAMES.get(key, key): value for key, value in row.items()}
+
+
+def _chunked(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_csv(rows, chunk_size=500):
+    columns = [COLUMN_NAMES.get(field, field) for field in EXPORT_FIELDS]
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+    for chunk in _chunked(rows, chunk_size):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def iter_ndjson(rows, chunk_size=500):
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for chunk in _chunked(rows, chunk_size):
+        yield ''.join(encoder.encode(row) + '\n' for row in chunk)
+
+
+def iter_export(fmt, rows):
+    if fmt == 'csv':
+        return iter_csv(rows)
+    if fmt == 'ndjson':
+        return iter_ndjson(rows)
+    raise ExportError(f"Unsupported format: {fmt}. Use one of: {', '.join(FORMATS)}")
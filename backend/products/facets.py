@@ -0,0 +1,90 @@
+"""
+Facet counts for the product listing.
+
+`compute_facets` takes an already filtered product queryset (the one
+`ProductViewSet` would list) and counts it by category, brand, price
+bucket and rating band. That takes three queries whatever the size of the
+catalogue:
+- ``GROUP BY category``
+- ``GROUP BY brand`` (top `BRAND_LIMIT`)
+- one conditional aggregate for every price bucket, rating band, the
+  total and the price range
+"""
+from django.db.models import Count, Max, Min, Q
+
+from .models import Product
+
+# Upper edges of the price buckets; the last bucket is open-ended.
+PRICE_EDGES = (25, 50, 100, 250, 500, 1000)
+# "N stars & up" bands, highest first
+RATING_BANDS = (4, 3, 2, 1)
+BRAND_LIMIT = 50
+
+# Query parameters that change which products are counted; the rest
+# (paging, sorting, card fields) do not affect facets.
+FILTER_PARAMS = ('category', 'brand', 'is_active', 'price', 'q', 'search')
+
+
+def price_buckets():
+    """`(min, max)` pairs covering every price; `max` is None for the last."""
+    lows = (0,) + PRICE_EDGES
+    return list(zip(lows, PRICE_EDGES + (None,)))
+
+
+def _bucket_filter(low, high):
+    condition = Q(price__gte=low)
+    if high is not None:
+        condition &= Q(price__lt=high)
+    return condition
+
+
+def compute_facets(queryset):
+    # Listing order (and relevance ranking) only slows the GROUP BYs down
+    queryset = queryset.order_by()
+
+    categories = (
+        queryset.values('category_id', 'category__name')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'category__name')
+    )
+    brands = (
+        queryset.exclude(brand='').values('brand')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'brand')[:BRAND_LIMIT]
+    )
+
+    buckets = price_buckets()
+    aggregates = {
+        'total': Count('id'),
+        'price_min': Min('price'),
+        'price_max': Max('price'),
+    }
+    for i, (low, high) in enumerate(buckets):
+        aggregates[f'price_{i}'] = Count('id', filter=_bucket_filter(low, high))
+    for band in RATING_BANDS:
+        aggregates[f'rating_{band}'] = Count('id', filter=Q(rating__gte=band))
+    totals = queryset.aggregate(**aggregates)
+
+    places = Product._meta.get_field('price').decimal_places
+
+    def as_price(value):
+        # Same form as ProductSerializer's price; SQLite drops trailing zeros
+        return None if value is None else f'{value:.{places}f}'
+
+    return {
+        'total': totals['total'],
+        'category': [
+            {'id': row['category_id'], 'name': row['category__name'], 'count': row['count']}
+            for row in categories
+        ],
+        'brand': [{'value': row['brand'], 'count': row['count']} for row in brands],
+        'price': {
+            'min': as_price(totals['price_min']),
+            'max': as_price(totals['price_max']),
+            'buckets': [
+                {'min': low, 'max': high, 'count': totals[f'price_{i}']}
+                for i, (low, high) in enumerate(buckets)
+            ],
+        },
+        'rating': [{'min': band, 'count': totals[f'rating_{band}']} for band in RATING_BANDS],
+    }
@@ -0,0 +1,178 @@
+"""
+Bulk product import.
+
+Rows (CSV or NDJSON) are validated in chunks with a lightweight, query-free
+serializer, categories are resolved by name from one lookup map, and each
+chunk is written with a single `INSERT ... ON CONFLICT (sku) DO UPDATE`.
+Rows that fail validation are reported with their line number and skipped;
+the rest of the file still loads.
+"""
+import csv
+import io
+import json
+
+from django.db import transaction
+from rest_framework import serializers
+
+from . import search
+from .cache import bump_products
+from .category_stats import refresh_category_stats
+from .models import Category, Product
+
+
+DEFAULT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+# Columns overwritten when a SKU already exists
+UPSERT_FIELDS = [
+    'name', 'description', 'price', 'category', 'image', 'brand',
+    'stock', 'is_active', 'updated_at',
+]
+
+
+class ProductImportError(ValueError):
+    """Raised when the input cannot be read at all."""
+
+
+class ProductImportRowSerializer(serializers.Serializer):
+    sku = serializers.CharField(max_length=64)
+    name = serializers.CharField(max_length=200)
+    description = serializers.CharField(allow_blank=True, default='')
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    category = serializers.CharField(max_length=100)
+    image = serializers.URLField(allow_blank=True, default='')
+    brand = serializers.CharField(max_length=100, allow_blank=True, default='')
+    stock = serializers.IntegerField(min_value=0, default=0)
+    is_active = serializers.BooleanField(default=True)
+
+
+def read_rows(stream, fmt):
+    """
+    Yield `(line_number, row)` from a text stream.
+
+    Undecodable bytes raise ProductImportError; chunks imported before
+    them stay committed.
+    """
+    try:
+        yield from _read_rows(stream, fmt)
+    except UnicodeDecodeError:
+        raise ProductImportError('File is not valid UTF-8 text')
+
+
+def _read_rows(stream, fmt):
+    if fmt == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == 'ndjson':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, {'__error__': f'Invalid JSON: {e.msg}'}
+                continue
+            yield line_number, row
+    else:
+        raise ProductImportError(f'Unsupported format: {fmt}. Use csv or ndjson.')
+
+
+def open_upload(uploaded_file):
+    return io.TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', newline='')
+
+
+def _chunks(rows, size):
+    chunk = []
+    for item in rows:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class ImportReport:
+    def __init__(self):
+        self.processed = 0
+        self.upserted = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'processed': self.processed,
+            'upserted': self.upserted,
+            'error_count': self.error_count,
+            'errors': self.errors,
+        }
+
+
+def import_products(rows, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Validate and upsert `(line_number, row)` pairs; returns an ImportReport.
+
+    Each chunk is committed on its own, so a failure part way through a
+    large feed keeps the chunks already loaded.
+    """
+    report = ImportReport()
+    categories = {name.lower(): pk for pk, name in Category.objects.values_list('pk', 'name')}
+
+    for chunk in _chunks(rows, chunk_size):
+        by_sku = {}
+        for line, row in chunk:
+            report.processed += 1
+            if not isinstance(row, dict):
+                report.add_error(line, {'non_field_errors': ['Expected a JSON object']})
+                continue
+            if '__error__' in row:
+                report.add_error(line, {'non_field_errors': [row['__error__']]})
+                continue
+            serializer = ProductImportRowSerializer(data=row)
+            if not serializer.is_valid():
+                report.add_error(line, serializer.errors)
+                continue
+            data = serializer.validated_data
+            category_id = categories.get(data['category'].lower())
+            if category_id is None:
+                report.add_error(line, {'category': [f"Unknown category: {data['category']}"]})
+                continue
+            # Later rows win when a SKU repeats within a chunk; a single
+            # upsert statement cannot touch the same row twice.
+            by_sku[data['sku']] = Product(
+                sku=data['sku'],
+                name=data['name'],
+                description=data['description'],
+                price=data['price'],
+                category_id=category_id,
+                image=data['image'],
+                brand=data['brand'],
+                stock=data['stock'],
+                is_active=data['is_active'],
+            )
+
+        if not by_sku:
+            continue
+        with transaction.atomic():
+            # Primary keys come back via RETURNING for inserted and updated rows
+            products = Product.objects.bulk_create(
+                list(by_sku.values()),
+                update_conflicts=True,
+                unique_fields=['sku'],
+                update_fields=UPSERT_FIELDS,
+            )
+        report.upserted += len(products)
+        bump_products([product.pk for product in products])
+
+    if report.upserted:
+        # bulk_create bypasses model signals; upserts may also have moved
+        # products out of categories this import never names
+        refresh_category_stats()
+        search.reset_index()
+    return report
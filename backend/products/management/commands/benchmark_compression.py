@@ -0,0 +1,94 @@
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ecommerce.compression import ENCODERS, _compress_stream, brotli, zstandard
+from ecommerce.renderers import FastJSONRenderer
+from products.exports import COLUMN_NAMES, EXPORT_FIELDS, iter_csv
+from products.management.commands.benchmark_json import product_page
+from products.serializers import DEFAULT_CARD_FIELDS, ProductCardEncoder
+
+
+def card_page(size):
+    now = timezone.now()
+    rows = [
+        {'id': i, 'name': f'Product {i}', 'price': Decimal('19.99') + i, 'image': f'https://example.com/{i}.jpg',
+         'rating': 4.5, 'category__name': 'Electronics', 'created_at': now}
+        for i in range(size)
+    ]
+    return {'items': ProductCardEncoder(DEFAULT_CARD_FIELDS).encode(rows), 'total': size}
+
+
+def category_list(size):
+    now = timezone.now().isoformat()
+    return {
+        'count': size, 'next': None, 'previous': None,
+        'results': [
+            {'id': i, 'name': f'Category {i}', 'description': 'Things people buy ' * 4,
+             'image': f'https://example.com/c{i}.jpg', 'products_count': i * 7,
+             'created_at': now, 'updated_at': now}
+            for i in range(size)
+        ],
+    }
+
+
+def export_chunks(size):
+    """CSV export chunks as the export endpoint streams them."""
+    now = timezone.now()
+    columns = [COLUMN_NAMES.get(field, field) for field in EXPORT_FIELDS]
+    rows = (
+        dict(zip(columns, [
+            i, f'SKU-{i:06d}', f'Product {i}', 'A test product ' * 8, Decimal('19.99') + i, 'TechBrand',
+            i % 50, 4.5, 12, True, f'https://example.com/{i}.jpg', 1, 'Electronics', now, now,
+        ]))
+        for i in range(size)
+    )
+    return [chunk.encode() for chunk in iter_csv(rows)]
+
+
+def representative_payloads():
+    """`(label, chunks)` for the responses that dominate API traffic."""
+    render = FastJSONRenderer().render
+    return [
+        ('products?limit=12', [render(product_page(12))]),
+        ('products?limit=100', [render(product_page(100))]),
+        ('products?view=card&limit=100', [render(card_page(100))]),
+        ('categories/', [render(category_list(20))]),
+        ('products/export/ (5000 rows)', export_chunks(5000)),
+    ]
+
+
+def _median_cpu_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.process_time()
+        fn()
+        timings.append((time.process_time() - start) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = 'Report compressed size and CPU time per encoding for representative API responses'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        missing = [name for name, module in (('brotli', brotli), ('zstandard', zstandard)) if module is None]
+        if missing:
+            self.stderr.write(self.style.WARNING(f"Not installed, skipped: {', '.join(missing)}"))
+
+        self.stdout.write(f"{'response':<30} {'encoding':>8} {'bytes':>9} {'ratio':>6} {'cpu ms':>8} {'MB/s':>7}")
+        for label, chunks in representative_payloads():
+            raw = sum(len(chunk) for chunk in chunks)
+            self.stdout.write(f'{label:<30} {"identity":>8} {raw:>9} {1:>6.2f} {"-":>8} {"-":>7}')
+            for encoding in ENCODERS:
+                size = sum(len(part) for part in _compress_stream(encoding, chunks))
+                cpu = _median_cpu_ms(lambda: list(_compress_stream(encoding, chunks)), options['repeat'])
+                throughput = raw / 1e6 / (cpu / 1000) if cpu else float('inf')
+                self.stdout.write(
+                    f'{"":<30} {encoding:>8} {size:>9} {raw / size:>6.2f} {cpu:>8.3f} {throughput:>7.0f}'
+                )
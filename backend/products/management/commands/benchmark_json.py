@@ -0,0 +1,65 @@
+import io
+import statistics
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from ecommerce.parsers import FastJSONParser
+from ecommerce.renderers import FastJSONRenderer, orjson
+from products.models import Category, Product
+from products.serializers import ProductSerializer
+
+
+def product_page(size):
+    """Serialized data for a page of `size` products, built without the database."""
+    now = timezone.now()
+    category = Category(id=1, name='Electronics', description='Devices', created_at=now, updated_at=now)
+    category.products_count = size
+    products = [
+        Product(
+            id=i, sku=f'SKU-{i:06d}', name=f'Product {i}', description='A test product ' * 8,
+            price=Decimal('19.99') + i, category=category, image=f'https://example.com/{i}.jpg',
+            brand='TechBrand', stock=i % 50, rating=4.5, num_reviews=12,
+            created_at=now, updated_at=now,
+        )
+        for i in range(size)
+    ]
+    return {'items': ProductSerializer(products, many=True).data, 'total': size}
+
+
+def _median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+class Command(BaseCommand):
+    help = 'Compare encode/decode time and payload size of the stdlib and fast JSON renderers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='12,100,1000', help='Comma-separated page sizes')
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stderr.write(self.style.WARNING('orjson is not installed; the fast renderer uses the stdlib path'))
+
+        renderers = [('stdlib', JSONRenderer(), JSONParser()), ('fast', FastJSONRenderer(), FastJSONParser())]
+        self.stdout.write(f"{'items':>6} {'renderer':>8} {'encode ms':>10} {'decode ms':>10} {'bytes':>9}")
+        for size in [int(s) for s in options['sizes'].split(',') if s.strip()]:
+            data = product_page(size)
+            baseline = None
+            for name, renderer, parser in renderers:
+                body = renderer.render(data)
+                encode = _median_ms(lambda: renderer.render(data), options['repeat'])
+                decode = _median_ms(lambda: parser.parse(io.BytesIO(body)), options['repeat'])
+                speedup = f'  ({baseline / encode:.1f}x)' if baseline else ''
+                baseline = baseline or encode
+                self.stdout.write(f'{size:>6} {name:>8} {encode:>10.3f} {decode:>10.3f} {len(body):>9}{speedup}')
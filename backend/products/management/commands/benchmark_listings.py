@@ -0,0 +1,183 @@
+import random
+import re
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from products import search
+from products.cache import bump, bump_products
+from products.models import Address, Category, Order, Product, Review
+from products.pagination import KeysetPaginator
+from products.ratings import import_reviews
+
+BENCH_PREFIX = 'bench'
+BRANDS = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Vandelay', 'Soylent', 'Stark', '']
+PAGE = 12
+
+
+def _page(queryset):
+    return queryset[:PAGE]
+
+
+def listing_queries(user, product):
+    """
+    The listing queries served by the API, built the way the viewsets build
+    them. Returns `[(name, queryset), ...]`.
+    """
+    products = Product.objects.with_related()
+    category_id = product.category_id
+    # Boundary row of the first page, as a cursor would carry it
+    last_seen = list(products.order_by('price', 'id').values_list('price', 'id')[:PAGE])[-1]
+    cursor = KeysetPaginator(sort='price')
+    return [
+        ('products: newest', _page(products.order_by('-created_at'))),
+        ('products: by price', _page(products.order_by('price', 'id'))),
+        ('products: by rating desc', _page(products.order_by('-rating', '-id'))),
+        ('products: category newest', _page(products.filter(category_id=category_id).order_by('-created_at'))),
+        ('products: active category by price', _page(
+            products.filter(category_id=category_id, is_active=True).order_by('price', 'id')
+        )),
+        ('products: brand', _page(products.filter(brand='Acme').order_by('-created_at'))),
+        ('products: price cursor page 2', _page(
+            products.filter(cursor._seek(*last_seen)).order_by(*cursor._ordering())
+        )),
+        ('addresses: user', Address.objects.filter(user=user).order_by('-is_default', '-created_at')),
+        ('orders: user', _page(Order.objects.filter(user=user).order_by('-created_at'))),
+        ('reviews: product', _page(Review.objects.filter(product=product).order_by('-created_at'))),
+    ]
+
+
+def is_full_scan(plan, vendor):
+    """True if `plan` reads a whole table instead of using an index."""
+    if vendor == 'postgresql':
+        return 'Seq Scan' in plan
+    if vendor == 'sqlite':
+        # Lines look like "2 0 0 SCAN products_product [USING INDEX ...]"
+        return any(
+            re.search(r'\bSCAN\b', line) and ' USING ' not in line
+            for line in plan.splitlines()
+        )
+    return False
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a large synthetic catalogue and report EXPLAIN plans and '
+        'timings for the API listing queries'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--products', type=int, default=1_000_000, help='Catalogue size to seed up to')
+        parser.add_argument('--categories', type=int, default=50)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--repeat', type=int, default=5, help='Timed runs per query (median is reported)')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--no-seed', action='store_true', help='Only measure existing data')
+        parser.add_argument('--no-plans', action='store_true', help='Only print timings')
+        parser.add_argument('--max-ms', type=float, help='Fail if any median exceeds this many milliseconds')
+        parser.add_argument('--fail-on-seq-scan', action='store_true', help='Fail if any plan scans a whole table')
+        parser.add_argument('--flush', action='store_true', help='Delete seeded benchmark data and exit')
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            self.flush()
+            return
+        if not options['no_seed']:
+            self.seed(options)
+
+        user = User.objects.filter(username__startswith=f'{BENCH_PREFIX}-').order_by('pk').first()
+        product = Product.objects.filter(reviews__isnull=False).order_by('pk').first()
+        if user is None or product is None:
+            raise CommandError('No benchmark data; run without --no-seed first')
+
+        failures = []
+        for name, queryset in listing_queries(user, product):
+            timings = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                list(queryset.all())
+                timings.append((time.perf_counter() - start) * 1000)
+            median = statistics.median(timings)
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name}: {median:.2f} ms (median of {len(timings)})'))
+
+            plan = queryset.explain(analyze=True) if connection.vendor == 'postgresql' else queryset.explain()
+            if not options['no_plans']:
+                self.stdout.write(plan)
+                self.stdout.write('')
+            if options['max_ms'] is not None and median > options['max_ms']:
+                failures.append(f'{name}: {median:.2f} ms > {options["max_ms"]} ms')
+            if options['fail_on_seq_scan'] and is_full_scan(plan, connection.vendor):
+                failures.append(f'{name}: full table scan')
+
+        if failures:
+            raise CommandError('Listing query regressions:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('All listing queries within budget'))
+
+    def seed(self, options):
+        rng = random.Random(options['seed'])
+        categories = [
+            Category.objects.get_or_create(name=f'{BENCH_PREFIX} category {i}')[0]
+            for i in range(options['categories'])
+        ]
+        users = [
+            User.objects.get_or_create(username=f'{BENCH_PREFIX}-{i}')[0]
+            for i in range(options['users'])
+        ]
+
+        existing = Product.objects.filter(sku__startswith=f'{BENCH_PREFIX}-').count()
+        target = options['products']
+        batch_size = options['batch_size']
+        for start in range(existing, target, batch_size):
+            Product.objects.bulk_create([
+                Product(
+                    sku=f'{BENCH_PREFIX}-{n:08d}',
+                    name=f'Product {n}',
+                    description='Synthetic benchmark product',
+                    price=Decimal(rng.randint(100, 500_000)) / 100,
+                    category=rng.choice(categories),
+                    brand=rng.choice(BRANDS),
+                    stock=rng.randint(0, 500),
+                    rating=round(rng.uniform(0, 5), 1),
+                    is_active=rng.random() > 0.1,
+                )
+                for n in range(start, min(start + batch_size, target))
+            ])
+            self.stderr.write(f'Seeded {min(start + batch_size, target)}/{target} products')
+
+        if not Order.objects.filter(user__username__startswith=f'{BENCH_PREFIX}-').exists():
+            product_ids = list(
+                Product.objects.filter(sku__startswith=f'{BENCH_PREFIX}-')
+                .order_by('pk').values_list('pk', flat=True)[:10_000]
+            )
+            Address.objects.bulk_create([
+                Address(user=u, street=f'{i} Bench St', city='Bench', state='BS', country='Benchland',
+                        postal_code='00000', is_default=i == 0)
+                for u in users for i in range(3)
+            ])
+            Order.objects.bulk_create([
+                Order(user=u, total=Decimal(rng.randint(100, 100_000)) / 100, status='delivered')
+                for u in users for _ in range(20)
+            ])
+            import_reviews(
+                {'user_id': u.pk, 'product_id': pid, 'rating': rng.randint(1, 5)}
+                for u in users for pid in rng.sample(product_ids, min(20, len(product_ids)))
+            )
+
+        # bulk_create skips the signals that keep the caches current
+        bump('categories')
+        bump_products([])
+        search.reset_index()
+
+    def flush(self):
+        Product.objects.filter(sku__startswith=f'{BENCH_PREFIX}-').delete()
+        User.objects.filter(username__startswith=f'{BENCH_PREFIX}-').delete()
+        Category.objects.filter(name__startswith=f'{BENCH_PREFIX} category ').delete()
+        bump('categories')
+        bump_products([])
+        search.reset_index()
+        self.stdout.write(self.style.SUCCESS('Removed benchmark data'))
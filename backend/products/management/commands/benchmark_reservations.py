@@ -0,0 +1,136 @@
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from products.models import Cart, CartItem, Category, Order, Product, StockHold
+from products.reservations import reserve_cart
+from products.services import CheckoutError, place_order
+
+BENCH_PREFIX = 'flash'
+MODES = ('holds', 'direct')
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Flash-sale load test: N concurrent buyers of one SKU, checking out with stock holds '
+        '(reserve, then order) and/or directly (order only). Reports outcomes, latency and '
+        'whether stock stayed consistent. Run it against PostgreSQL; SQLite allows one writer at a time.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--buyers', type=int, default=1000)
+        parser.add_argument('--stock', type=int, default=100, help='Units of the SKU on sale')
+        parser.add_argument('--concurrency', type=int, default=100, help='Buyer threads (keep below the DB connection limit)')
+        parser.add_argument('--mode', choices=MODES + ('both',), default='both')
+        parser.add_argument('--flush', action='store_true', help='Delete benchmark data and exit')
+
+    def handle(self, *args, **options):
+        if options['flush']:
+            self.flush()
+            return
+        if connection.vendor == 'sqlite':
+            self.stderr.write(self.style.WARNING(
+                'SQLite serializes all writers on one file lock; expect "database is locked" errors '
+                'and numbers that say little about PostgreSQL.'
+            ))
+        if options['buyers'] < 1 or options['concurrency'] < 1:
+            raise CommandError('--buyers and --concurrency must be positive')
+
+        product, buyers = self.seed(options['buyers'])
+        modes = MODES if options['mode'] == 'both' else (options['mode'],)
+        self.stdout.write(
+            f"{'mode':<7} {'sold':>5} {'refused':>7} {'errors':>6} {'wall s':>7} {'buyers/s':>8} "
+            f"{'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'max ms':>7}  consistent"
+        )
+        for mode in modes:
+            self.reset(product, buyers, options['stock'])
+            self.run(mode, product, buyers, options)
+
+    def seed(self, count):
+        category, _ = Category.objects.get_or_create(name=f'{BENCH_PREFIX} sale')
+        product, _ = Product.objects.get_or_create(
+            sku=f'{BENCH_PREFIX}-sku',
+            defaults={'name': 'Flash sale item', 'description': 'x', 'price': 10, 'category': category},
+        )
+        existing = User.objects.filter(username__startswith=f'{BENCH_PREFIX}-').count()
+        User.objects.bulk_create([
+            # '!' is an unusable password; hashing 1,000 real ones would dominate setup
+            User(username=f'{BENCH_PREFIX}-{i:05d}', password='!')
+            for i in range(existing, count)
+        ])
+        buyers = list(User.objects.filter(username__startswith=f'{BENCH_PREFIX}-').order_by('username')[:count])
+        Cart.objects.bulk_create([Cart(user=user) for user in buyers], ignore_conflicts=True)
+        return product, buyers
+
+    def reset(self, product, buyers, stock):
+        Order.objects.filter(user__in=buyers).delete()
+        StockHold.objects.filter(product=product).delete()
+        CartItem.objects.filter(cart__user__in=buyers).delete()
+        carts = Cart.objects.filter(user__in=buyers)
+        CartItem.objects.bulk_create([CartItem(cart=cart, product=product, quantity=1) for cart in carts])
+        Product.objects.filter(pk=product.pk).update(stock=stock, reserved=0)
+
+    def run(self, mode, product, buyers, options):
+        outcomes = Counter()
+        latencies = []
+        lock = threading.Lock()
+
+        def buy(user):
+            start = time.perf_counter()
+            try:
+                if mode == 'holds':
+                    reserve_cart(user)
+                place_order(user)
+                outcome = 'sold'
+            except CheckoutError:
+                outcome = 'refused'
+            except Exception as e:  # lock timeouts, deadlocks, "database is locked"
+                outcome = f'error: {type(e).__name__}'
+            finally:
+                connections.close_all()
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                outcomes[outcome] += 1
+                latencies.append(elapsed)
+
+        wall = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            list(pool.map(buy, buyers))
+        wall = time.perf_counter() - wall
+
+        product.refresh_from_db()
+        sold = outcomes['sold']
+        orders = Order.objects.filter(user__in=buyers).count()
+        consistent = (
+            product.stock == options['stock'] - sold
+            and product.reserved == StockHold.objects.filter(product=product).count()
+            and orders == sold
+            and sold <= options['stock']
+        )
+        errors = sum(n for outcome, n in outcomes.items() if outcome.startswith('error'))
+        latencies.sort()
+        self.stdout.write(
+            f'{mode:<7} {sold:>5} {outcomes["refused"]:>7} {errors:>6} {wall:>7.2f} {len(buyers) / wall:>8.0f} '
+            f'{_percentile(latencies, 0.5):>7.1f} {_percentile(latencies, 0.95):>7.1f} '
+            f'{_percentile(latencies, 0.99):>7.1f} {latencies[-1]:>7.1f}  '
+            + (self.style.SUCCESS('yes') if consistent else self.style.ERROR('NO'))
+        )
+        for outcome, n in sorted(outcomes.items()):
+            if outcome.startswith('error'):
+                self.stdout.write(f'        {n} x {outcome}')
+
+    def flush(self):
+        Product.objects.filter(sku=f'{BENCH_PREFIX}-sku').delete()
+        User.objects.filter(username__startswith=f'{BENCH_PREFIX}-').delete()
+        Category.objects.filter(name=f'{BENCH_PREFIX} sale').delete()
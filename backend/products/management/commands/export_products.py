@@ -0,0 +1,41 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.exports import (
+    DEFAULT_CHUNK_SIZE, FORMATS, ExportError, export_rows, iter_export,
+    parse_bool, parse_updated_since,
+)
+
+
+class Command(BaseCommand):
+    help = 'Stream the product catalogue to a CSV or NDJSON file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=list(FORMATS), default='csv')
+        parser.add_argument('--output', '-o', help='File to write (default: stdout)')
+        parser.add_argument('--category', help='Category id or name')
+        parser.add_argument('--active', help='Only active (true) or inactive (false) products')
+        parser.add_argument('--updated-since', help='ISO date or datetime')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            rows = export_rows(
+                category=options['category'],
+                is_active=parse_bool(options['active']) if options['active'] else None,
+                updated_since=parse_updated_since(options['updated_since']) if options['updated_since'] else None,
+                chunk_size=options['chunk_size'],
+            )
+            chunks = iter_export(options['format'], rows)
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as fh:
+                for chunk in chunks:
+                    fh.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f"Exported catalogue to {options['output']}"))
+        else:
+            for chunk in chunks:
+                sys.stdout.write(chunk)
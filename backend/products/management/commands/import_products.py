@@ -0,0 +1,29 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from products.imports import DEFAULT_CHUNK_SIZE, ProductImportError, import_products, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Bulk upsert products from a CSV or NDJSON file, keyed on SKU'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or NDJSON file')
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='Defaults to the file extension')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format'] or os.path.splitext(path)[1].lstrip('.').lower()
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as fh:
+                report = import_products(read_rows(fh, fmt), chunk_size=options['chunk_size'])
+        except (OSError, ProductImportError) as e:
+            raise CommandError(str(e))
+
+        for error in report.errors:
+            self.stderr.write(f"line {error['line']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {report.processed} row(s): {report.upserted} upserted, {report.error_count} rejected'
+        ))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from products.category_stats import refresh_category_stats
+
+
+class Command(BaseCommand):
+    help = 'Recompute materialized category statistics where they have drifted from the products table'
+
+    def add_arguments(self, parser):
+        parser.add_argument('category_ids', nargs='*', type=int, help='Limit to these categories')
+
+    def handle(self, *args, **options):
+        category_ids = options['category_ids'] or None
+        fixed = refresh_category_stats(category_ids)
+        self.stdout.write(self.style.SUCCESS(f'Reconciled {fixed} categor{"y" if fixed == 1 else "ies"}'))
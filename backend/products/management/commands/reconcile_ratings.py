@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from products.ratings import reconcile_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recompute product rating counters from reviews where they have drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('product_ids', nargs='*', type=int, help='Limit to these products')
+
+    def handle(self, *args, **options):
+        product_ids = options['product_ids'] or None
+        fixed = reconcile_ratings(product_ids)
+        self.stdout.write(self.style.SUCCESS(f'Reconciled {fixed} product(s)'))
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:02
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, FloatField, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Round
+
+
+def backfill_rating_sum(apps, schema_editor):
+    Product = apps.get_model('products', 'Product')
+    Review = apps.get_model('products', 'Review')
+
+    def stat(name, expression, default=0, output_field=IntegerField()):
+        return Coalesce(
+            Subquery(
+                Review.objects.filter(product=OuterRef('pk'))
+                .order_by().values('product')
+                .annotate(**{name: expression}).values(name)
+            ),
+            default,
+            output_field=output_field,
+        )
+
+    # rating is rewritten too, so all three start out consistent
+    Product.objects.update(
+        rating_sum=stat('total', Sum('rating')),
+        num_reviews=stat('n', Count('id')),
+        rating=stat('mean', Round(Avg('rating'), 1), 0.0, FloatField()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_product_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rating_sum, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def keep_newest_default_address(apps, schema_editor):
+    # The unique partial constraint below fails if a user already has
+    # several defaults; keep the most recent one.
+    Address = apps.get_model('products', 'Address')
+    seen = set()
+    stale = []
+    for pk, user_id in (
+        Address.objects.filter(is_default=True)
+        .order_by('user_id', '-created_at', '-id')
+        .values_list('pk', 'user_id')
+    ):
+        if user_id in seen:
+            stale.append(pk)
+        seen.add(user_id)
+    Address.objects.filter(pk__in=stale).update(is_default=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0005_product_sku'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='address',
+            index=models.Index(fields=['user', '-is_default', '-created_at'], name='address_user_default_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['created_at', 'id'], name='product_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['price', 'id'], name='product_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['rating', 'id'], name='product_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(fields=['category', 'created_at', 'id'], name='product_cat_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', 'price', 'id'], name='product_active_cat_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='product',
+            index=models.Index(condition=models.Q(('brand', ''), _negated=True), fields=['brand'], name='product_brand_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['product', '-created_at'], name='review_product_created_idx'),
+        ),
+        migrations.RunPython(keep_newest_default_address, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='address',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_default', True)), fields=('user',), name='address_one_default_per_user'),
+        ),
+    ]
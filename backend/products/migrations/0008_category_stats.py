@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:11
+
+from django.db import migrations, models
+from django.db.models import Avg, Count, Max, Min, Q
+from django.db.models.functions import Round
+
+
+def fill_category_stats(apps, schema_editor):
+    # products/category_stats.py keeps these current from here on
+    Category = apps.get_model('products', 'Category')
+    Product = apps.get_model('products', 'Product')
+    active = Q(is_active=True)
+    rows = (
+        Product.objects.order_by().values('category')
+        .annotate(
+            products_count=Count('id'),
+            active_products_count=Count('id', filter=active),
+            min_price=Min('price', filter=active),
+            max_price=Max('price', filter=active),
+            avg_rating=Round(Avg('rating', filter=active & Q(num_reviews__gt=0)), 1),
+        )
+    )
+    for row in rows:
+        Category.objects.filter(pk=row.pop('category')).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_cart_line_upsert'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='active_products_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='avg_rating',
+            field=models.FloatField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='max_price',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='min_price',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=10, null=True),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='products_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_category_stats, migrations.RunPython.noop),
+    ]
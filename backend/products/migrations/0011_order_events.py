@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 21:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def processed_to_processing(apps, schema_editor):
+    # 'processed' was written by the old order task but is no longer a
+    # status; 'processing' is where those orders sit in ORDER_TRANSITIONS
+    Order = apps.get_model('products', 'Order')
+    Order.objects.filter(status='processed').update(status='processing')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0010_order_history_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('shipped', 'Shipped'), ('delivered', 'Delivered'), ('cancelled', 'Cancelled')], default='pending', max_length=30),
+        ),
+        migrations.RunPython(processed_to_processing, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='OrderEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(max_length=30)),
+                ('to_status', models.CharField(max_length=30)),
+                ('source', models.CharField(blank=True, max_length=20)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('order', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='products.order')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['order', 'created_at'], name='orderevent_order_created_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:05
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import Round
+
+
+def fill_rating_totals(apps, schema_editor):
+    # products/category_stats.py shifts these by deltas from here on
+    Category = apps.get_model('products', 'Category')
+    Product = apps.get_model('products', 'Product')
+    rows = (
+        Product.objects.filter(is_active=True, num_reviews__gt=0).order_by().values('category')
+        .annotate(rated_products_count=Count('id'), rating_total=Round(Sum('rating'), 1))
+    )
+    for row in rows:
+        Category.objects.filter(pk=row.pop('category')).update(**row)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0011_order_events'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='rated_products_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='rating_total',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.RunPython(fill_rating_totals, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,69 @@
 
 
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models import DecimalField, F, OuterRef, Prefetch, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+# --- Query plans ---
+# Each QuerySet below knows which relations its serializers touch, so list
+# and detail views fetch them in a fixed number of queries instead of one
+# (or more) per row.
+
+class ProductQuerySet(models.QuerySet):
+	def with_related(self):
+		# Category statistics are stored columns, so one JOIN covers the nesting
+		return self.select_related('category')
+
+
+class LineItemQuerySet(models.QuerySet):
+	"""Shared plan for cart and order lines, which both nest a full product."""
+
+	def with_product(self):
+		return self.select_related('product__category')
+
+
+class CartQuerySet(models.QuerySet):
+	def with_summary(self):
+		"""Annotate `items_total` and `items_count` from one aggregate over the lines."""
+		money = DecimalField(max_digits=12, decimal_places=2)
+		return self.annotate(
+			items_total=Coalesce(
+				Sum(F('items__quantity') * F('items__product__price'), output_field=money),
+				Value(0), output_field=money,
+			),
+			items_count=Coalesce(Sum('items__quantity'), 0),
+		)
+
+
+class OrderQuerySet(models.QuerySet):
+	def with_related(self):
+		return self.select_related('user', 'address').prefetch_related(
+			Prefetch('items', queryset=OrderItem.objects.with_product())
+		)
+
+	def with_summary(self):
+		"""
+		Annotate `items_count` and `thumbnail` (the first line's product
+		image) for the order history list. Both are correlated subqueries,
+		so a LIMITed page evaluates them for its own rows only and the
+		(user, created_at) index still drives the scan.
+		"""
+		lines = OrderItem.objects.filter(order=OuterRef('pk')).order_by()
+		return self.annotate(
+			items_count=Coalesce(
+				Subquery(lines.values('order').annotate(n=Sum('quantity')).values('n')), 0,
+			),
+			thumbnail=Subquery(lines.order_by('id').values('product__image')[:1]),
+		)
+
+
+class ReviewQuerySet(models.QuerySet):
+	def with_related(self):
+		return self.select_related('user', 'product')
+
 
 class Category(models.Model):
 	name = models.CharField(max_length=100, unique=True)
@@ -8,12 +71,32 @@ class Category(models.Model):
 	image = models.URLField(blank=True, help_text="Category image URL")
 	created_at = models.DateTimeField(auto_now_add=True)
 	updated_at = models.DateTimeField(auto_now=True)
+	# Materialized from the category's products by products/category_stats.py;
+	# price and rating figures cover active products only.
+	products_count = models.PositiveIntegerField(default=0, editable=False)
+	active_products_count = models.PositiveIntegerField(default=0, editable=False)
+	min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, editable=False)
+	max_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, editable=False)
+	# Mean rating of active products that have reviews, kept as a running
+	# sum and count so single product and review writes can shift it
+	avg_rating = models.FloatField(null=True, editable=False)
+	rated_products_count = models.PositiveIntegerField(default=0, editable=False)
+	rating_total = models.FloatField(default=0.0, editable=False)
 
 	def __str__(self):
 		return self.name
 
 
+# Product columns moved only by F() updates; a full save leaves them alone
+COUNTER_FIELDS = ('reserved', 'rating_sum', 'num_reviews', 'rating')
+
+# Product columns that feed Category statistics
+CATEGORY_STATS_SOURCES = ('category_id', 'is_active', 'price', 'num_reviews', 'rating')
+
+
 class Product(models.Model):
+	# Supplier/merchant stock-keeping unit; the natural key for bulk imports
+	sku = models.CharField(max_length=64, unique=True, null=True, blank=True)
 	name = models.CharField(max_length=200)
 	description = models.TextField()
 	price = models.DecimalField(max_digits=10, decimal_places=2)
@@ -21,11 +104,65 @@ class Product(models.Model):
 	image = models.URLField(blank=True, help_text="Product image URL")
 	brand = models.CharField(max_length=100, blank=True)
 	stock = models.PositiveIntegerField(default=0)
+	# Units set aside by live StockHolds; available = stock - reserved.
+	# Only moved by guarded UPDATEs in products/reservations.py.
+	reserved = models.PositiveIntegerField(default=0)
 	rating = models.FloatField(default=0.0)
+	# Running total of review ratings; rating == round(rating_sum / num_reviews, 1)
+	rating_sum = models.PositiveIntegerField(default=0)
 	num_reviews = models.PositiveIntegerField(default=0)
 	is_active = models.BooleanField(default=True)
 	created_at = models.DateTimeField(auto_now_add=True)
 	updated_at = models.DateTimeField(auto_now=True)
+	# Weighted name/brand/description vector, written by a PostgreSQL
+	# trigger (migration 0003); unused on other databases.
+	search_vector = SearchVectorField(null=True, editable=False)
+
+	objects = ProductQuerySet.as_manager()
+
+	class Meta:
+		# Each listing sort is (field, id) to match the id tiebreak used by
+		# ProductViewSet and KeysetPaginator. stock is deliberately not
+		# indexed: it changes on every order and is rarely sorted on.
+		indexes = [
+			GinIndex(fields=['search_vector'], name='product_search_gin'),
+			models.Index(fields=['created_at', 'id'], name='product_created_idx'),
+			models.Index(fields=['price', 'id'], name='product_price_idx'),
+			models.Index(fields=['rating', 'id'], name='product_rating_idx'),
+			models.Index(fields=['category', 'created_at', 'id'], name='product_cat_created_idx'),
+			models.Index(
+				fields=['category', 'price', 'id'], name='product_active_cat_price_idx',
+				condition=models.Q(is_active=True),
+			),
+			models.Index(
+				fields=['brand'], name='product_brand_idx',
+				condition=~models.Q(brand=''),
+			),
+		]
+
+	def save(self, *args, **kwargs):
+		# A full save must not write back stale copies of the counters that
+		# only move through F() updates (reservations and ratings)
+		if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+			kwargs['update_fields'] = [
+				f.attname for f in self._meta.concrete_fields
+				if not f.primary_key and f.attname not in COUNTER_FIELDS
+			]
+		super().save(*args, **kwargs)
+
+	@classmethod
+	def from_db(cls, db, field_names, values):
+		instance = super().from_db(db, field_names, values)
+		# Lets the post_save handler shift category statistics by the difference
+		instance._loaded_stats = {
+			field: instance.__dict__[field] for field in CATEGORY_STATS_SOURCES if field in instance.__dict__
+		}
+		return instance
+
+	@property
+	def available(self):
+		"""Units nobody holds, i.e. for sale to a buyer without a hold."""
+		return max(self.stock - self.reserved, 0)
 
 	def __str__(self):
 		return self.name
@@ -44,6 +181,17 @@ class Address(models.Model):
 	created_at = models.DateTimeField(auto_now_add=True)
 	updated_at = models.DateTimeField(auto_now=True)
 
+	class Meta:
+		indexes = [
+			models.Index(fields=['user', '-is_default', '-created_at'], name='address_user_default_idx'),
+		]
+		constraints = [
+			models.UniqueConstraint(
+				fields=['user'], condition=models.Q(is_default=True),
+				name='address_one_default_per_user',
+			),
+		]
+
 	def __str__(self):
 		return f"{self.street}, {self.city}"
 
@@ -52,29 +200,110 @@ class Cart(models.Model):
 	created_at = models.DateTimeField(auto_now_add=True)
 	updated_at = models.DateTimeField(auto_now=True)
 
+	objects = CartQuerySet.as_manager()
+
 class CartItem(models.Model):
 	cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
 	product = models.ForeignKey(Product, on_delete=models.CASCADE)
 	quantity = models.PositiveIntegerField(default=1)
 	added_at = models.DateTimeField(auto_now_add=True)
 
+	objects = LineItemQuerySet.as_manager()
+
+	class Meta:
+		constraints = [
+			# Adding a product twice updates its line (see services.add_to_cart)
+			models.UniqueConstraint(fields=['cart', 'product'], name='cartitem_one_line_per_product'),
+		]
+
+class StockHold(models.Model):
+	"""Units of a product set aside for one user's checkout until `expires_at`."""
+	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='stock_holds')
+	product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='holds')
+	quantity = models.PositiveIntegerField()
+	expires_at = models.DateTimeField()
+	created_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		constraints = [
+			# Re-reserving resizes the hold (see reservations.reserve_cart)
+			models.UniqueConstraint(fields=['user', 'product'], name='stockhold_one_per_user_product'),
+		]
+		indexes = [
+			models.Index(fields=['expires_at'], name='stockhold_expires_idx'),
+		]
+
+# Status changes an order may make; products/order_status.py enforces them.
+ORDER_TRANSITIONS = {
+	'pending': ('processing', 'shipped', 'cancelled'),
+	'processing': ('shipped', 'cancelled'),
+	'shipped': ('delivered', 'cancelled'),
+	'delivered': (),
+	'cancelled': (),
+}
+ORDER_STATUSES = tuple(ORDER_TRANSITIONS)
+
 class Order(models.Model):
 	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='orders')
 	address = models.ForeignKey(Address, on_delete=models.SET_NULL, null=True, blank=True)
 	total = models.DecimalField(max_digits=10, decimal_places=2)
-	status = models.CharField(max_length=30, default='pending')
+	status = models.CharField(
+		max_length=30, default='pending', choices=[(s, s.title()) for s in ORDER_STATUSES]
+	)
 	created_at = models.DateTimeField(auto_now_add=True)
 	updated_at = models.DateTimeField(auto_now=True)
 
+	objects = OrderQuerySet.as_manager()
+
+	class Meta:
+		indexes = [
+			models.Index(fields=['user', '-created_at', '-id'], name='order_user_created_idx'),
+		]
+
+class OrderEvent(models.Model):
+	"""Append-only log of order status changes."""
+	order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='events')
+	from_status = models.CharField(max_length=30)
+	to_status = models.CharField(max_length=30)
+	actor = models.ForeignKey(
+		settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+	)
+	# Where the change came from: 'api', 'admin' or 'task'
+	source = models.CharField(max_length=20, blank=True)
+	note = models.CharField(max_length=255, blank=True)
+	created_at = models.DateTimeField(auto_now_add=True)
+
+	class Meta:
+		indexes = [
+			models.Index(fields=['order', 'created_at'], name='orderevent_order_created_idx'),
+		]
+
 class OrderItem(models.Model):
 	order = models.ForeignKey(Order, on_delete=models.CASCADE, related_name='items')
 	product = models.ForeignKey(Product, on_delete=models.CASCADE)
 	quantity = models.PositiveIntegerField(default=1)
 	price = models.DecimalField(max_digits=10, decimal_places=2)
 
+	objects = LineItemQuerySet.as_manager()
+
 class Review(models.Model):
 	user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='reviews')
 	product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='reviews')
 	rating = models.PositiveIntegerField()
 	comment = models.TextField(blank=True)
 	created_at = models.DateTimeField(auto_now_add=True)
+
+	objects = ReviewQuerySet.as_manager()
+
+	class Meta:
+		indexes = [
+			models.Index(fields=['product', '-created_at'], name='review_product_created_idx'),
+		]
+
+	@classmethod
+	def from_db(cls, db, field_names, values):
+		instance = super().from_db(db, field_names, values)
+		# Lets the post_save handler apply only the rating difference
+		instance._loaded_product_id = instance.__dict__.get('product_id')
+		instance._loaded_rating = instance.__dict__.get('rating')
+		return instance
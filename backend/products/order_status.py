@@ -0,0 +1,98 @@
+"""
+Order status transitions.
+
+`ORDER_TRANSITIONS` (products/models.py) lists which status may follow
+which. `transition_orders` is the only writer of `Order.status`: the
+order actions, the admin, the bulk endpoint and `process_orders` all go
+through it. Per batch of ids it takes:
+- one locking SELECT of the current statuses
+- one conditional UPDATE per source status
+- one `bulk_create` of `OrderEvent` rows
+- when cancelling, one UPDATE that puts the lines back into stock
+
+A warehouse job marking thousands of orders shipped is therefore a
+handful of statements, not a request per order.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.utils import timezone
+
+from .cache import bump_products
+from .models import ORDER_STATUSES, ORDER_TRANSITIONS, Order, OrderEvent, OrderItem, Product
+from .reservations import lock_products
+
+TRANSITION_BATCH_SIZE = 1000
+
+
+class InvalidTransition(ValueError):
+    """Raised for a target status that is not an order status."""
+
+
+def sources_for(status):
+    """Statuses an order may be in to move to `status`."""
+    if status not in ORDER_STATUSES:
+        raise InvalidTransition(f"Status must be one of: {', '.join(ORDER_STATUSES)}")
+    return [source for source, targets in ORDER_TRANSITIONS.items() if status in targets]
+
+
+def _restock(order_ids):
+    """Return the cancelled orders' units to stock; returns the product ids touched."""
+    quantities = dict(
+        OrderItem.objects.filter(order_id__in=order_ids)
+        .values('product').annotate(units=Sum('quantity')).values_list('product', 'units')
+    )
+    if not quantities:
+        return []
+    # Same lock order as checkout, so a bulk cancel cannot deadlock with it
+    lock_products(quantities)
+    units = Case(
+        *[When(pk=pk, then=Value(q)) for pk, q in quantities.items()],
+        output_field=IntegerField(),
+    )
+    Product.objects.filter(pk__in=list(quantities)).update(stock=F('stock') + units, updated_at=timezone.now())
+    return list(quantities)
+
+
+def transition_orders(order_ids, status, *, actor=None, source='api', note='',
+                      skip_locked=False, batch_size=TRANSITION_BATCH_SIZE):
+    """
+    Move the orders in `order_ids` to `status` where the transition table
+    allows it, in one transaction.
+
+    Returns `{order_id: previous_status}` for the orders that moved;
+    unknown ids and orders in a status that cannot move to `status` are
+    left alone. `skip_locked` also leaves out orders another transaction
+    has locked (for workers that may race each other).
+    """
+    sources = sources_for(status)
+    order_ids = list(dict.fromkeys(order_ids))
+    moved = {}
+    restocked = set()
+    with transaction.atomic():
+        for start in range(0, len(order_ids), batch_size):
+            current = dict(
+                Order.objects.select_for_update(skip_locked=skip_locked)
+                .filter(pk__in=order_ids[start:start + batch_size], status__in=sources)
+                .order_by('pk')
+                .values_list('pk', 'status')
+            )
+            if not current:
+                continue
+            by_source = defaultdict(list)
+            for pk, previous in current.items():
+                by_source[previous].append(pk)
+            now = timezone.now()
+            for previous, pks in by_source.items():
+                Order.objects.filter(pk__in=pks, status=previous).update(status=status, updated_at=now)
+            OrderEvent.objects.bulk_create([
+                OrderEvent(order_id=pk, from_status=previous, to_status=status, actor=actor, source=source, note=note)
+                for pk, previous in current.items()
+            ])
+            if status == 'cancelled':
+                restocked.update(_restock(list(current)))
+            moved.update(current)
+        if restocked:
+            transaction.on_commit(lambda: bump_products(restocked))
+    return moved
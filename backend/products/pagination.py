@@ -0,0 +1,187 @@
+"""
+Pagination helpers for the product catalogue.
+
+`KeysetPaginator` implements cursor (seek) pagination: instead of
+`OFFSET n` it filters on the last row seen, so page N costs the same as
+page 1. Cursors are opaque base64 tokens that carry the sort key, the
+boundary row and the direction of travel.
+
+`count_rows` lets callers choose between an exact COUNT, a planner
+estimate (PostgreSQL only) or no total at all.
+"""
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+# Supported sort keys mapped to the model field they order on. Every
+# ordering gets `id` appended as a tiebreaker in the same direction so
+# the sort is total and a (field, id) index can serve it.
+CURSOR_SORT_FIELDS = {
+    '-created_at': 'created_at',
+    'created_at': 'created_at',
+    'price': 'price',
+    '-price': 'price',
+    'rating': 'rating',
+    '-rating': 'rating',
+}
+DEFAULT_CURSOR_SORT = '-created_at'
+
+TOTAL_MODES = ('exact', 'estimate', 'none')
+
+
+class InvalidCursor(ValueError):
+    """Raised when a cursor cannot be decoded or does not match the sort."""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _decode_value(field, value):
+    if field == 'created_at':
+        parsed = parse_datetime(value) if isinstance(value, str) else None
+        if parsed is None:
+            raise InvalidCursor('Invalid cursor')
+        return parsed
+    if field == 'price':
+        try:
+            return Decimal(value)
+        except (ArithmeticError, TypeError, ValueError):
+            raise InvalidCursor('Invalid cursor')
+    if not isinstance(value, (int, float)):
+        raise InvalidCursor('Invalid cursor')
+    return value
+
+
+def encode_cursor(sort, value, pk, direction):
+    payload = {'s': sort, 'v': _encode_value(value), 'id': pk, 'd': direction}
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, sort):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        pk = int(payload['id'])
+        direction = payload['d']
+        cursor_sort = payload['s']
+        value = payload['v']
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor('Invalid cursor')
+    if cursor_sort != sort:
+        raise InvalidCursor('Cursor does not match the requested sort')
+    if direction not in ('next', 'prev'):
+        raise InvalidCursor('Invalid cursor')
+    return _decode_value(CURSOR_SORT_FIELDS[sort], value), pk, direction
+
+
+class KeysetPaginator:
+    """
+    Seek-method paginator over a queryset ordered by `(field, id)`.
+
+    `paginate()` (or `apaginate()` in async code) returns
+    `(rows, next_cursor, prev_cursor)`; either cursor is `None` when there
+    is nothing further in that direction.
+    """
+
+    def __init__(self, sort=DEFAULT_CURSOR_SORT, limit=12):
+        if sort not in CURSOR_SORT_FIELDS:
+            raise InvalidCursor(f"Unsupported sort for cursor pagination: {sort}")
+        self.sort = sort
+        self.field = CURSOR_SORT_FIELDS[sort]
+        self.descending = sort.startswith('-')
+        self.limit = limit
+
+    def _ordering(self, reverse=False):
+        descending = self.descending != reverse
+        prefix = '-' if descending else ''
+        return [f'{prefix}{self.field}', f'{prefix}id']
+
+    def _seek(self, value, pk, reverse=False):
+        # Rows strictly after (value, pk) in the direction of travel.
+        lookup = 'lt' if self.descending != reverse else 'gt'
+        return (
+            Q(**{f'{self.field}__{lookup}': value})
+            | Q(**{self.field: value, f'id__{lookup}': pk})
+        )
+
+    def _cursor(self, row, direction):
+        # Rows are model instances, or dicts when paginating `.values()`
+        if isinstance(row, dict):
+            return encode_cursor(self.sort, row[self.field], row['id'], direction)
+        return encode_cursor(self.sort, getattr(row, self.field), row.pk, direction)
+
+    def _page_queryset(self, queryset, cursor):
+        reverse = False
+        if cursor:
+            value, pk, direction = decode_cursor(cursor, self.sort)
+            reverse = direction == 'prev'
+            queryset = queryset.filter(self._seek(value, pk, reverse=reverse))
+        # Fetch one extra row to learn whether another page exists.
+        return queryset.order_by(*self._ordering(reverse))[:self.limit + 1], reverse
+
+    def _page(self, rows, cursor, reverse):
+        has_more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        if reverse:
+            rows.reverse()
+
+        if not rows:
+            return rows, None, None
+
+        if reverse:
+            next_cursor = self._cursor(rows[-1], 'next')
+            prev_cursor = self._cursor(rows[0], 'prev') if has_more else None
+        else:
+            next_cursor = self._cursor(rows[-1], 'next') if has_more else None
+            prev_cursor = self._cursor(rows[0], 'prev') if cursor else None
+        return rows, next_cursor, prev_cursor
+
+    def paginate(self, queryset, cursor=None):
+        page_queryset, reverse = self._page_queryset(queryset, cursor)
+        return self._page(list(page_queryset), cursor, reverse)
+
+    async def apaginate(self, queryset, cursor=None):
+        """`paginate()` for async views, reading rows with `aiterator()`."""
+        page_queryset, reverse = self._page_queryset(queryset, cursor)
+        # chunk_size is required for aiterator() to honour prefetch_related()
+        rows = [row async for row in page_queryset.aiterator(chunk_size=self.limit + 1)]
+        return self._page(rows, cursor, reverse)
+
+
+def estimate_count(queryset):
+    """
+    Return the planner's row estimate for `queryset` on PostgreSQL.
+
+    Other backends have no cheap estimate, so an exact COUNT is used.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def count_rows(queryset, mode):
+    """Return the total for `queryset` according to `mode` (see TOTAL_MODES)."""
+    if mode == 'exact':
+        return queryset.count()
+    if mode == 'estimate':
+        return estimate_count(queryset)
+    return None
@@ -0,0 +1,107 @@
+"""
+Product rating maintenance.
+
+Products keep a running `rating_sum` and `num_reviews`; `rating` is the
+rounded mean. Single review writes adjust those counters with one `F()`
+UPDATE from the Review signals (no read, no full-row save, no lost
+updates under concurrency).
+Bulk paths and drift repair recompute from the reviews table in one
+statement for any number of products.
+"""
+from django.db.models import (
+    Avg, Case, Count, F, FloatField, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+)
+from django.db.models.functions import Cast, Coalesce, Round
+from django.utils import timezone
+
+from .cache import bump_products
+from .category_stats import refresh_for_products
+from .models import Product, Review
+
+
+def apply_rating_delta(product_id, sum_delta, count_delta):
+    """Shift a product's rating counters by the given deltas."""
+    new_sum = F('rating_sum') + sum_delta
+    new_count = F('num_reviews') + count_delta
+    # Every right-hand side sees the row's old values, so the mean is
+    # computed from the post-update sum and count.
+    rating = Case(
+        When(num_reviews__lte=-count_delta, then=Value(0.0)),
+        default=Round(Cast(new_sum, FloatField()) / Cast(new_count, FloatField()), 1),
+        output_field=FloatField(),
+    )
+    return Product.objects.filter(pk=product_id).update(
+        rating_sum=new_sum,
+        num_reviews=new_count,
+        rating=rating,
+        updated_at=timezone.now(),
+    )
+
+
+def _review_stats(**aggregate):
+    (name, expression), = aggregate.items()
+    return Subquery(
+        Review.objects.filter(product=OuterRef('pk'))
+        .order_by()
+        .values('product')
+        .annotate(**{name: expression})
+        .values(name)
+    )
+
+
+def reconcile_ratings(product_ids=None):
+    """
+    Recompute rating counters from reviews where they have drifted.
+
+    Returns the number of products corrected. Restrict to `product_ids`
+    when given (e.g. after a bulk import), otherwise check the whole
+    catalogue. Either way it is one UPDATE statement.
+    """
+    actual_sum = Coalesce(_review_stats(total=Sum('rating')), 0, output_field=IntegerField())
+    actual_count = Coalesce(_review_stats(n=Count('id')), 0, output_field=IntegerField())
+    actual_rating = Coalesce(
+        Round(_review_stats(mean=Avg('rating')), 1), 0.0, output_field=FloatField()
+    )
+
+    candidates = Product.objects.all()
+    if product_ids is not None:
+        candidates = candidates.filter(pk__in=list(product_ids))
+    drifted = candidates.annotate(
+        actual_sum=actual_sum, actual_count=actual_count, actual_rating=actual_rating
+    ).filter(
+        ~Q(rating_sum=F('actual_sum')) | ~Q(num_reviews=F('actual_count')) | ~Q(rating=F('actual_rating'))
+    )
+
+    drifted_ids = list(drifted.values_list('pk', flat=True))
+    if not drifted_ids:
+        return 0
+    updated = Product.objects.filter(pk__in=drifted_ids).update(
+        rating_sum=actual_sum,
+        num_reviews=actual_count,
+        rating=actual_rating,
+        updated_at=timezone.now(),
+    )
+    bump_products(drifted_ids)
+    refresh_for_products(drifted_ids)
+    return updated
+
+
+def import_reviews(rows, batch_size=1000):
+    """
+    Bulk-insert reviews and refresh the affected products' ratings.
+
+    `rows` is an iterable of dicts with user_id, product_id, rating and an
+    optional comment. Returns the number of reviews created.
+    """
+    reviews = [
+        Review(
+            user_id=row['user_id'],
+            product_id=row['product_id'],
+            rating=int(row['rating']),
+            comment=row.get('comment', ''),
+        )
+        for row in rows
+    ]
+    Review.objects.bulk_create(reviews, batch_size=batch_size)
+    reconcile_ratings({review.product_id for review in reviews})
+    return len(reviews)
@@ -0,0 +1,188 @@
+"""
+Stock reservations: time-limited holds taken when checkout starts.
+
+`Product.reserved` counts the units held by every live `StockHold`. Reading
+availability (``stock - reserved``) is therefore one column read, and
+taking a hold is one guarded UPDATE on the product row:
+
+    UPDATE product SET reserved = reserved + n
+    WHERE id = ... AND stock >= reserved + n
+
+In a flash sale, buyers of the same SKU queue only on that one statement,
+not on a whole checkout transaction. A buyer who cannot be served is
+refused before any order is created.
+
+- `reserve_cart` holds the user's cart for ``STOCK_HOLD_SECONDS``. Running
+  it again resizes the holds to the cart and restarts the timer.
+- `release_holds` gives a user's holds back.
+- `services.place_order` turns the buyer's holds into the sale.
+- `sweep_expired_holds` returns expired holds in batches. It runs from the
+  Celery beat task `products.tasks.sweep_expired_stock_holds`.
+- `reconcile_reserved` recounts `reserved` from the holds to repair drift.
+
+A hold still counts after `expires_at` until the sweep releases it, so the
+sweep interval adds to the hold time.
+
+Locks are always taken holds first, then products in primary-key order.
+Reserving, checking out and sweeping therefore cannot deadlock each other.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import CartItem, Product, StockHold
+from .services import EmptyCart, InsufficientStock
+
+DEFAULT_HOLD_SECONDS = 600
+SWEEP_BATCH_SIZE = 1000
+
+
+class _Short(Exception):
+    """Raised inside the transaction so it rolls back before reporting."""
+
+
+def hold_seconds():
+    return getattr(settings, 'STOCK_HOLD_SECONDS', DEFAULT_HOLD_SECONDS)
+
+
+def lock_products(product_ids):
+    """Lock product rows in primary-key order."""
+    list(Product.objects.select_for_update().filter(pk__in=list(product_ids)).order_by('pk').values_list('pk'))
+
+
+def shift_reserved(deltas):
+    """
+    Add `{product_id: delta}` to `reserved` in one UPDATE.
+
+    Increases apply only where ``stock - reserved`` covers them; returns
+    True only if every row was updated.
+    """
+    if not deltas:
+        return True
+    delta = Case(
+        *[When(pk=pk, then=Value(d)) for pk, d in deltas.items()],
+        output_field=IntegerField(),
+    )
+    growing = [pk for pk, d in deltas.items() if d > 0]
+    shrinking = [pk for pk, d in deltas.items() if d < 0]
+    updated = Product.objects.filter(
+        Q(pk__in=shrinking) | Q(pk__in=growing, stock__gte=F('reserved') + delta)
+    ).update(reserved=F('reserved') + delta)
+    return updated == len(deltas)
+
+
+def reserve_cart(user):
+    """
+    Hold every line of `user`'s cart for `hold_seconds()`.
+
+    Returns `({product_id: quantity}, expires_at)`. Raises `EmptyCart`, or
+    `InsufficientStock` naming the products that could not be held (in
+    which case nothing is held or changed).
+    """
+    expires_at = timezone.now() + timedelta(seconds=hold_seconds())
+    try:
+        with transaction.atomic():
+            wanted = dict(CartItem.objects.filter(cart__user=user).values_list('product_id', 'quantity'))
+            if not wanted:
+                raise EmptyCart()
+            held = dict(
+                StockHold.objects.select_for_update().filter(user=user).values_list('product_id', 'quantity')
+            )
+            deltas = {pk: wanted.get(pk, 0) - held.get(pk, 0) for pk in wanted.keys() | held.keys()}
+            deltas = {pk: d for pk, d in deltas.items() if d}
+            if len(deltas) > 1:
+                # A single-SKU rush needs no extra round trip; the UPDATE locks its one row
+                lock_products(deltas)
+            if not shift_reserved(deltas):
+                raise _Short()
+            StockHold.objects.filter(user=user).exclude(product_id__in=list(wanted)).delete()
+            StockHold.objects.bulk_create(
+                [StockHold(user=user, product_id=pk, quantity=qty, expires_at=expires_at) for pk, qty in wanted.items()],
+                update_conflicts=True,
+                unique_fields=['user', 'product'],
+                update_fields=['quantity', 'expires_at'],
+            )
+    except _Short:
+        # Rolled back; report what is short against the current counters
+        short = list(
+            Product.objects.filter(pk__in=[pk for pk, d in deltas.items() if d > 0])
+            .annotate(free=F('stock') - F('reserved'))
+            .filter(free__lt=Case(*[When(pk=pk, then=Value(d)) for pk, d in deltas.items()], output_field=IntegerField()))
+            .values('id', 'name', 'stock', 'reserved')
+        )
+        raise InsufficientStock(short or list(Product.objects.filter(pk__in=list(deltas)).values('id', 'name')))
+    return wanted, expires_at
+
+
+def release_holds(user):
+    """Give back all of `user`'s holds; returns the number released."""
+    with transaction.atomic():
+        held = list(StockHold.objects.select_for_update().filter(user=user).values_list('pk', 'product_id', 'quantity'))
+        _release(held)
+    return len(held)
+
+
+def _release(holds):
+    """Delete `[(hold_id, product_id, quantity)]` and take their units off `reserved`."""
+    if not holds:
+        return
+    deltas = defaultdict(int)
+    for _, product_id, quantity in holds:
+        deltas[product_id] -= quantity
+    if len(deltas) > 1:
+        lock_products(deltas)
+    shift_reserved(deltas)
+    StockHold.objects.filter(pk__in=[pk for pk, _, _ in holds]).delete()
+
+
+def sweep_expired_holds(now=None, batch_size=SWEEP_BATCH_SIZE):
+    """
+    Release holds that expired by `now`, `batch_size` per transaction.
+
+    Holds locked by a checkout in progress are skipped (PostgreSQL
+    ``SKIP LOCKED``) and picked up on the next sweep. Returns the number
+    released.
+    """
+    now = now or timezone.now()
+    released = 0
+    while True:
+        with transaction.atomic():
+            batch = list(
+                StockHold.objects.select_for_update(skip_locked=True)
+                .filter(expires_at__lte=now)
+                .order_by('pk')
+                .values_list('pk', 'product_id', 'quantity')[:batch_size]
+            )
+            _release(batch)
+        released += len(batch)
+        if len(batch) < batch_size:
+            return released
+
+
+def reconcile_reserved(product_ids=None):
+    """
+    Recount `reserved` from the holds table where it has drifted.
+
+    Returns the number of products corrected.
+    """
+    actual = Coalesce(
+        Subquery(
+            StockHold.objects.filter(product=OuterRef('pk')).order_by().values('product')
+            .annotate(total=Sum('quantity')).values('total')
+        ),
+        0, output_field=IntegerField(),
+    )
+    candidates = Product.objects.all()
+    if product_ids is not None:
+        candidates = candidates.filter(pk__in=list(product_ids))
+    drifted_ids = list(
+        candidates.annotate(actual=actual).exclude(reserved=F('actual')).values_list('pk', flat=True)
+    )
+    if not drifted_ids:
+        return 0
+    return Product.objects.filter(pk__in=drifted_ids).update(reserved=actual)
@@ -0,0 +1,174 @@
+"""
+Product search backends.
+
+On PostgreSQL, products carry a `search_vector` column maintained by a
+database trigger (see migration 0003) and indexed with GIN; queries use
+`websearch_to_tsquery` and rank with `ts_rank`. Field weights are
+name (A) > brand (B) > description (C).
+
+Other databases (SQLite in tests and local development) use an in-process
+inverted index with the same weighting, kept current by the Product
+post_save/post_delete signals.
+
+`search_products(queryset, q)` returns the queryset narrowed to matches
+and annotated with `relevance`, whichever backend is active.
+"""
+import re
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Case, F, FloatField, Value, When
+
+
+# ts_rank's default weights for A/B/C; the in-memory index mirrors them so
+# relevance ordering is comparable across backends.
+FIELD_WEIGHTS = {
+    'name': 1.0,
+    'brand': 0.4,
+    'description': 0.2,
+}
+
+SEARCH_CONFIG = 'english'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall((text or '').lower())
+
+
+class PostgresSearchBackend:
+    name = 'postgres'
+
+    def search(self, queryset, q):
+        from django.contrib.postgres.search import SearchQuery, SearchRank
+
+        query = SearchQuery(q, search_type='websearch', config=SEARCH_CONFIG)
+        return queryset.filter(search_vector=query).annotate(
+            relevance=SearchRank(F('search_vector'), query)
+        )
+
+
+class InMemorySearchBackend:
+    """
+    Inverted index of token -> {product_id: weighted term frequency}.
+
+    The index is built lazily on first use and then maintained per product
+    through `index_product` / `remove_product`. A query matches products
+    containing every query token; relevance is the sum of their weights.
+    """
+    name = 'memory'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = defaultdict(dict)
+        self._documents = {}
+        self._built = False
+
+    def _document_tokens(self, name, brand, description):
+        scores = defaultdict(float)
+        for field, text in (('name', name), ('brand', brand), ('description', description)):
+            for token in tokenize(text):
+                scores[token] += FIELD_WEIGHTS[field]
+        return scores
+
+    def _add(self, product_id, name, brand, description):
+        self._discard(product_id)
+        scores = self._document_tokens(name, brand, description)
+        for token, score in scores.items():
+            self._postings[token][product_id] = score
+        self._documents[product_id] = tuple(scores)
+
+    def _discard(self, product_id):
+        for token in self._documents.pop(product_id, ()):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(product_id, None)
+                if not postings:
+                    del self._postings[token]
+
+    def _ensure_built(self):
+        if self._built:
+            return
+        from .models import Product
+
+        rows = Product.objects.values_list('id', 'name', 'brand', 'description')
+        for row in rows.iterator(chunk_size=2000):
+            self._add(*row)
+        self._built = True
+
+    def index_product(self, product):
+        with self._lock:
+            if self._built:
+                self._add(product.pk, product.name, product.brand, product.description)
+
+    def remove_product(self, product_id):
+        with self._lock:
+            self._discard(product_id)
+
+    def reset(self):
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._built = False
+
+    def scores(self, q):
+        tokens = set(tokenize(q))
+        if not tokens:
+            return {}
+        with self._lock:
+            self._ensure_built()
+            # Intersect starting from the rarest token
+            postings = sorted((self._postings.get(t, {}) for t in tokens), key=len)
+            matches = {pid: score for pid, score in postings[0].items()}
+            for posting in postings[1:]:
+                matches = {pid: score + posting[pid] for pid, score in matches.items() if pid in posting}
+                if not matches:
+                    break
+        return matches
+
+    def search(self, queryset, q):
+        matches = self.scores(q)
+        if not matches:
+            return queryset.none().annotate(relevance=Value(0.0, output_field=FloatField()))
+        relevance = Case(
+            *[When(pk=pid, then=Value(score)) for pid, score in matches.items()],
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+        return queryset.filter(pk__in=list(matches)).annotate(relevance=relevance)
+
+
+_memory_backend = InMemorySearchBackend()
+_postgres_backend = PostgresSearchBackend()
+
+
+def get_search_backend(using='default'):
+    """
+    Return the configured backend. `PRODUCT_SEARCH_BACKEND` may force
+    'postgres' or 'memory'; otherwise it follows the database vendor.
+    """
+    choice = getattr(settings, 'PRODUCT_SEARCH_BACKEND', None)
+    if choice is None:
+        choice = 'postgres' if connections[using].vendor == 'postgresql' else 'memory'
+    return _postgres_backend if choice == 'postgres' else _memory_backend
+
+
+def search_products(queryset, q):
+    return get_search_backend(queryset.db).search(queryset, q)
+
+
+def index_product(product):
+    """Keep the in-memory index current; PostgreSQL maintains itself."""
+    _memory_backend.index_product(product)
+
+
+def remove_product(product_id):
+    _memory_backend.remove_product(product_id)
+
+
+def reset_index():
+    """Drop the in-memory index after bulk writes that bypass signals."""
+    _memory_backend.reset()
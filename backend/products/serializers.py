@@ -1,42 +1,129 @@
 from rest_framework import serializers
+from ecommerce.metrics import TimedListSerializer, TimedSerializerMixin, serializer_timer
 from .models import (
     Product, Category, Address, Cart, CartItem, 
-    Order, OrderItem, Review
+    Order, OrderItem, Review, ORDER_STATUSES
 )
+from .services import available_to
 from django.contrib.auth.models import User
 
 
-class CategorySerializer(serializers.ModelSerializer):
-    products_count = serializers.SerializerMethodField()
-
+class CategorySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    # Statistics are stored columns maintained by products/category_stats.py
     class Meta:
         model = Category
-        fields = ['id', 'name', 'description', 'image', 'products_count', 'created_at', 'updated_at']
-        read_only_fields = ['created_at', 'updated_at']
+        list_serializer_class = TimedListSerializer
+        fields = [
+            'id', 'name', 'description', 'image', 'products_count', 'active_products_count',
+            'min_price', 'max_price', 'avg_rating', 'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'products_count', 'active_products_count', 'min_price', 'max_price', 'avg_rating',
+            'created_at', 'updated_at'
+        ]
+
 
-    def get_products_count(self, obj):
-        return obj.products.count()
+class NestedCategorySerializer(CategorySerializer):
+    # Without the price/rating figures, a price edit does not change the
+    # payload of every other product in the category
+    class Meta(CategorySerializer.Meta):
+        fields = ['id', 'name', 'description', 'image', 'products_count', 'created_at', 'updated_at']
 
 
-class ProductSerializer(serializers.ModelSerializer):
-    category = CategorySerializer(read_only=True)
+class ProductSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    category = NestedCategorySerializer(read_only=True)
     category_id = serializers.PrimaryKeyRelatedField(
         queryset=Category.objects.all(), source='category', write_only=True
     )
+    # stock minus units other buyers hold at checkout
+    available = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Product
+        list_serializer_class = TimedListSerializer
         fields = [
-            'id', 'name', 'description', 'price', 'category', 'category_id',
-            'image', 'brand', 'stock', 'rating', 'num_reviews', 'is_active',
+            'id', 'sku', 'name', 'description', 'price', 'category', 'category_id',
+            'image', 'brand', 'stock', 'available', 'rating', 'num_reviews', 'is_active',
             'created_at', 'updated_at'
         ]
         read_only_fields = ['rating', 'num_reviews', 'created_at', 'updated_at']
 
-
-class AddressSerializer(serializers.ModelSerializer):
+    def validate_sku(self, value):
+        # Store missing SKUs as NULL so they don't collide on the unique index
+        return value or None
+
+
+# Flat "card" projection for product lists (?view=card / ?fields=).
+# Maps each public field to the column read with `.values()`.
+CARD_COLUMNS = {
+    'id': 'id',
+    'sku': 'sku',
+    'name': 'name',
+    'price': 'price',
+    'image': 'image',
+    'brand': 'brand',
+    'stock': 'stock',
+    'rating': 'rating',
+    'num_reviews': 'num_reviews',
+    'is_active': 'is_active',
+    'category': 'category__name',
+    'category_id': 'category_id',
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+DEFAULT_CARD_FIELDS = ('id', 'name', 'price', 'image', 'rating', 'category')
+
+
+class ProductCardEncoder:
+    """
+    Encode `.values()` rows as flat dicts, without a ModelSerializer.
+
+    Output matches ProductSerializer's formatting for the same fields
+    (prices as strings, ISO datetimes), except that `category` is the
+    category name rather than a nested object.
+    """
+
+    def __init__(self, fields=DEFAULT_CARD_FIELDS):
+        unknown = [field for field in fields if field not in CARD_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        # id is always included; it is the only stable handle on a row
+        self.fields = ('id',) + tuple(f for f in dict.fromkeys(fields) if f != 'id')
+        self._datetime = serializers.DateTimeField()
+
+    @classmethod
+    def from_param(cls, value):
+        """Build an encoder from a comma-separated `fields` query param (empty means defaults)."""
+        fields = [field.strip() for field in (value or '').split(',') if field.strip()]
+        return cls(fields or DEFAULT_CARD_FIELDS)
+
+    def columns(self, *extra):
+        """Columns to pass to `.values()`; `extra` adds ones needed only by the caller."""
+        return list(dict.fromkeys([CARD_COLUMNS[field] for field in self.fields] + list(extra)))
+
+    def _converter(self, field):
+        if field == 'price':
+            return lambda value: None if value is None else str(value)
+        if field in ('created_at', 'updated_at'):
+            return self._datetime.to_representation
+        return None
+
+    def encode(self, rows):
+        plan = [(field, CARD_COLUMNS[field], self._converter(field)) for field in self.fields]
+        with serializer_timer():
+            return [
+                {
+                    field: convert(row[column]) if convert else row[column]
+                    for field, column, convert in plan
+                }
+                for row in rows
+            ]
+
+
+class AddressSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Address
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'street', 'city', 'state', 'country', 'postal_code', 'is_default', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
@@ -53,7 +140,7 @@ class AddressSerializer(serializers.ModelSerializer):
         return attrs
 
 
-class CartItemSerializer(serializers.ModelSerializer):
+class CartItemSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     product = ProductSerializer(read_only=True)
     product_id = serializers.PrimaryKeyRelatedField(
         queryset=Product.objects.all(), source='product', write_only=True
@@ -62,6 +149,7 @@ class CartItemSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = CartItem
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'product', 'product_id', 'quantity', 'subtotal', 'added_at']
         read_only_fields = ['added_at']
 
@@ -75,29 +163,63 @@ class CartItemSerializer(serializers.ModelSerializer):
 
     def validate(self, attrs):
         product = attrs.get('product')
-        quantity = attrs.get('quantity', 1)
+        if self.instance is not None:
+            if product and product.pk != self.instance.product_id and CartItem.objects.filter(
+                cart_id=self.instance.cart_id, product=product
+            ).exists():
+                raise serializers.ValidationError("This product is already in the cart")
+            product = product or self.instance.product
+        quantity = attrs.get('quantity', 1 if self.instance is None else self.instance.quantity)
         
-        if product and quantity > product.stock:
-            raise serializers.ValidationError(f"Only {product.stock} items available in stock")
+        if product:
+            request = self.context.get('request')
+            available = available_to(request.user if request else None, product, quantity)
+            if quantity > available:
+                raise serializers.ValidationError(f"Only {available} items available in stock")
         
         return attrs
 
 
-class CartSerializer(serializers.ModelSerializer):
+class CartLineSerializer(serializers.Serializer):
+    product_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0)
+
+
+class CartBatchSerializer(serializers.Serializer):
+    """`{"items": [{"product_id": 1, "quantity": 3}, ...]}`; quantity 0 removes a line."""
+    items = serializers.ListField(child=CartLineSerializer(), allow_empty=False, max_length=100)
+
+    def validate_items(self, value):
+        # Later entries for the same product win
+        return {line['product_id']: line['quantity'] for line in value}
+
+
+class CartSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     items = CartItemSerializer(many=True, read_only=True)
     total = serializers.SerializerMethodField()
     items_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Cart
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'items', 'total', 'items_count', 'created_at', 'updated_at']
         read_only_fields = ['created_at', 'updated_at']
 
     def get_total(self, obj):
-        return sum(item.product.price * item.quantity for item in obj.items.all())
+        return self._summary(obj)[0]
 
     def get_items_count(self, obj):
-        return sum(item.quantity for item in obj.items.all())
+        return self._summary(obj)[1]
+
+    def _summary(self, obj):
+        # Carts loaded through `Cart.objects.with_summary()` carry the totals
+        if hasattr(obj, 'items_total'):
+            return obj.items_total, obj.items_count
+        total = count = 0
+        for item in obj.items.all():
+            total += item.product.price * item.quantity
+            count += item.quantity
+        return total, count
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -115,7 +237,7 @@ class OrderItemSerializer(serializers.ModelSerializer):
         return obj.price * obj.quantity
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
     address = AddressSerializer(read_only=True)
     address_id = serializers.PrimaryKeyRelatedField(
@@ -125,22 +247,40 @@ class OrderSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Order
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'user_email', 'address', 'address_id', 'items', 'total', 'status', 'created_at', 'updated_at']
-        read_only_fields = ['total', 'created_at', 'updated_at']
+        # Status changes go through the transition actions (products/order_status.py)
+        read_only_fields = ['total', 'status', 'created_at', 'updated_at']
 
-    def validate_status(self, value):
-        allowed_statuses = ['pending', 'processing', 'shipped', 'delivered', 'cancelled']
-        if value not in allowed_statuses:
-            raise serializers.ValidationError(f"Status must be one of: {', '.join(allowed_statuses)}")
-        return value
+
+class OrderTransitionSerializer(serializers.Serializer):
+    """`{"ids": [1, 2, ...], "status": "shipped", "note": "..."}` for bulk status changes."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=10000
+    )
+    status = serializers.ChoiceField(choices=ORDER_STATUSES)
+    note = serializers.CharField(max_length=255, required=False, allow_blank=True, default='')
+
+
+class OrderSummarySerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    """Flat order history row; expects `Order.objects.with_summary()`."""
+    items_count = serializers.IntegerField(read_only=True)
+    thumbnail = serializers.CharField(read_only=True, allow_null=True)
+
+    class Meta:
+        model = Order
+        list_serializer_class = TimedListSerializer
+        fields = ['id', 'status', 'total', 'items_count', 'thumbnail', 'created_at']
+        read_only_fields = fields
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user_name = serializers.CharField(source='user.username', read_only=True)
     product_name = serializers.CharField(source='product.name', read_only=True)
 
     class Meta:
         model = Review
+        list_serializer_class = TimedListSerializer
         fields = ['id', 'user_name', 'product', 'product_name', 'rating', 'comment', 'created_at']
         read_only_fields = ['user', 'created_at']
 
@@ -0,0 +1,236 @@
+"""
+Domain operations that span several models and must run atomically.
+
+Views translate `CheckoutError` subclasses into 400 responses.
+"""
+from django.db import connections, transaction
+from django.db.models import Case, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .cache import bump_products
+from .models import Address, Cart, CartItem, Order, OrderItem, Product, StockHold
+
+
+class CheckoutError(Exception):
+    """Base class for checkout failures that are the client's to fix."""
+
+
+class EmptyCart(CheckoutError):
+    def __init__(self):
+        super().__init__('Cart is empty')
+
+
+class InsufficientStock(CheckoutError):
+    def __init__(self, products):
+        self.products = products
+        names = ', '.join(p['name'] for p in products)
+        super().__init__(f'Insufficient stock for: {names}')
+
+
+class StockLimitExceeded(CheckoutError):
+    def __init__(self, stock):
+        self.stock = stock
+        super().__init__(f'Only {stock} items available in stock')
+
+
+class UnknownProducts(CheckoutError):
+    def __init__(self, product_ids):
+        self.product_ids = product_ids
+        super().__init__(f'Unknown products: {", ".join(map(str, product_ids))}')
+
+
+def available_to(user, product, quantity):
+    """
+    Units of `product` that `user` may put in their cart: the units nobody
+    holds plus `user`'s own hold (none without a user). The hold is only
+    read when `quantity` does not fit in the unheld units.
+    """
+    available = product.available
+    if quantity > available and user is not None:
+        available += StockHold.objects.filter(user=user, product=product).values_list('quantity', flat=True).first() or 0
+    return available
+
+
+def decrement_stock(quantities, held=None):
+    """
+    Subtract `{product_id: qty}` from stock in one conditional UPDATE.
+
+    `held` is the buyer's own stock holds `{product_id: qty}`. They come
+    off `reserved` in the same statement, so only units nobody else holds
+    are sold. If any row would go short, nothing is written and the ids
+    of those rows are returned; an empty list means every product was
+    updated. Callers must hold the row locks (as `place_order` does) so
+    the check and the UPDATE see the same rows.
+    """
+    held = held or {}
+    product_ids = list(quantities.keys() | held.keys())
+    if not product_ids:
+        return []
+    qty = Case(
+        *[When(pk=pk, then=Value(q)) for pk, q in quantities.items()],
+        default=Value(0), output_field=IntegerField(),
+    )
+    release = Case(
+        *[When(pk=pk, then=Value(q)) for pk, q in held.items()],
+        default=Value(0), output_field=IntegerField(),
+    )
+    short = list(Product.objects.filter(
+        pk__in=product_ids, stock__lt=F('reserved') - release + qty
+    ).values_list('pk', flat=True))
+    if short:
+        return short
+    Product.objects.filter(
+        pk__in=product_ids, stock__gte=F('reserved') - release + qty
+    ).update(
+        stock=F('stock') - qty, reserved=F('reserved') - release, updated_at=timezone.now()
+    )
+    return []
+
+
+def place_order(user, address_id=None):
+    """
+    Turn `user`'s cart into an order.
+
+    Runs in a single transaction. It locks the user's stock holds, then
+    the products involved in primary key order, so concurrent checkouts
+    and the hold sweep cannot deadlock. It prices the order from the
+    locked rows, bulk-creates the order lines, converts the holds into
+    sold stock with guarded `F()` updates and empties the cart. Units
+    other buyers hold (`Product.reserved`) are not for sale.
+    """
+    with transaction.atomic():
+        lines = list(
+            CartItem.objects.filter(cart__user=user).values_list('id', 'product_id', 'quantity')
+        )
+        if not lines:
+            raise EmptyCart()
+
+        quantities = {}
+        for _, product_id, quantity in lines:
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+
+        held = dict(
+            StockHold.objects.select_for_update().filter(user=user).values_list('product_id', 'quantity')
+        )
+        locked = {
+            row['id']: row
+            for row in Product.objects.select_for_update()
+            .filter(pk__in=list(quantities.keys() | held.keys()))
+            .order_by('pk')
+            .values('id', 'name', 'price', 'stock', 'reserved')
+        }
+        # The same test decrement_stock applies, over held-only rows too
+        short = [
+            row for pk, row in locked.items()
+            if row['stock'] - row['reserved'] + held.get(pk, 0) < quantities.get(pk, 0)
+        ]
+        if short:
+            raise InsufficientStock(short)
+
+        address = None
+        if address_id:
+            address = Address.objects.filter(id=address_id, user=user).first()
+
+        order = Order.objects.create(
+            user=user,
+            address=address,
+            total=sum(locked[pk]['price'] * qty for pk, qty in quantities.items()),
+            status='pending',
+        )
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product_id=pk, quantity=qty, price=locked[pk]['price'])
+            for pk, qty in quantities.items()
+        ])
+
+        short_ids = decrement_stock(quantities, held)
+        if short_ids:
+            # Rows are locked, so this only trips if stock moved under us
+            # through a path that did not take the lock.
+            raise InsufficientStock([locked[pk] for pk in sorted(short_ids)])
+
+        if held:
+            StockHold.objects.filter(user=user).delete()
+        CartItem.objects.filter(pk__in=[line_id for line_id, _, _ in lines]).delete()
+        transaction.on_commit(lambda: bump_products(quantities))
+    return order
+
+
+def _upsert_line(cart_id, product_id, quantity):
+    """
+    Insert a cart line or add `quantity` to the existing one, in a single
+    statement; returns `(line_id, new_quantity)`.
+
+    The ORM's `bulk_create(update_conflicts=True)` can only overwrite the
+    quantity, not increment it, hence the SQL. `ON CONFLICT ... RETURNING`
+    is supported by both PostgreSQL and SQLite.
+    """
+    connection = connections[CartItem.objects.db]
+    qn = connection.ops.quote_name
+    table = qn(CartItem._meta.db_table)
+    added_at = CartItem._meta.get_field('added_at').get_db_prep_value(timezone.now(), connection)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({qn("cart_id")}, {qn("product_id")}, {qn("quantity")}, {qn("added_at")}) '
+            f'VALUES (%s, %s, %s, %s) '
+            f'ON CONFLICT ({qn("cart_id")}, {qn("product_id")}) '
+            f'DO UPDATE SET {qn("quantity")} = {table}.{qn("quantity")} + EXCLUDED.{qn("quantity")} '
+            f'RETURNING {qn("id")}, {qn("quantity")}',
+            [cart_id, product_id, quantity, added_at],
+        )
+        return cursor.fetchone()
+
+
+def add_to_cart(user, product, quantity):
+    """
+    Add `quantity` of `product` to `user`'s cart; returns `(line_id, created)`.
+
+    A repeated or racing add lands on the same line through the unique
+    `(cart, product)` constraint. The line is rolled back if the total
+    would exceed the units available to `user` (see `available_to`).
+    """
+    cart, _ = Cart.objects.get_or_create(user=user)
+    with transaction.atomic():
+        line_id, new_quantity = _upsert_line(cart.pk, product.pk, quantity)
+        available = available_to(user, product, new_quantity)
+        if new_quantity > available:
+            raise StockLimitExceeded(available)
+    # Existing lines hold at least 1, so only a new line ends at `quantity`
+    return line_id, new_quantity == quantity
+
+
+def set_cart_quantities(user, quantities):
+    """
+    Set `{product_id: qty}` as absolute line quantities in `user`'s cart;
+    a quantity of 0 removes the line. Returns the cart.
+
+    Validates every product against the units available to `user` (stock
+    others do not hold) in one query, then deletes and upserts all lines
+    in one transaction, so the batch applies entirely or not at all.
+    """
+    own_hold = StockHold.objects.filter(user=user, product=OuterRef('pk')).values('quantity')
+    products = {
+        row['id']: row
+        for row in Product.objects.filter(pk__in=list(quantities))
+        .annotate(available=F('stock') - F('reserved') + Coalesce(Subquery(own_hold), 0))
+        .values('id', 'name', 'available')
+    }
+    missing = sorted(pk for pk in quantities if pk not in products)
+    if missing:
+        raise UnknownProducts(missing)
+    short = [products[pk] for pk, qty in quantities.items() if qty > products[pk]['available']]
+    if short:
+        raise InsufficientStock(short)
+
+    cart, _ = Cart.objects.get_or_create(user=user)
+    removed = [pk for pk, qty in quantities.items() if qty == 0]
+    kept = [CartItem(cart=cart, product_id=pk, quantity=qty) for pk, qty in quantities.items() if qty > 0]
+    with transaction.atomic():
+        if removed:
+            CartItem.objects.filter(cart=cart, product_id__in=removed).delete()
+        if kept:
+            CartItem.objects.bulk_create(
+                kept, update_conflicts=True,
+                unique_fields=['cart', 'product'], update_fields=['quantity'],
+            )
+    return cart
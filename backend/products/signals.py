@@ -0,0 +1,79 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import search
+from .cache import bump, product_namespace
+from .category_stats import apply_contribution_change, contribution, product_contribution, refresh_category_stats
+from .models import CATEGORY_STATS_SOURCES, Category, Product, Review
+from .ratings import apply_rating_delta
+
+
+def _shift_rating(product_id, sum_delta, count_delta):
+    # The row lock keeps the before and after reads consistent with the
+    # delta applied between them, so the category moves by exactly that.
+    with transaction.atomic():
+        old = product_contribution(product_id, lock=True)
+        apply_rating_delta(product_id, sum_delta, count_delta)
+        apply_contribution_change(old, product_contribution(product_id))
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, **kwargs):
+    search.index_product(instance)
+    bump('products', product_namespace(instance.pk))
+    # Price, is_active, rating and category moves feed the category statistics
+    loaded = getattr(instance, '_loaded_stats', None)
+    old = None if created else contribution(loaded or {})
+    new = contribution(instance.__dict__)
+    if new is None or (old is None and not created):
+        # Deferred columns or an instance not read from the DB: recompute
+        refresh_category_stats({instance.category_id, (loaded or {}).get('category_id')})
+    else:
+        apply_contribution_change(old, new)
+    instance._loaded_stats = {
+        field: instance.__dict__[field] for field in CATEGORY_STATS_SOURCES if field in instance.__dict__
+    }
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    search.remove_product(instance.pk)
+    bump('products', product_namespace(instance.pk))
+    old = contribution(getattr(instance, '_loaded_stats', None) or {})
+    if old is None:
+        refresh_category_stats([instance.category_id])
+    else:
+        # The cascade has already deleted the reviews, and their signals
+        # took the product's rating out of the category
+        apply_contribution_change(old._replace(rated=False, rating=0.0), None)
+
+
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, instance, **kwargs):
+    # Product payloads nest their category, so both namespaces go stale.
+    bump('categories', 'products')
+
+
+@receiver(post_save, sender=Review)
+def review_saved(sender, instance, created, **kwargs):
+    if created:
+        _shift_rating(instance.product_id, instance.rating, 1)
+    else:
+        old_product_id = getattr(instance, '_loaded_product_id', instance.product_id)
+        old_rating = getattr(instance, '_loaded_rating', instance.rating)
+        if old_product_id != instance.product_id:
+            _shift_rating(old_product_id, -old_rating, -1)
+            _shift_rating(instance.product_id, instance.rating, 1)
+            bump(product_namespace(old_product_id))
+        elif old_rating != instance.rating:
+            _shift_rating(instance.product_id, instance.rating - old_rating, 0)
+    instance._loaded_product_id = instance.product_id
+    instance._loaded_rating = instance.rating
+    bump('products', product_namespace(instance.product_id))
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    _shift_rating(instance.product_id, -instance.rating, -1)
+    bump('products', product_namespace(instance.product_id))
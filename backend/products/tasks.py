@@ -0,0 +1,9 @@
+from celery import shared_task
+
+from .reservations import sweep_expired_holds
+
+
+@shared_task
+def sweep_expired_stock_holds():
+    """Return expired checkout holds to stock; scheduled by CELERY_BEAT_SCHEDULE."""
+    return sweep_expired_holds()
@@ -0,0 +1,11 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # Cached responses, throttle buckets and the JWT stale-user marks all
+    # live in the default cache; start every test clean.
+    cache.clear()
+    yield
+    cache.clear()
@@ -0,0 +1,24 @@
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@contextmanager
+def assert_max_queries(budget, using=connection):
+    """
+    Fail if the wrapped block runs more than `budget` queries.
+
+    The failure message lists every captured statement so the offending
+    N+1 is easy to spot.
+    """
+    with CaptureQueriesContext(using) as context:
+        yield context
+    executed = len(context.captured_queries)
+    if executed > budget:
+        statements = '\n'.join(
+            f'{i}. {query["sql"]}' for i, query in enumerate(context.captured_queries, start=1)
+        )
+        raise AssertionError(
+            f'{executed} queries executed, budget is {budget}:\n{statements}'
+        )
@@ -0,0 +1,146 @@
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from asgiref.testing import ApplicationCommunicator
+from django.contrib.auth.models import User
+from django.test import AsyncClient
+from rest_framework.test import APIClient
+from rest_framework import status
+from products.cache import cache_stats, reset_stats
+from products.models import Category, Product, Review
+
+
+@pytest.fixture
+def client():
+    reset_stats()
+    return APIClient()
+
+
+@pytest.fixture
+def catalog(db):
+    electronics = Category.objects.create(name='Electronics')
+    books = Category.objects.create(name='Books')
+    products = [
+        Product.objects.create(name='Laptop', description='Fast laptop', price=999, category=electronics, brand='Acme'),
+        Product.objects.create(name='Phone', description='Smart phone', price=499, category=electronics, is_active=False),
+        Product.objects.create(name='Novel', description='Thick book', price=15, category=books),
+    ]
+    user = User.objects.create_user(username='reader', password='testpass123')
+    Review.objects.create(user=user, product=products[0], rating=4, comment='Good')
+    return products
+
+
+@pytest.mark.django_db
+class TestAsyncCatalogViews:
+    def test_product_list_matches_drf_view(self, client, catalog):
+        sync = client.get('/api/products/?sort=price&limit=2').json()
+        response = client.get('/api/async/products/?sort=price&limit=2')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json() == sync
+
+    def test_product_list_filters_and_cards(self, client, catalog):
+        response = client.get('/api/async/products/?category=electronics&is_active=true&fields=name,category')
+        assert response.json() == {
+            'items': [{'id': catalog[0].id, 'name': 'Laptop', 'category': 'Electronics'}],
+            'total': 1,
+        }
+
+    def test_search_and_total_modes(self, client, catalog):
+        response = client.get('/api/async/products/?q=book&total=none')
+        assert [item['name'] for item in response.json()['items']] == ['Novel']
+        assert 'total' not in response.json()
+
+    def test_bad_params_are_400(self, client, catalog):
+        assert client.get('/api/async/products/?fields=password').json() == {'error': 'Unknown fields: password'}
+        assert client.get('/api/async/products/?is_active=maybe').status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_product_detail_and_404(self, client, catalog):
+        response = client.get(f'/api/async/products/{catalog[0].id}/')
+        assert response.json() == client.get(f'/api/products/{catalog[0].id}/').json()
+        missing = client.get('/api/async/products/999999/')
+        assert missing.status_code == status.HTTP_404_NOT_FOUND
+        assert missing.json() == {'detail': 'No Product matches the given query.'}
+
+    def test_product_reviews(self, client, catalog):
+        response = client.get(f'/api/async/products/{catalog[0].id}/reviews/')
+        assert response.json() == client.get(f'/api/products/{catalog[0].id}/reviews/').json()
+
+    def test_categories_list_and_detail_are_cached_separately(self, client, catalog):
+        listing = client.get('/api/async/categories/').json()
+        assert [c['name'] for c in listing['items']] == ['Books', 'Electronics']
+        detail = client.get(f'/api/async/categories/{catalog[2].category_id}/').json()
+        assert detail['name'] == 'Books'
+        assert detail['products_count'] == 1
+
+    def test_responses_are_cached_and_invalidated_by_writes(self, client, catalog):
+        client.get('/api/async/products/')
+        client.get('/api/async/products/')
+        assert cache_stats() == {'products:miss': 1, 'products:hit': 1}
+        Product.objects.filter(pk=catalog[0].pk).first().save()
+        client.get('/api/async/products/')
+        assert cache_stats()['products:miss'] == 2
+
+    def test_price_and_ordering_match_drf_view(self, client, catalog):
+        for query in ['price=999', 'price=999.00', 'ordering=price', 'ordering=-price,bogus', 'ordering=bogus']:
+            sync = client.get(f'/api/products/?{query}').json()
+            assert client.get(f'/api/async/products/?{query}').json() == sync, query
+        assert client.get('/api/async/products/?price=abc').json() == {'error': 'Invalid price'}
+
+    def test_cursor_pagination_matches_drf_view(self, client, catalog):
+        for fields in ['', '&fields=name,price']:
+            sync = client.get(f'/api/products/?pagination=cursor&sort=price&limit=2{fields}').json()
+            page = client.get(f'/api/async/products/?pagination=cursor&sort=price&limit=2{fields}').json()
+            assert page == sync
+            assert page['next'] and page['prev'] is None
+            following = client.get(f"/api/async/products/?cursor={page['next']}&sort=price&limit=2{fields}").json()
+            assert following == client.get(f"/api/products/?cursor={page['next']}&sort=price&limit=2{fields}").json()
+            assert [item['name'] for item in following['items']] == ['Laptop']
+        assert client.get('/api/async/products/?cursor=garbage').json() == {'error': 'Invalid cursor'}
+
+    def test_shares_the_catalog_throttle_with_drf_views(self, client, catalog, settings):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], 'catalog': '2/minute'},
+        }
+        assert client.get('/api/products/').status_code == status.HTTP_200_OK
+        assert client.get('/api/async/categories/').status_code == status.HTTP_200_OK
+        response = client.get('/api/async/products/')
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert int(response['Retry-After']) == 30
+        assert response.json()['detail'].startswith('Request was throttled.')
+        assert client.get('/api/products/').status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_only_get_is_allowed(self, client, catalog):
+        assert client.post('/api/async/products/').status_code == status.HTTP_405_METHOD_NOT_ALLOWED
+
+    def test_runs_on_the_event_loop(self, catalog):
+        response = async_to_sync(AsyncClient().get)('/api/async/products/?view=card')
+        assert response.status_code == status.HTTP_200_OK
+        assert json.loads(response.content)['total'] == 3
+
+
+@pytest.mark.django_db(transaction=True)
+def test_asgi_application_routes_async_reads_to_lean_handler(catalog):
+    from ecommerce.asgi import application
+
+    async def get(path):
+        communicator = ApplicationCommunicator(application, {
+            'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'',
+            'headers': [(b'host', b'localhost')], 'scheme': 'https', 'server': ('localhost', 443),
+        })
+        await communicator.send_input({'type': 'http.request', 'body': b''})
+        start = await communicator.receive_output(5)
+        body = await communicator.receive_output(5)
+        await communicator.wait(5)
+        return start['status'], {k.lower(): v for k, v in start['headers']}, body['body']
+
+    code, headers, body = async_to_sync(get)('/api/async/categories/')
+    assert code == 200
+    assert json.loads(body)['total'] == 2
+    # CSRF/session middleware are not in the async chain
+    assert b'x-frame-options' not in headers
+    # ...and building that chain left MIDDLEWARE alone for everything else
+    code, headers, body = async_to_sync(get)('/api/categories/')
+    assert code == 200
+    assert b'x-frame-options' in headers
@@ -0,0 +1,122 @@
+import threading
+
+import pytest
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from ecommerce import batch
+from products.models import Address, CartItem, Category, Product
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username='testuser', password='testpass123')
+
+
+@pytest.fixture
+def catalog(db):
+    category = Category.objects.create(name='Electronics')
+    return [
+        Product.objects.create(name=f'Item {i}', description='x', price=10 + i, category=category, stock=5)
+        for i in range(3)
+    ]
+
+
+def post_batch(client, *requests):
+    return client.post('/api/batch/', {'requests': list(requests)}, format='json')
+
+
+@pytest.mark.django_db
+class TestBatchEndpoint:
+    def test_combines_responses_in_order(self, catalog):
+        client = APIClient()
+        response = post_batch(
+            client,
+            {'method': 'GET', 'path': '/api/products/?limit=2&sort=price'},
+            {'method': 'GET', 'path': '/api/categories/'},
+            {'method': 'GET', 'path': f'/api/products/{catalog[0].id}/'},
+        )
+        assert response.status_code == status.HTTP_200_OK
+        products, categories, detail = response.data['responses']
+        direct = client.get('/api/products/?limit=2&sort=price')
+        assert products['status'] == 200
+        assert products['body'] == direct.json()
+        assert products['headers']['ETag'] == direct['ETag']
+        assert categories['body']['results'][0]['name'] == 'Electronics'
+        assert detail['body']['name'] == 'Item 0'
+
+    def test_caller_credentials_apply_to_every_sub_request(self, user, catalog):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        Address.objects.create(
+            user=user, street='1 Main St', city='City', state='State', country='Country', postal_code='1'
+        )
+        response = post_batch(
+            client,
+            {'method': 'POST', 'path': '/api/cart-items/', 'body': {'product_id': catalog[0].id, 'quantity': 2}},
+            {'method': 'GET', 'path': '/api/cart/me/'},
+            {'method': 'GET', 'path': '/api/addresses/'},
+        )
+        added, cart, addresses = response.data['responses']
+        assert added['status'] == status.HTTP_201_CREATED
+        # the write is visible to the read that follows it
+        assert cart['body']['items_count'] == 2
+        assert addresses['status'] == status.HTTP_200_OK
+        assert CartItem.objects.get().cart.user == user
+
+    def test_anonymous_sub_requests_are_authorised_individually(self, catalog):
+        response = post_batch(
+            APIClient(),
+            {'method': 'GET', 'path': '/api/products/'},
+            {'method': 'GET', 'path': '/api/cart/me/'},
+        )
+        statuses = [r['status'] for r in response.data['responses']]
+        assert statuses == [status.HTTP_200_OK, status.HTTP_401_UNAUTHORIZED]
+
+    def test_sub_request_errors_do_not_fail_the_batch(self, user, catalog):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = post_batch(
+            client,
+            {'method': 'GET', 'path': '/api/nowhere/'},
+            {'method': 'POST', 'path': '/api/cart-items/', 'body': {'product_id': catalog[0].id, 'quantity': 50}},
+            {'method': 'GET', 'path': '/api/async/products/999999/'},
+        )
+        assert [r['status'] for r in response.data['responses']] == [404, 400, 404]
+
+    @pytest.mark.parametrize('body, error', [
+        ({}, '"requests" must be a non-empty list'),
+        ({'requests': [{'method': 'TRACE', 'path': '/api/products/'}]}, 'Request 0: unsupported method TRACE'),
+        ({'requests': [{'path': '/admin/'}]}, 'Request 0: path must start with /api/'),
+        ({'requests': [{'method': 'POST', 'path': '/api/batch/'}]}, 'Request 0: batches cannot be nested'),
+    ])
+    def test_invalid_batches_are_400(self, db, body, error):
+        response = APIClient().post('/api/batch/', body, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data == {'error': error}
+
+    def test_request_limit(self, db, settings):
+        settings.BATCH_MAX_REQUESTS = 2
+        response = post_batch(APIClient(), *[{'path': '/api/products/'}] * 3)
+        assert response.data == {'error': 'At most 2 requests per batch'}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_consecutive_reads_run_concurrently(catalog, monkeypatch, settings):
+    settings.BATCH_MAX_WORKERS = 3
+    monkeypatch.setattr(batch, '_executor', None)
+    barrier = threading.Barrier(3, timeout=5)
+    threads = set()
+    run_one = batch.run_one
+
+    def tracking_run_one(parent, operation):
+        if operation[0] == 'GET':
+            threads.add(threading.get_ident())
+            barrier.wait()  # only passes if all three GETs are in flight together
+        return run_one(parent, operation)
+
+    monkeypatch.setattr(batch, 'run_one', tracking_run_one)
+    response = post_batch(APIClient(), *[{'path': f'/api/products/{p.id}/'} for p in catalog])
+    assert [r['body']['name'] for r in response.data['responses']] == ['Item 0', 'Item 1', 'Item 2']
+    assert len(threads) == 3
@@ -0,0 +1,90 @@
+import pytest
+from rest_framework.test import APIClient
+from rest_framework import status
+from django.contrib.auth.models import User
+from products.cache import cache_stats, reset_stats
+from products.models import Category, Product
+from products.tests.helpers import assert_max_queries
+
+
+@pytest.fixture
+def api_client():
+    reset_stats()
+    return APIClient()
+
+
+@pytest.fixture
+def category(db):
+    return Category.objects.create(name='Electronics')
+
+
+@pytest.fixture
+def product(db, category):
+    return Product.objects.create(
+        name='Test Product', description='A test product',
+        price=99.99, category=category, stock=10
+    )
+
+
+@pytest.mark.django_db
+class TestCatalogCache:
+    def test_product_list_is_served_from_cache(self, api_client, product):
+        api_client.get('/api/products/?limit=5&page=1')
+        with assert_max_queries(0):
+            response = api_client.get('/api/products/?page=1&limit=5')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['total'] == 1
+        assert cache_stats() == {'products:miss': 1, 'products:hit': 1}
+
+    def test_distinct_params_are_cached_separately(self, api_client, product):
+        api_client.get('/api/products/?page=1')
+        response = api_client.get('/api/products/?page=2')
+        assert response.data['items'] == []
+        assert cache_stats()['products:miss'] == 2
+
+    def test_list_and_detail_sharing_a_namespace_do_not_collide(self, api_client, category):
+        api_client.get('/api/categories/')
+        response = api_client.get(f'/api/categories/{category.id}/')
+        assert response.data['name'] == 'Electronics'
+
+    def test_product_save_invalidates_detail_and_list(self, api_client, product):
+        api_client.get(f'/api/products/{product.id}/')
+        api_client.get('/api/products/')
+        product.name = 'Renamed'
+        product.save()
+        assert api_client.get(f'/api/products/{product.id}/').data['name'] == 'Renamed'
+        assert api_client.get('/api/products/').data['items'][0]['name'] == 'Renamed'
+
+    def test_product_save_leaves_other_details_cached(self, api_client, product, category):
+        other = Product.objects.create(
+            name='Other', description='x', price=1, category=category, stock=1
+        )
+        api_client.get(f'/api/products/{other.id}/')
+        product.price = 10
+        product.save()
+        with assert_max_queries(0):
+            api_client.get(f'/api/products/{other.id}/')
+
+    def test_new_product_invalidates_category_counts(self, api_client, product, category):
+        assert api_client.get('/api/categories/').data['results'][0]['products_count'] == 1
+        Product.objects.create(name='Second', description='x', price=1, category=category)
+        assert api_client.get('/api/categories/').data['results'][0]['products_count'] == 2
+
+    def test_category_rename_invalidates_product_detail(self, api_client, product, category):
+        api_client.get(f'/api/products/{product.id}/')
+        category.name = 'Gadgets'
+        category.save()
+        response = api_client.get(f'/api/products/{product.id}/')
+        assert response.data['category']['name'] == 'Gadgets'
+
+    def test_review_invalidates_product_detail(self, api_client, product):
+        api_client.get(f'/api/products/{product.id}/')
+        user = User.objects.create_user(username='reviewer', password='testpass123')
+        api_client.force_authenticate(user=user)
+        api_client.post('/api/reviews/', {'product': product.id, 'rating': 4})
+        assert api_client.get(f'/api/products/{product.id}/').data['num_reviews'] == 1
+
+    def test_missing_product_is_not_cached(self, api_client, db):
+        assert api_client.get('/api/products/999/').status_code == status.HTTP_404_NOT_FOUND
+        assert api_client.get('/api/products/999/').status_code == status.HTTP_404_NOT_FOUND
+        assert cache_stats()['product:miss'] == 2
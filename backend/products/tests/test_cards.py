@@ -0,0 +1,87 @@
+import json
+
+import pytest
+from rest_framework.test import APIClient
+from rest_framework import status
+from products.models import Category, Product
+from products.tests.helpers import assert_max_queries
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def products(db):
+    categories = [Category.objects.create(name=f'Category {i}', description='x' * 200) for i in range(3)]
+    return [
+        Product.objects.create(
+            name=f'Product {i}',
+            description='A long product description ' * 20,
+            price=10 + i,
+            category=categories[i % 3],
+            image=f'https://example.com/{i}.jpg',
+            brand='TechBrand',
+            stock=10,
+        )
+        for i in range(30)
+    ]
+
+
+@pytest.mark.django_db
+class TestProductCards:
+    def test_card_view_returns_flat_rows(self, api_client, products):
+        response = api_client.get('/api/products/?view=card&sort=price&limit=2')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['total'] == 30
+        assert response.data['items'][0] == {
+            'id': products[0].id,
+            'name': 'Product 0',
+            'price': '10.00',
+            'image': 'https://example.com/0.jpg',
+            'rating': 0.0,
+            'category': 'Category 0',
+        }
+
+    def test_fields_selects_columns_and_always_includes_id(self, api_client, products):
+        response = api_client.get('/api/products/?fields=name,brand,created_at&limit=1')
+        assert response.status_code == status.HTTP_200_OK
+        item = response.data['items'][0]
+        assert list(item) == ['id', 'name', 'brand', 'created_at']
+        assert item['created_at'].endswith('Z')
+
+    def test_unknown_fields_are_rejected(self, api_client, products):
+        response = api_client.get('/api/products/?fields=name,password')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data == {'error': 'Unknown fields: password'}
+
+    def test_card_list_is_a_single_query_plus_count(self, api_client, products):
+        with assert_max_queries(2):
+            response = api_client.get('/api/products/?view=card&limit=30')
+        assert len(response.data['items']) == 30
+
+    def test_card_payload_is_several_times_smaller(self, api_client, products):
+        full = api_client.get('/api/products/?limit=30&total=none')
+        cards = api_client.get('/api/products/?view=card&limit=30&total=none')
+        full_bytes = len(json.dumps(full.json()))
+        card_bytes = len(json.dumps(cards.json()))
+        assert card_bytes * 4 < full_bytes
+
+    def test_cursor_walk_in_card_mode(self, api_client, products):
+        url = '/api/products/?view=card&pagination=cursor&sort=-price&limit=7'
+        seen = []
+        response = api_client.get(url)
+        while True:
+            assert response.status_code == status.HTTP_200_OK
+            seen.extend(item['price'] for item in response.data['items'])
+            if not response.data['next']:
+                break
+            response = api_client.get(f"{url}&cursor={response.data['next']}")
+        assert len(seen) == 30
+        assert seen == sorted(seen, key=float, reverse=True)
+
+    def test_search_works_in_card_mode(self, api_client, products):
+        response = api_client.get('/api/products/?view=card&q=Product&sort=relevance')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['total'] == 30
@@ -0,0 +1,159 @@
+import threading
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection
+from rest_framework import status
+from rest_framework.test import APIClient
+from products.models import Category, Product, Cart, CartItem
+from products.services import add_to_cart
+from products.tests.helpers import assert_max_queries
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username='testuser', password='testpass123')
+
+
+@pytest.fixture
+def authenticated_client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def products(db):
+    category = Category.objects.create(name='Electronics')
+    return [
+        Product.objects.create(name=f'Item {i}', description='x', price=10 + i, category=category, stock=5)
+        for i in range(3)
+    ]
+
+
+@pytest.mark.django_db
+class TestCartUpserts:
+    def test_adding_twice_updates_one_line(self, authenticated_client, products):
+        first = authenticated_client.post('/api/cart-items/', {'product_id': products[0].id, 'quantity': 2})
+        second = authenticated_client.post('/api/cart-items/', {'product_id': products[0].id, 'quantity': 1})
+        assert first.status_code == status.HTTP_201_CREATED
+        assert second.status_code == status.HTTP_200_OK
+        assert second.data['id'] == first.data['id']
+        assert second.data['quantity'] == 3
+        assert CartItem.objects.count() == 1
+
+    def test_increment_beyond_stock_is_rolled_back(self, authenticated_client, products):
+        authenticated_client.post('/api/cart-items/', {'product_id': products[0].id, 'quantity': 4})
+        response = authenticated_client.post('/api/cart-items/', {'product_id': products[0].id, 'quantity': 2})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data == {'error': 'Only 5 items available in stock'}
+        assert CartItem.objects.get().quantity == 4
+
+    def test_add_is_one_upsert(self, user, products):
+        Cart.objects.create(user=user)
+        # cart lookup, savepoint, upsert, release
+        with assert_max_queries(4):
+            add_to_cart(user, products[0], 1)
+
+    def test_duplicate_lines_are_rejected(self, user, products):
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=cart, product=products[0])
+        with pytest.raises(IntegrityError):
+            CartItem.objects.create(cart=cart, product=products[0])
+
+    def test_patch_checks_stock_and_line_clashes(self, authenticated_client, user, products):
+        cart = Cart.objects.create(user=user)
+        line = CartItem.objects.create(cart=cart, product=products[0])
+        CartItem.objects.create(cart=cart, product=products[1])
+        too_many = authenticated_client.patch(f'/api/cart-items/{line.id}/', {'quantity': 6})
+        clash = authenticated_client.patch(f'/api/cart-items/{line.id}/', {'product_id': products[1].id})
+        assert too_many.status_code == clash.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestCartBatch:
+    def test_sets_removes_and_returns_cart(self, authenticated_client, user, products):
+        cart = Cart.objects.create(user=user)
+        CartItem.objects.create(cart=cart, product=products[0], quantity=1)
+        CartItem.objects.create(cart=cart, product=products[1], quantity=1)
+        response = authenticated_client.post('/api/cart-items/batch/', {'items': [
+            {'product_id': products[0].id, 'quantity': 3},
+            {'product_id': products[1].id, 'quantity': 0},
+            {'product_id': products[2].id, 'quantity': 2},
+        ]}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert sorted(CartItem.objects.values_list('product_id', 'quantity')) == [
+            (products[0].id, 3), (products[2].id, 2)
+        ]
+        assert response.data['items_count'] == 5
+        assert response.data['total'] == 3 * 10 + 2 * 12
+
+    def test_batch_is_all_or_nothing(self, authenticated_client, products):
+        response = authenticated_client.post('/api/cart-items/batch/', {'items': [
+            {'product_id': products[0].id, 'quantity': 1},
+            {'product_id': products[1].id, 'quantity': 9},
+        ]}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.data == {'error': 'Insufficient stock for: Item 1'}
+        assert not CartItem.objects.exists()
+
+    def test_unknown_products_and_bad_payloads(self, authenticated_client, products):
+        unknown = authenticated_client.post(
+            '/api/cart-items/batch/', {'items': [{'product_id': 999999, 'quantity': 1}]}, format='json'
+        )
+        assert unknown.data == {'error': 'Unknown products: 999999'}
+        negative = authenticated_client.post(
+            '/api/cart-items/batch/', {'items': [{'product_id': products[0].id, 'quantity': -1}]}, format='json'
+        )
+        assert negative.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_query_count_does_not_grow_with_lines(self, authenticated_client, user, products):
+        Cart.objects.create(user=user)
+        items = [{'product_id': p.id, 'quantity': 1} for p in products]
+        # stock check, cart, savepoint, upsert, release, cart summary, lines, categories
+        with assert_max_queries(8):
+            authenticated_client.post('/api/cart-items/batch/', {'items': items}, format='json')
+
+
+@pytest.mark.django_db
+class TestCartSummary:
+    def test_summary_is_one_query(self, authenticated_client, user, products):
+        cart = Cart.objects.create(user=user)
+        for product in products:
+            CartItem.objects.create(cart=cart, product=product, quantity=2)
+        with assert_max_queries(1):
+            response = authenticated_client.get('/api/cart/summary/')
+        assert response.data == {'total': 2 * (10 + 11 + 12), 'items_count': 6}
+
+    def test_summary_without_cart(self, authenticated_client):
+        assert authenticated_client.get('/api/cart/summary/').data == {'total': 0, 'items_count': 0}
+        assert not Cart.objects.exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_racing_adds_land_on_one_line(products):
+    user = User.objects.create_user(username='buyer', password='testpass123')
+    Cart.objects.create(user=user)
+    adders = 4
+    outcomes = []
+    barrier = threading.Barrier(adders)
+
+    def add():
+        try:
+            barrier.wait()
+            add_to_cart(user, products[0], 1)
+            outcomes.append('ok')
+        except Exception as e:  # backend lock errors on SQLite
+            outcomes.append(type(e).__name__)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=add) for _ in range(adders)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    line = CartItem.objects.get(cart__user=user)
+    assert outcomes.count('ok') >= 1
+    assert line.quantity == outcomes.count('ok')
@@ -0,0 +1,149 @@
+import io
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from products.category_stats import refresh_category_stats
+from products.imports import import_products
+from products.models import Category, Product, Review
+from products.tests.helpers import assert_max_queries
+
+
+@pytest.fixture
+def category(db):
+    return Category.objects.create(name='Audio')
+
+
+def make_product(category, price, **kwargs):
+    return Product.objects.create(name=f'P{price}', description='x', price=price, category=category, **kwargs)
+
+
+def stats(category):
+    category.refresh_from_db()
+    return (
+        category.products_count, category.active_products_count,
+        category.min_price, category.max_price, category.avg_rating,
+    )
+
+
+@pytest.mark.django_db
+class TestMaintainedBySignals:
+    def test_create_update_delete(self, category):
+        assert stats(category) == (0, 0, None, None, None)
+        cheap = make_product(category, 10)
+        pricey = make_product(category, 90)
+        make_product(category, 500, is_active=False)
+        assert stats(category) == (3, 2, Decimal('10.00'), Decimal('90.00'), None)
+
+        pricey.price = 40
+        pricey.save()
+        assert stats(category)[3] == Decimal('40.00')
+        cheap.delete()
+        assert stats(category) == (2, 1, Decimal('40.00'), Decimal('40.00'), None)
+
+    def test_moving_a_product_updates_both_categories(self, category):
+        other = Category.objects.create(name='Video')
+        product = make_product(category, 25)
+        product.category = other
+        product.save()
+        assert stats(category)[:2] == (0, 0)
+        assert stats(other)[:3] == (1, 1, Decimal('25.00'))
+
+    def test_reviews_move_average_rating(self, category):
+        user = User.objects.create_user(username='rater', password='testpass123')
+        first, second = make_product(category, 10), make_product(category, 20)
+        make_product(category, 30)  # unreviewed products do not drag the mean down
+        Review.objects.create(user=user, product=first, rating=5)
+        review = Review.objects.create(user=user, product=second, rating=2)
+        assert stats(category)[4] == 3.5
+        review.delete()
+        assert stats(category)[4] == 5.0
+
+
+@pytest.mark.django_db
+class TestIncrementalUpdates:
+    def test_single_writes_do_not_aggregate_the_category(self, category):
+        product = make_product(category, 50)
+        make_product(category, 10)
+        product.refresh_from_db()
+        product.price = 60
+        # product UPDATE + one category UPDATE, no aggregate SELECT
+        with assert_max_queries(2):
+            product.save()
+        assert stats(category)[2:4] == (Decimal('10.00'), Decimal('60.00'))
+
+    def test_losing_the_extreme_rereads_it(self, category):
+        cheap = make_product(category, 10)
+        make_product(category, 20)
+        make_product(category, 30)
+        cheap.is_active = False
+        cheap.save()
+        assert stats(category)[:4] == (3, 2, Decimal('20.00'), Decimal('30.00'))
+        cheap.is_active = True
+        cheap.save()
+        assert stats(category)[2] == Decimal('10.00')
+
+    def test_unrelated_edits_leave_the_category_alone(self, category):
+        product = make_product(category, 10)
+        product.description = 'new'
+        with assert_max_queries(1):
+            product.save()
+
+    def test_deltas_agree_with_a_full_recompute(self, category):
+        users = [User.objects.create_user(username=f'u{i}', password='testpass123') for i in range(3)]
+        other = Category.objects.create(name='Video')
+        products = [make_product(category, price) for price in (10, 20, 30)]
+        for user, product, rating in zip(users, products, (5, 3, 4)):
+            Review.objects.create(user=user, product=product, rating=rating)
+        review = Review.objects.create(user=users[0], product=products[1], rating=1)
+        review.product = products[2]
+        review.save()
+        first, second, third = (Product.objects.get(pk=product.pk) for product in products)
+        first.is_active = False
+        first.save()
+        second.category = other
+        second.save()
+        third.delete()
+        first.delete()
+        assert refresh_category_stats() == 0
+
+
+@pytest.mark.django_db
+class TestBulkAndReconcile:
+    def test_import_refreshes_stats(self, category):
+        rows = [(i, {'sku': f'S{i}', 'name': f'P{i}', 'price': i, 'category': 'Audio'}) for i in range(1, 6)]
+        import_products(rows)
+        assert stats(category)[:4] == (5, 5, Decimal('1.00'), Decimal('5.00'))
+
+    def test_reconcile_repairs_drift(self, category):
+        make_product(category, 10)
+        Product.objects.update(price=15)  # bypasses signals
+        Category.objects.update(products_count=99)
+        assert refresh_category_stats() == 1
+        assert stats(category)[0] == 1
+        assert stats(category)[2] == Decimal('15.00')
+        out = io.StringIO()
+        call_command('reconcile_category_stats', stdout=out)
+        assert 'Reconciled 0 categories' in out.getvalue()
+
+
+@pytest.mark.django_db
+class TestReads:
+    def test_category_list_is_one_query(self, category):
+        for i in range(3):
+            make_product(Category.objects.create(name=f'C{i}'), 10 + i)
+        client = APIClient()
+        # count + page, no per-row or aggregate subqueries
+        with assert_max_queries(2):
+            response = client.get('/api/categories/')
+        names = {row['name']: row for row in response.data['results']}
+        assert names['C1']['products_count'] == 1
+        assert names['C1']['min_price'] == '11.00'
+
+    def test_product_payload_nests_only_the_count(self, category):
+        product = make_product(category, 10)
+        nested = APIClient().get(f'/api/products/{product.id}/').data['category']
+        assert nested['products_count'] == 1
+        assert 'min_price' not in nested
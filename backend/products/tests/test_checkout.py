@@ -0,0 +1,129 @@
+import threading
+
+import pytest
+from django.contrib.auth.models import User
+from django.db import OperationalError, connection
+from products.models import Category, Product, Cart, CartItem, Order, OrderItem
+from products.services import (
+    EmptyCart, InsufficientStock, decrement_stock, place_order
+)
+from products.tests.helpers import assert_max_queries
+
+
+@pytest.fixture
+def category(db):
+    return Category.objects.create(name='Electronics')
+
+
+def make_product(category, stock=10, price=10):
+    return Product.objects.create(
+        name=f'Product {stock}-{price}', description='x',
+        price=price, category=category, stock=stock
+    )
+
+
+def make_cart(username, lines):
+    user = User.objects.create_user(username=username, password='testpass123')
+    cart = Cart.objects.create(user=user)
+    for product, quantity in lines:
+        CartItem.objects.create(cart=cart, product=product, quantity=quantity)
+    return user
+
+
+@pytest.mark.django_db
+class TestPlaceOrder:
+    def test_creates_order_decrements_stock_and_clears_cart(self, category):
+        a = make_product(category, stock=5, price=10)
+        b = make_product(category, stock=3, price=2.5)
+        user = make_cart('buyer', [(a, 2), (b, 3)])
+
+        order = place_order(user)
+
+        assert str(order.total) == '27.50'
+        assert sorted(order.items.values_list('product_id', 'quantity')) == [(a.id, 2), (b.id, 3)]
+        a.refresh_from_db()
+        b.refresh_from_db()
+        assert (a.stock, b.stock) == (3, 0)
+        assert not CartItem.objects.filter(cart__user=user).exists()
+
+    def test_query_count_does_not_grow_with_lines(self, category):
+        products = [make_product(category, stock=10, price=i + 1) for i in range(20)]
+        user = make_cart('buyer', [(p, 1) for p in products])
+        # savepoint, lines, holds, lock, order, bulk items, stock check,
+        # stock update, cart delete, release
+        with assert_max_queries(10):
+            place_order(user)
+
+    def test_insufficient_stock_rolls_back(self, category):
+        a = make_product(category, stock=5)
+        b = make_product(category, stock=1, price=20)
+        user = make_cart('buyer', [(a, 2), (b, 2)])
+
+        with pytest.raises(InsufficientStock):
+            place_order(user)
+
+        a.refresh_from_db()
+        assert a.stock == 5
+        assert not Order.objects.exists()
+        assert CartItem.objects.filter(cart__user=user).count() == 2
+
+    def test_empty_cart(self, db):
+        user = User.objects.create_user(username='buyer', password='testpass123')
+        with pytest.raises(EmptyCart):
+            place_order(user)
+
+    def test_decrement_stock_refuses_to_go_negative(self, category):
+        a = make_product(category, stock=1)
+        b = make_product(category, stock=5, price=20)
+        assert decrement_stock({a.id: 2, b.id: 1}) == [a.id]
+        a.refresh_from_db()
+        b.refresh_from_db()
+        assert (a.stock, b.stock) == (1, 5)
+
+    def test_order_endpoint_reports_insufficient_stock(self, category):
+        from rest_framework.test import APIClient
+        product = make_product(category, stock=1)
+        user = make_cart('buyer', [(product, 3)])
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.post('/api/orders/', {})
+        assert response.status_code == 400
+        assert 'Insufficient stock' in response.data['error']
+
+
+@pytest.mark.django_db(transaction=True)
+def test_parallel_checkouts_never_oversell(category):
+    stock, buyers = 5, 12
+    product = make_product(category, stock=stock)
+    users = [make_cart(f'buyer{i}', [(product, 1)]) for i in range(buyers)]
+    # With row locks every buyer waits its turn; without them (SQLite) the
+    # backend refuses concurrent writers outright instead
+    row_locks = connection.features.has_select_for_update
+    refusals = (InsufficientStock,) if row_locks else (InsufficientStock, OperationalError)
+    outcomes = []
+    barrier = threading.Barrier(buyers)
+
+    def checkout(user):
+        try:
+            barrier.wait()
+            place_order(user)
+            outcomes.append('ok')
+        except refusals as e:
+            outcomes.append(type(e).__name__)
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=checkout, args=(u,)) for u in users]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    product.refresh_from_db()
+    sold = sum(OrderItem.objects.filter(product=product).values_list('quantity', flat=True))
+    # Anything outside `refusals` escaped its thread and is missing here
+    assert len(outcomes) == buyers
+    assert outcomes.count('ok') >= 1
+    assert outcomes.count('ok') == Order.objects.count() == sold
+    assert sold == stock if row_locks else sold <= stock
+    assert product.stock == stock - sold
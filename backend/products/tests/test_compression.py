@@ -0,0 +1,107 @@
+import gzip
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.test import AsyncClient
+from rest_framework.test import APIClient
+from rest_framework import status
+from ecommerce import compression
+from ecommerce.compression import brotli, choose_encoding, zstandard
+from products.models import Category, Product
+
+
+@pytest.fixture
+def catalog(db):
+    category = Category.objects.create(name='Electronics')
+    return [
+        Product.objects.create(
+            name=f'Product {i}', description='A long description ' * 20, price=10 + i, category=category
+        )
+        for i in range(20)
+    ]
+
+
+def decode(encoding, data):
+    if encoding == 'gzip':
+        return gzip.decompress(data)
+    if encoding == 'br':
+        return brotli.decompress(data)
+    return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+
+
+class TestNegotiation:
+    @pytest.mark.parametrize('header, expected', [
+        ('gzip, deflate, br, zstd', 'zstd'),
+        ('gzip;q=1.0, br;q=0.5', 'br'),
+        ('zstd;q=0, gzip', 'gzip'),
+        ('*', 'zstd'),
+        ('*;q=0, gzip', 'gzip'),
+        ('identity', None),
+        ('gzip;q=bogus', None),
+        ('', None),
+    ])
+    def test_choose_encoding(self, header, expected):
+        assert choose_encoding(header, ['zstd', 'br', 'gzip']) == expected
+
+
+@pytest.mark.django_db
+class TestCompressionMiddleware:
+    @pytest.mark.parametrize('encoding', [
+        'gzip',
+        pytest.param('br', marks=pytest.mark.skipif(brotli is None, reason='brotli not installed')),
+        pytest.param('zstd', marks=pytest.mark.skipif(zstandard is None, reason='zstandard not installed')),
+    ])
+    def test_large_json_is_compressed(self, catalog, encoding):
+        client = APIClient()
+        plain = client.get('/api/products/?limit=20')
+        response = client.get('/api/products/?limit=20', HTTP_ACCEPT_ENCODING=encoding)
+        assert response['Content-Encoding'] == encoding
+        assert 'Accept-Encoding' in response['Vary']
+        assert int(response['Content-Length']) == len(response.content) < len(plain.content) / 3
+        assert json.loads(decode(encoding, response.content)) == plain.json()
+        assert response['ETag'] == plain['ETag']
+
+    def test_small_or_unaccepted_responses_are_left_alone(self, catalog):
+        client = APIClient()
+        small = client.get(f'/api/categories/{catalog[0].category_id}/', HTTP_ACCEPT_ENCODING='gzip')
+        identity = client.get('/api/products/?limit=20')
+        assert not small.has_header('Content-Encoding')
+        assert not identity.has_header('Content-Encoding')
+        assert 'Accept-Encoding' in identity['Vary']
+
+    def test_not_modified_is_not_compressed(self, catalog):
+        client = APIClient()
+        etag = client.get('/api/products/?limit=20')['ETag']
+        response = client.get('/api/products/?limit=20', HTTP_IF_NONE_MATCH=etag, HTTP_ACCEPT_ENCODING='gzip')
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not response.has_header('Content-Encoding')
+
+    def test_export_stream_is_compressed(self, catalog):
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='partner', password='testpass123'))
+        plain = b''.join(client.get('/api/products/export/').streaming_content)
+        response = client.get('/api/products/export/', HTTP_ACCEPT_ENCODING='gzip')
+        assert response['Content-Encoding'] == 'gzip'
+        assert gzip.decompress(b''.join(response.streaming_content)) == plain
+
+    def test_only_api_paths(self, db):
+        response = APIClient().get('/admin/login/', HTTP_ACCEPT_ENCODING='gzip')
+        assert not response.has_header('Content-Encoding')
+
+    def test_encodings_can_be_restricted(self, catalog, settings):
+        settings.COMPRESSION_ENCODINGS = ['gzip']
+        response = APIClient().get('/api/products/?limit=20', HTTP_ACCEPT_ENCODING='br, zstd, gzip')
+        assert response['Content-Encoding'] == 'gzip'
+
+    def test_async_views_are_compressed(self, catalog):
+        response = async_to_sync(AsyncClient().get)('/api/async/products/?limit=20', headers={'Accept-Encoding': 'gzip'})
+        assert response['Content-Encoding'] == 'gzip'
+        assert len(json.loads(gzip.decompress(response.content))['items']) == 20
+
+
+def test_every_encoder_round_trips():
+    data = b'{"items": []}' * 200
+    for encoding in compression.ENCODERS:
+        assert decode(encoding, compression.compress(encoding, data)) == data
@@ -0,0 +1,109 @@
+import pytest
+from django.contrib.auth.models import User
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.test import APIClient
+from products import cache
+from products.cache import cache_stats, reset_stats
+from products.models import Category, Product, Review
+from products.tests.helpers import assert_max_queries
+
+
+@pytest.fixture
+def client():
+    reset_stats()
+    return APIClient()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Bumps and validators both read products.cache's clock
+    now = [1_000_000.5]
+    monkeypatch.setattr(cache.time, 'time', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def product(db):
+    category = Category.objects.create(name='Electronics')
+    return Product.objects.create(name='Laptop', description='x', price=999, category=category, stock=5)
+
+
+@pytest.mark.django_db
+class TestConditionalGet:
+    @pytest.mark.parametrize('path', ['/api/products/', '/api/categories/'])
+    def test_matching_etag_is_304_without_queries(self, client, product, path):
+        first = client.get(path)
+        assert first['Cache-Control'] == 'no-cache'
+        with assert_max_queries(0):
+            again = client.get(path, HTTP_IF_NONE_MATCH=first['ETag'])
+        assert again.status_code == status.HTTP_304_NOT_MODIFIED
+        assert again.content == b''
+        assert again['ETag'] == first['ETag']
+
+    def test_writes_change_the_etag(self, client, product):
+        first = client.get(f'/api/products/{product.id}/')
+        product.price = 899
+        product.save()
+        again = client.get(f'/api/products/{product.id}/', HTTP_IF_NONE_MATCH=first['ETag'])
+        assert again.status_code == status.HTTP_200_OK
+        assert again['ETag'] != first['ETag']
+        assert again.json()['price'] == '899.00'
+
+    def test_category_change_invalidates_product_detail(self, client, product):
+        first = client.get(f'/api/products/{product.id}/')
+        product.category.name = 'Computers'
+        product.category.save()
+        again = client.get(f'/api/products/{product.id}/', HTTP_IF_NONE_MATCH=first['ETag'])
+        assert again.status_code == status.HTTP_200_OK
+
+    def test_etag_depends_on_query_and_path(self, client, product):
+        etags = {
+            client.get(path)['ETag']
+            for path in ['/api/products/', '/api/products/?sort=price',
+                         f'/api/products/{product.id}/', f'/api/products/{product.id}/reviews/']
+        }
+        assert len(etags) == 4
+
+    def test_reviews_are_conditional(self, client, product):
+        first = client.get(f'/api/products/{product.id}/reviews/')
+        cached = client.get(f'/api/products/{product.id}/reviews/', HTTP_IF_NONE_MATCH=first['ETag'])
+        assert cached.status_code == status.HTTP_304_NOT_MODIFIED
+        user = User.objects.create_user(username='reader', password='testpass123')
+        Review.objects.create(user=user, product=product, rating=5, comment='Great')
+        fresh = client.get(f'/api/products/{product.id}/reviews/', HTTP_IF_NONE_MATCH=first['ETag'])
+        assert fresh.status_code == status.HTTP_200_OK
+        assert len(fresh.json()) == 1
+
+    def test_if_modified_since(self, clock, client, product):
+        clock[0] += 1
+        first = client.get('/api/categories/')
+        assert client.get(
+            '/api/categories/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified']
+        ).status_code == status.HTTP_304_NOT_MODIFIED
+        assert client.get(
+            '/api/categories/', HTTP_IF_MODIFIED_SINCE=http_date(0)
+        ).status_code == status.HTTP_200_OK
+        assert cache_stats()['categories:not_modified'] == 1
+
+    def test_two_bumps_in_one_second_are_not_confused(self, clock, client, product):
+        # The fixture's bump and these reads share a second, so a date cannot
+        # tell them apart: no Last-Modified, and If-Modified-Since is ignored
+        same_second = http_date(1_000_000)
+        first = client.get('/api/categories/', HTTP_IF_MODIFIED_SINCE=same_second)
+        assert first.status_code == status.HTTP_200_OK
+        assert not first.has_header('Last-Modified')
+        clock[0] = 1_000_000.8
+        Category.objects.create(name='Books')
+        again = client.get('/api/categories/', HTTP_IF_MODIFIED_SINCE=same_second)
+        assert again.status_code == status.HTTP_200_OK
+        assert len(again.json()['results']) == 2
+        clock[0] = 1_000_001.0
+        settled = client.get('/api/categories/', HTTP_IF_NONE_MATCH=first['ETag'])
+        assert settled.status_code == status.HTTP_200_OK
+        assert settled['Last-Modified'] == same_second
+
+    def test_errors_carry_no_validators(self, client, db):
+        response = client.get('/api/products/999999/')
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert not response.has_header('ETag')
@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework import status
+from products.models import Category, Product
+
+
+@pytest.fixture
+def client(db):
+    user = User.objects.create_user(username='partner', password='testpass123')
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def catalog(db):
+    electronics = Category.objects.create(name='Electronics')
+    books = Category.objects.create(name='Books')
+    return [
+        Product.objects.create(name='Laptop', description='Fast, "thin"', price=999.99, category=electronics, stock=3),
+        Product.objects.create(name='Phone', description='x', price=499, category=electronics, is_active=False),
+        Product.objects.create(name='Novel', description='y', price=12.5, category=books),
+    ]
+
+
+def body(response):
+    return b''.join(response.streaming_content).decode()
+
+
+@pytest.mark.django_db
+class TestProductExport:
+    def test_csv_export_streams_all_products(self, client, catalog):
+        response = client.get('/api/products/export/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'] == 'text/csv'
+        rows = list(csv.DictReader(io.StringIO(body(response))))
+        assert [r['name'] for r in rows] == ['Laptop', 'Phone', 'Novel']
+        assert rows[0]['description'] == 'Fast, "thin"'
+        assert rows[0]['category'] == 'Electronics'
+        assert rows[0]['price'] == '999.99'
+
+    def test_ndjson_export_with_filters(self, client, catalog):
+        response = client.get('/api/products/export/?fmt=ndjson&category=Electronics&is_active=true')
+        lines = [json.loads(line) for line in body(response).splitlines()]
+        assert [line['name'] for line in lines] == ['Laptop']
+        assert lines[0]['price'] == '999.99'
+
+    def test_updated_since_ships_only_changed_rows(self, client, catalog):
+        cutoff = timezone.now() + timedelta(seconds=1)
+        Product.objects.filter(pk=catalog[2].pk).update(updated_at=cutoff + timedelta(minutes=1))
+        response = client.get('/api/products/export/', {'fmt': 'ndjson', 'updated_since': cutoff.isoformat()})
+        assert [json.loads(l)['name'] for l in body(response).splitlines()] == ['Novel']
+
+    def test_invalid_parameters_return_400(self, client, catalog):
+        assert client.get('/api/products/export/?fmt=xml').status_code == status.HTTP_400_BAD_REQUEST
+        assert client.get('/api/products/export/?updated_since=yesterday').status_code == status.HTTP_400_BAD_REQUEST
+        assert client.get('/api/products/export/?updated_since=2024-02-30').status_code == status.HTTP_400_BAD_REQUEST
+        assert client.get('/api/products/export/?updated_since=2024-01-01T25:00').status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_requires_authentication(self, catalog):
+        assert APIClient().get('/api/products/export/').status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+def test_export_command_writes_file(tmp_path, catalog):
+    target = tmp_path / 'feed.ndjson'
+    call_command('export_products', '--format', 'ndjson', '--output', str(target), '--active', 'true')
+    names = [json.loads(line)['name'] for line in target.read_text().splitlines()]
+    assert names == ['Laptop', 'Novel']
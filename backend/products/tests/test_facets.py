@@ -0,0 +1,78 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from products.facets import compute_facets
+from products.models import Category, Product
+
+
+@pytest.fixture
+def catalog(db):
+    phones = Category.objects.create(name='Phones')
+    audio = Category.objects.create(name='Audio')
+    rows = [
+        ('Budget Phone', phones, 'Acme', 20, 3.2),
+        ('Mid Phone', phones, 'Acme', 240, 4.1),
+        ('Flagship Phone', phones, 'Zenith', 1200, 4.8),
+        ('Earbuds', audio, 'Zenith', 45, 4.5),
+        ('Speaker', audio, '', 99, 0.0),
+    ]
+    return [
+        Product.objects.create(name=name, description='x', category=category, brand=brand, price=price, rating=rating)
+        for name, category, brand, price, rating in rows
+    ]
+
+
+def facets(client, query=''):
+    return client.get(f'/api/products/facets/{query}')
+
+
+@pytest.mark.django_db
+class TestFacets:
+    def test_counts_for_whole_catalog(self, catalog):
+        response = facets(APIClient())
+        assert response.status_code == status.HTTP_200_OK
+        data = response.data
+        assert data['total'] == 5
+        assert [(c['name'], c['count']) for c in data['category']] == [('Phones', 3), ('Audio', 2)]
+        assert data['brand'] == [{'value': 'Acme', 'count': 2}, {'value': 'Zenith', 'count': 2}]
+        assert data['price']['min'] == '20.00'
+        assert data['price']['max'] == '1200.00'
+        assert [b['count'] for b in data['price']['buckets']] == [1, 1, 1, 1, 0, 0, 1]
+        assert data['price']['buckets'][-1] == {'min': 1000, 'max': None, 'count': 1}
+        assert data['rating'] == [
+            {'min': 4, 'count': 3}, {'min': 3, 'count': 4}, {'min': 2, 'count': 4}, {'min': 1, 'count': 4},
+        ]
+
+    def test_uses_listing_filters(self, catalog):
+        client = APIClient()
+        query = f'?category={catalog[0].category_id}&brand=Acme'
+        data = facets(client, query).data
+        assert data['total'] == 2
+        assert data['category'] == [{'id': catalog[0].category_id, 'name': 'Phones', 'count': 2}]
+        listed = client.get(f'/api/products/{query}').data
+        assert data['total'] == listed['total']
+
+    def test_search_query(self, catalog):
+        data = facets(APIClient(), '?q=phone&sort=relevance').data
+        assert data['total'] == 3
+        assert data['brand'] == [{'value': 'Acme', 'count': 2}, {'value': 'Zenith', 'count': 1}]
+
+    def test_fixed_number_of_queries(self, catalog):
+        with CaptureQueriesContext(connection) as ctx:
+            compute_facets(Product.objects.all())
+        assert len(ctx.captured_queries) == 3
+
+    def test_cached_per_filter_signature(self, catalog):
+        client = APIClient()
+        first = facets(client, '?brand=Acme&page=1')
+        with CaptureQueriesContext(connection) as ctx:
+            again = facets(client, '?page=3&limit=50&brand=Acme')
+        assert again.data == first.data
+        assert len(ctx.captured_queries) == 0
+        # Catalogue writes invalidate the cached counts
+        Product.objects.create(
+            name='Acme Tablet', description='x', category=catalog[0].category, brand='Acme', price=300
+        )
+        assert facets(client, '?brand=Acme').data['total'] == 3
@@ -0,0 +1,125 @@
+import io
+import json
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from rest_framework import status
+from products.imports import import_products, read_rows
+from products.models import Category, Product
+from products.tests.helpers import assert_max_queries
+
+
+CSV_FEED = """sku,name,description,price,category,brand,stock,is_active
+SKU-1,Laptop,Fast laptop,999.99,Electronics,TechBrand,5,true
+SKU-2,Novel,A book,12.50,books,,10,true
+SKU-3,Bad price,x,abc,Electronics,,1,true
+SKU-4,Mystery,x,5,Unknown,,1,true
+"""
+
+
+@pytest.fixture
+def categories(db):
+    return {
+        'electronics': Category.objects.create(name='Electronics'),
+        'books': Category.objects.create(name='Books'),
+    }
+
+
+@pytest.fixture
+def staff_client(db):
+    user = User.objects.create_user(username='admin', password='testpass123', is_staff=True)
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.mark.django_db
+class TestImportProducts:
+    def test_csv_import_creates_products_and_reports_errors(self, categories):
+        report = import_products(read_rows(io.StringIO(CSV_FEED), 'csv'))
+        assert report.processed == 4
+        assert report.upserted == 2
+        assert [e['line'] for e in report.errors] == [4, 5]
+        assert 'price' in report.errors[0]['errors']
+        assert 'category' in report.errors[1]['errors']
+        novel = Product.objects.get(sku='SKU-2')
+        assert novel.category == categories['books']
+
+    def test_reimport_updates_in_place(self, categories):
+        import_products(read_rows(io.StringIO(CSV_FEED), 'csv'))
+        feed = '{"sku": "SKU-1", "name": "Laptop Pro", "price": "1299", "category": "Electronics", "stock": 2}\n'
+        report = import_products(read_rows(io.StringIO(feed), 'ndjson'))
+        assert report.upserted == 1
+        assert Product.objects.filter(sku='SKU-1').count() == 1
+        laptop = Product.objects.get(sku='SKU-1')
+        assert (laptop.name, laptop.stock) == ('Laptop Pro', 2)
+
+    def test_duplicate_sku_in_one_chunk_keeps_last_row(self, categories):
+        rows = [
+            (1, {'sku': 'A', 'name': 'First', 'price': 1, 'category': 'Books'}),
+            (2, {'sku': 'A', 'name': 'Second', 'price': 2, 'category': 'Books'}),
+        ]
+        import_products(rows)
+        assert Product.objects.get(sku='A').name == 'Second'
+
+    def test_queries_per_chunk_are_constant(self, categories):
+        rows = [
+            (i, {'sku': f'S{i}', 'name': f'P{i}', 'price': i, 'category': 'Books'})
+            for i in range(1, 201)
+        ]
+        # category map + (savepoint, upsert, release) per chunk + category stats (select, update)
+        with assert_max_queries(1 + 3 * 4 + 2):
+            report = import_products(rows, chunk_size=50)
+        assert report.upserted == 200
+
+    def test_invalid_ndjson_line_is_reported(self, categories):
+        feed = '{"sku": "A", "name": "ok", "price": 1, "category": "Books"}\nnot json\n'
+        report = import_products(read_rows(io.StringIO(feed), 'ndjson'))
+        assert report.upserted == 1
+        assert report.errors[0]['line'] == 2
+
+    def test_non_object_rows_are_reported(self, categories):
+        feed = '5\n["A"]\n{"sku": "A", "name": "ok", "price": 1, "category": "Books"}\n'
+        report = import_products(read_rows(io.StringIO(feed), 'ndjson'))
+        assert report.upserted == 1
+        assert [e['line'] for e in report.errors] == [1, 2]
+
+
+@pytest.mark.django_db
+class TestImportEndpoint:
+    def test_file_upload(self, staff_client, categories):
+        upload = SimpleUploadedFile('feed.csv', CSV_FEED.encode(), content_type='text/csv')
+        response = staff_client.post('/api/products/import/', {'file': upload}, format='multipart')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['upserted'] == 2
+        assert response.data['error_count'] == 2
+
+    def test_json_rows(self, staff_client, categories):
+        rows = [{'sku': 'J1', 'name': 'Json', 'price': '3.00', 'category': 'Books'}]
+        response = staff_client.post('/api/products/import/', rows, format='json')
+        assert response.data['upserted'] == 1
+        assert staff_client.get('/api/products/?q=json').data['total'] == 1
+
+    def test_undecodable_upload_is_rejected(self, staff_client, categories):
+        upload = SimpleUploadedFile('feed.csv', 'sku,name\nA,caf\xe9\n'.encode('latin-1'), content_type='text/csv')
+        response = staff_client.post('/api/products/import/', {'file': upload}, format='multipart')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'UTF-8' in response.data['error']
+
+    def test_staff_only(self, categories):
+        user = User.objects.create_user(username='shopper', password='testpass123')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.post('/api/products/import/', [], format='json')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_import_command(tmp_path, categories):
+    path = tmp_path / 'feed.ndjson'
+    path.write_text('\n'.join(json.dumps({'sku': f'C{i}', 'name': f'P{i}', 'price': 1, 'category': 'Books'}) for i in range(3)))
+    call_command('import_products', str(path))
+    assert Product.objects.filter(sku__startswith='C').count() == 3
@@ -0,0 +1,76 @@
+import io
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from rest_framework.test import APIClient
+from rest_framework import status
+from products.management.commands.benchmark_listings import is_full_scan
+from products.models import Address
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username='testuser', password='testpass123')
+
+
+def make_address(user, **kwargs):
+    return Address.objects.create(
+        user=user, street='1 Main St', city='Springfield', state='IL',
+        country='USA', postal_code='62701', **kwargs
+    )
+
+
+@pytest.mark.django_db
+class TestDefaultAddressConstraint:
+    def test_second_default_is_rejected(self, user):
+        make_address(user, is_default=True)
+        with pytest.raises(IntegrityError), transaction.atomic():
+            make_address(user, is_default=True)
+
+    def test_other_users_and_non_defaults_are_unaffected(self, user):
+        other = User.objects.create_user(username='other', password='testpass123')
+        make_address(user, is_default=True)
+        make_address(user)
+        make_address(user)
+        make_address(other, is_default=True)
+        assert Address.objects.filter(is_default=True).count() == 2
+
+    def test_set_default_moves_the_default(self, user):
+        first = make_address(user, is_default=True)
+        second = make_address(user)
+        client = APIClient()
+        client.force_authenticate(user=user)
+        response = client.post(f'/api/addresses/{second.id}/set_default/')
+        assert response.status_code == status.HTTP_200_OK
+        first.refresh_from_db()
+        second.refresh_from_db()
+        assert not first.is_default
+        assert second.is_default
+
+
+@pytest.mark.django_db
+class TestBenchmarkListings:
+    def test_seeds_and_reports_every_listing_query(self):
+        out = io.StringIO()
+        call_command(
+            'benchmark_listings', products=200, categories=3, users=2,
+            batch_size=50, repeat=1, stdout=out, stderr=io.StringIO(),
+        )
+        output = out.getvalue()
+        assert 'products: active category by price' in output
+        assert 'reviews: product' in output
+        assert 'All listing queries within budget' in output
+
+    def test_flush_removes_seeded_data(self):
+        call_command('benchmark_listings', products=20, categories=1, users=1, repeat=1,
+                     no_plans=True, stdout=io.StringIO(), stderr=io.StringIO())
+        call_command('benchmark_listings', flush=True, stdout=io.StringIO())
+        assert not User.objects.filter(username__startswith='bench-').exists()
+
+    def test_full_scan_detection(self):
+        assert is_full_scan('Limit\n  ->  Seq Scan on products_product', 'postgresql')
+        assert not is_full_scan('Limit\n  ->  Index Scan using product_price_idx', 'postgresql')
+        assert is_full_scan('2 0 0 SCAN products_product', 'sqlite')
+        assert not is_full_scan('2 0 0 SCAN products_product USING INDEX product_price_idx', 'sqlite')
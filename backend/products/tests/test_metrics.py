@@ -0,0 +1,102 @@
+import logging
+
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from ecommerce.metrics import registry
+from products.models import Category, Product
+
+
+@pytest.fixture
+def api_client():
+    registry.reset()
+    return APIClient()
+
+
+@pytest.fixture
+def product(db):
+    category = Category.objects.create(name='Electronics')
+    return Product.objects.create(
+        name='Test Product', description='A test product',
+        price=99.99, category=category, stock=10
+    )
+
+
+@pytest.mark.django_db
+class TestMetricsMiddleware:
+    def test_records_per_route_counts_and_queries(self, api_client, product):
+        api_client.get('/api/products/')
+        api_client.get(f'/api/products/{product.id}/')
+        api_client.get('/api/products/')  # cached
+
+        snapshot = registry.snapshot()
+        assert snapshot['requests'][('product-list', 'GET', '200')] == 2
+        assert snapshot['requests'][('product-detail', 'GET', '200')] == 1
+        count, queries = snapshot['http_db_queries'][('product-list', 'GET')]
+        assert count == 2
+        assert queries >= 1
+        serializer_count, serializer_time = snapshot['http_serializer_duration_seconds'][('product-detail', 'GET')]
+        assert serializer_count == 1
+        assert serializer_time > 0
+        # many=True goes through the timed list serializer
+        assert snapshot['http_serializer_duration_seconds'][('product-list', 'GET')][1] > 0
+
+    @pytest.mark.parametrize('path, route', [
+        ('/api/products/?view=card', 'product-list'),
+        ('/api/async/products/?view=card', 'async-product-list'),
+        ('/api/async/products/', 'async-product-list'),
+    ])
+    def test_encoder_and_async_lists_record_serializer_time(self, api_client, product, path, route):
+        api_client.get(path)
+        count, seconds = registry.snapshot()['http_serializer_duration_seconds'][(route, 'GET')]
+        assert count == 1
+        assert seconds > 0
+
+    def test_unresolved_paths_share_one_label(self, api_client, db):
+        api_client.get('/api/does-not-exist/')
+        api_client.get('/api/also-missing/')
+        assert registry.snapshot()['requests'][('unmatched', 'GET', '404')] == 2
+
+    def test_sampling_skips_detailed_timings(self, api_client, product, settings):
+        settings.METRICS_SAMPLE_RATE = 0.0
+        api_client.get('/api/products/')
+        snapshot = registry.snapshot()
+        assert snapshot['requests'][('product-list', 'GET', '200')] == 1
+        assert ('product-list', 'GET') in snapshot['http_request_duration_seconds']
+        assert snapshot['http_db_queries'] == {}
+
+    def test_slow_queries_are_logged(self, api_client, product, settings, caplog):
+        settings.SLOW_QUERY_MS = 0.000001
+        with caplog.at_level(logging.WARNING, logger='ecommerce.metrics'):
+            api_client.get(f'/api/products/{product.id}/')
+        assert any('Slow query' in message for message in caplog.messages)
+
+
+@pytest.mark.django_db
+class TestMetricsEndpoint:
+    def test_prometheus_text_format(self, api_client, product):
+        api_client.get('/api/products/')
+        api_client.force_login(User.objects.create_user(username='ops', password='testpass123', is_staff=True))
+        response = api_client.get('/api/_metrics')
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'].startswith('text/plain')
+        body = response.content.decode()
+        assert 'http_requests_total{route="product-list",method="GET",status="200"} 1' in body
+        assert 'http_db_queries_bucket{route="product-list",method="GET",le="+Inf"} 1' in body
+        assert '# TYPE http_request_duration_seconds histogram' in body
+        # scrapes are not themselves recorded
+        assert 'route="metrics"' not in body
+
+    def test_closed_to_anonymous_and_non_staff_by_default(self, api_client, settings):
+        settings.METRICS_TOKEN = ''
+        assert api_client.get('/api/_metrics').status_code == status.HTTP_403_FORBIDDEN
+        api_client.force_login(User.objects.create_user(username='shopper', password='testpass123'))
+        assert api_client.get('/api/_metrics').status_code == status.HTTP_403_FORBIDDEN
+        assert api_client.get('/api/_metrics', HTTP_X_METRICS_TOKEN='').status_code == status.HTTP_403_FORBIDDEN
+
+    def test_token_is_required_when_configured(self, api_client, settings):
+        settings.METRICS_TOKEN = 'secret'
+        assert api_client.get('/api/_metrics').status_code == status.HTTP_403_FORBIDDEN
+        response = api_client.get('/api/_metrics', HTTP_X_METRICS_TOKEN='secret')
+        assert response.status_code == status.HTTP_200_OK
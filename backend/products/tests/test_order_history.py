@@ -0,0 +1,93 @@
+import pytest
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APIClient
+from products.models import Category, Order, OrderItem, Product
+from products.tests.helpers import assert_max_queries
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username='buyer', password='testpass123')
+
+
+@pytest.fixture
+def client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def products(db):
+    category = Category.objects.create(name='Electronics')
+    return [
+        Product.objects.create(
+            name=f'P{i}', description='x', price=10 * i, category=category, image=f'https://img.example/{i}.jpg'
+        )
+        for i in range(1, 4)
+    ]
+
+
+def make_order(user, lines, status='pending'):
+    order = Order.objects.create(user=user, total=sum(p.price * q for p, q in lines), status=status)
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, product=product, quantity=quantity, price=product.price)
+        for product, quantity in lines
+    ])
+    return order
+
+
+@pytest.mark.django_db
+class TestOrderHistory:
+    def test_list_returns_summaries(self, client, user, products):
+        order = make_order(user, [(products[1], 2), (products[0], 3)], status='shipped')
+        make_order(User.objects.create_user(username='other', password='testpass123'), [(products[2], 1)])
+
+        response = client.get('/api/orders/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['next'] is None
+        assert response.data['items'] == [{
+            'id': order.id,
+            'status': 'shipped',
+            'total': '70.00',
+            'items_count': 5,
+            'thumbnail': 'https://img.example/2.jpg',
+            'created_at': response.data['items'][0]['created_at'],
+        }]
+
+    def test_order_without_lines(self, client, user):
+        Order.objects.create(user=user, total=0)
+        row = client.get('/api/orders/').data['items'][0]
+        assert row['items_count'] == 0
+        assert row['thumbnail'] is None
+
+    def test_one_query_whatever_the_order_size(self, client, user, products):
+        for _ in range(5):
+            make_order(user, [(product, 2) for product in products])
+        with assert_max_queries(1):
+            response = client.get('/api/orders/?limit=3')
+        assert len(response.data['items']) == 3
+
+    def test_cursor_walks_history_newest_first(self, client, user, products):
+        orders = [make_order(user, [(products[0], 1)]) for _ in range(5)]
+        # Equal timestamps must still page without gaps or repeats
+        Order.objects.filter(pk__in=[o.pk for o in orders[1:3]]).update(created_at=orders[1].created_at)
+
+        seen, url = [], '/api/orders/?limit=2'
+        while url:
+            data = client.get(url).data
+            seen += [row['id'] for row in data['items']]
+            url = data['next'] and f"/api/orders/?limit=2&cursor={data['next']}"
+        expected = Order.objects.filter(user=user).order_by('-created_at', '-id').values_list('id', flat=True)
+        assert seen == list(expected)
+
+    def test_invalid_cursor(self, client, user):
+        response = client.get('/api/orders/?cursor=garbage')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'error' in response.data
+
+    def test_retrieve_keeps_nested_items(self, client, user, products):
+        order = make_order(user, [(products[0], 1)])
+        data = client.get(f'/api/orders/{order.id}/').data
+        assert data['items'][0]['product']['name'] == 'P1'
@@ -0,0 +1,155 @@
+import pytest
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.test import APIClient
+from products.models import Category, Order, OrderEvent, OrderItem, Product
+from products.order_status import InvalidTransition, sources_for, transition_orders
+from products.tests.helpers import assert_max_queries
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username='buyer', password='testpass123')
+
+
+@pytest.fixture
+def staff(db):
+    return User.objects.create_user(username='warehouse', password='testpass123', is_staff=True)
+
+
+@pytest.fixture
+def product(db):
+    category = Category.objects.create(name='Electronics')
+    return Product.objects.create(name='Laptop', description='x', price=100, stock=10, category=category)
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+def make_orders(user, count, status='pending', product=None, quantity=1):
+    orders = Order.objects.bulk_create([Order(user=user, total=100, status=status) for _ in range(count)])
+    if product:
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, quantity=quantity, price=product.price) for order in orders
+        ])
+    return orders
+
+
+def statuses(orders):
+    return list(Order.objects.filter(pk__in=[o.pk for o in orders]).order_by('pk').values_list('status', flat=True))
+
+
+class TestTransitionTable:
+    def test_sources(self):
+        assert sources_for('delivered') == ['shipped']
+        assert sources_for('processing') == ['pending']
+        assert sources_for('pending') == []
+
+    def test_unknown_status(self):
+        with pytest.raises(InvalidTransition):
+            sources_for('processed')
+
+
+@pytest.mark.django_db
+class TestTransitionOrders:
+    def test_moves_only_allowed_orders_and_logs_events(self, user, staff):
+        pending = make_orders(user, 3)
+        processing = make_orders(user, 2, status='processing')
+        delivered = make_orders(user, 1, status='delivered')
+        ids = [o.pk for o in pending + processing + delivered] + [999999]
+
+        moved = transition_orders(ids, 'shipped', actor=staff, note='truck 7')
+
+        assert moved == {**{o.pk: 'pending' for o in pending}, **{o.pk: 'processing' for o in processing}}
+        assert statuses(pending + processing) == ['shipped'] * 5
+        assert statuses(delivered) == ['delivered']
+        events = OrderEvent.objects.filter(to_status='shipped')
+        assert events.count() == 5
+        assert set(events.values_list('actor', 'source', 'note')) == {(staff.pk, 'api', 'truck 7')}
+
+    def test_statement_count_does_not_grow_with_orders(self, user):
+        orders = make_orders(user, 40) + make_orders(user, 40, status='processing')
+        # select + one update per source status + events, plus savepoints
+        with assert_max_queries(6):
+            moved = transition_orders([o.pk for o in orders], 'shipped')
+        assert len(moved) == 80
+
+    def test_batches(self, user):
+        orders = make_orders(user, 5)
+        assert len(transition_orders([o.pk for o in orders], 'processing', batch_size=2)) == 5
+        assert OrderEvent.objects.count() == 5
+
+    def test_cancel_restocks(self, user, product):
+        orders = make_orders(user, 3, product=product, quantity=2)
+        make_orders(user, 1, status='delivered', product=product, quantity=2)
+        transition_orders([o.pk for o in Order.objects.all()], 'cancelled')
+        product.refresh_from_db()
+        assert product.stock == 16
+        assert statuses(orders) == ['cancelled'] * 3
+
+
+@pytest.mark.django_db
+class TestOrderEndpoints:
+    def test_update_status_rejects_invalid_transition(self, user, staff):
+        order = make_orders(user, 1)[0]
+        client = client_for(staff)
+        response = client.patch(f'/api/orders/{order.id}/update_status/', {'status': 'delivered'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = client.patch(f'/api/orders/{order.id}/update_status/', {'status': 'processed'})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert statuses([order]) == ['pending']
+
+    def test_update_status_logs_actor(self, user, staff):
+        order = make_orders(user, 1)[0]
+        response = client_for(staff).patch(f'/api/orders/{order.id}/update_status/', {'status': 'processing'})
+        assert response.data['status'] == 'processing'
+        event = OrderEvent.objects.get(order=order)
+        assert (event.from_status, event.to_status, event.actor_id) == ('pending', 'processing', staff.pk)
+
+    def test_owners_cannot_update_status(self, user):
+        order = make_orders(user, 1)[0]
+        response = client_for(user).patch(f'/api/orders/{order.id}/update_status/', {'status': 'shipped'})
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert statuses([order]) == ['pending']
+
+    def test_plain_patch_cannot_change_status(self, user):
+        order = make_orders(user, 1)[0]
+        client_for(user).patch(f'/api/orders/{order.id}/', {'status': 'delivered'}, format='json')
+        assert statuses([order]) == ['pending']
+
+    def test_bulk_transition_is_staff_only(self, user):
+        order = make_orders(user, 1)[0]
+        response = client_for(user).post('/api/orders/transition/', {'ids': [order.id], 'status': 'shipped'}, format='json')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_bulk_transition(self, user, staff):
+        orders = make_orders(user, 3)
+        done = make_orders(user, 1, status='cancelled')[0]
+        ids = [o.pk for o in orders] + [done.pk]
+        response = client_for(staff).post('/api/orders/transition/', {'ids': ids, 'status': 'shipped'}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {'status': 'shipped', 'updated': 3, 'skipped': [done.pk]}
+
+    def test_bulk_transition_validates_body(self, staff):
+        client = client_for(staff)
+        response = client.post('/api/orders/transition/', {'ids': [], 'status': 'shipped'}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = client.post('/api/orders/transition/', {'ids': [1], 'status': 'processed'}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_admin_action(user, product):
+    admin_user = User.objects.create_superuser(username='admin', password='testpass123')
+    orders = make_orders(user, 2, status='processing')
+    client = APIClient()
+    client.force_login(admin_user)
+    response = client.post('/admin/products/order/', {
+        'action': 'mark_shipped', '_selected_action': [o.pk for o in orders],
+    })
+    assert response.status_code == 302
+    assert statuses(orders) == ['shipped', 'shipped']
+    assert OrderEvent.objects.filter(source='admin', actor=admin_user).count() == 2
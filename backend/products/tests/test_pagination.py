@@ -0,0 +1,83 @@
+import pytest
+from rest_framework.test import APIClient
+from rest_framework import status
+from products.models import Category, Product
+from products.pagination import KeysetPaginator, InvalidCursor, encode_cursor, decode_cursor
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def products(db):
+    category = Category.objects.create(name='Electronics')
+    return [
+        Product.objects.create(
+            name=f'Product {i}',
+            description='A test product',
+            price=10 + (i % 5),
+            category=category,
+            stock=10
+        )
+        for i in range(25)
+    ]
+
+
+def _walk(client, url):
+    seen = []
+    response = client.get(url)
+    while True:
+        assert response.status_code == status.HTTP_200_OK
+        seen.extend(item['id'] for item in response.data['items'])
+        if not response.data['next']:
+            return seen, response
+        response = client.get(f"{url}&cursor={response.data['next']}")
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    def test_cursor_walk_returns_every_product_once(self, api_client, products):
+        seen, last = _walk(api_client, '/api/products/?pagination=cursor&limit=10')
+        assert len(seen) == 25
+        assert len(set(seen)) == 25
+        assert 'total' not in last.data
+
+    def test_cursor_walk_by_price_is_ordered(self, api_client, products):
+        seen, _ = _walk(api_client, '/api/products/?pagination=cursor&sort=price&limit=7')
+        by_id = {p.id: p for p in products}
+        keys = [(by_id[pk].price, pk) for pk in seen]
+        assert keys == sorted(keys)
+        assert len(seen) == 25
+
+    def test_prev_cursor_returns_previous_page(self, api_client, products):
+        first = api_client.get('/api/products/?pagination=cursor&limit=10')
+        assert first.data['prev'] is None
+        second = api_client.get(f"/api/products/?pagination=cursor&limit=10&cursor={first.data['next']}")
+        back = api_client.get(f"/api/products/?pagination=cursor&limit=10&cursor={second.data['prev']}")
+        assert [i['id'] for i in back.data['items']] == [i['id'] for i in first.data['items']]
+
+    def test_cursor_total_is_opt_in(self, api_client, products):
+        response = api_client.get('/api/products/?pagination=cursor&total=exact')
+        assert response.data['total'] == 25
+
+    def test_invalid_cursor_returns_400(self, api_client, products):
+        response = api_client.get('/api/products/?cursor=not-a-cursor')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'error' in response.data
+
+    def test_offset_mode_can_skip_total(self, api_client, products):
+        response = api_client.get('/api/products/?page=2&limit=10&total=none')
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['items']) == 10
+        assert 'total' not in response.data
+
+    def test_cursor_is_bound_to_sort(self):
+        token = encode_cursor('price', 10, 1, 'next')
+        with pytest.raises(InvalidCursor):
+            decode_cursor(token, '-created_at')
+
+    def test_unsupported_sort_rejected(self):
+        with pytest.raises(InvalidCursor):
+            KeysetPaginator(sort='stock')
@@ -0,0 +1,107 @@
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from rest_framework import status
+from products.models import (
+    Category, Product, Address, Cart, CartItem, Order, OrderItem, Review
+)
+from products.tests.helpers import assert_max_queries
+
+
+ROWS = 12
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username='testuser', email='test@example.com', password='testpass123')
+
+
+@pytest.fixture
+def authenticated_client(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.fixture
+def products(db):
+    categories = [Category.objects.create(name=f'Category {i}') for i in range(3)]
+    return [
+        Product.objects.create(
+            name=f'Product {i}',
+            description='A test product',
+            price=10 + i,
+            category=categories[i % 3],
+            stock=100
+        )
+        for i in range(ROWS)
+    ]
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+    """Every list/retrieve path must cost the same regardless of row count."""
+
+    def test_product_list(self, authenticated_client, products):
+        # products + prefetched categories + count
+        with assert_max_queries(3):
+            response = authenticated_client.get(f'/api/products/?limit={ROWS}')
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data['items']) == ROWS
+
+    def test_product_retrieve(self, authenticated_client, products):
+        with assert_max_queries(2):
+            response = authenticated_client.get(f'/api/products/{products[0].id}/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['category']['products_count'] == 4
+
+    def test_category_list(self, authenticated_client, products):
+        # count + categories with annotated products_count
+        with assert_max_queries(2):
+            response = authenticated_client.get('/api/categories/')
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_cart_retrieve(self, authenticated_client, user, products):
+        cart = Cart.objects.create(user=user)
+        for product in products:
+            CartItem.objects.create(cart=cart, product=product, quantity=2)
+        # cart + items with products + categories
+        with assert_max_queries(3):
+            response = authenticated_client.get('/api/cart/me/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['items_count'] == ROWS * 2
+
+    def test_order_list_and_retrieve(self, authenticated_client, user, products):
+        address = Address.objects.create(
+            user=user, street='1 Main St', city='City',
+            state='State', country='Country', postal_code='12345'
+        )
+        for _ in range(3):
+            order = Order.objects.create(user=user, address=address, total=100)
+            for product in products:
+                OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price)
+        # count + orders(with user, address) + items(with products) + categories
+        with assert_max_queries(4):
+            response = authenticated_client.get('/api/orders/')
+        assert response.status_code == status.HTTP_200_OK
+        with assert_max_queries(3):
+            response = authenticated_client.get(f'/api/orders/{order.id}/')
+        assert len(response.data['items']) == ROWS
+
+    def test_review_list(self, authenticated_client, products):
+        for i, product in enumerate(products):
+            reviewer = User.objects.create_user(username=f'reviewer{i}', password='testpass123')
+            Review.objects.create(user=reviewer, product=product, rating=4)
+        # count + reviews with user and product
+        with assert_max_queries(2):
+            response = authenticated_client.get('/api/reviews/')
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_product_reviews_action(self, authenticated_client, products):
+        for i in range(5):
+            reviewer = User.objects.create_user(username=f'reviewer{i}', password='testpass123')
+            Review.objects.create(user=reviewer, product=products[0], rating=4)
+        with assert_max_queries(3):
+            response = authenticated_client.get(f'/api/products/{products[0].id}/reviews/')
+        assert response.status_code == status.HTTP_200_OK
+        assert len(response.data) == 5
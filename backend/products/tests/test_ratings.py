@@ -0,0 +1,123 @@
+import pytest
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from products.models import Category, Product, Review
+from products.ratings import apply_rating_delta, import_reviews, reconcile_ratings
+from products.tests.helpers import assert_max_queries
+
+
+@pytest.fixture
+def category(db):
+    return Category.objects.create(name='Electronics')
+
+
+@pytest.fixture
+def product(category):
+    return Product.objects.create(
+        name='Test Product', description='x', price=10, category=category, stock=10
+    )
+
+
+def make_users(n):
+    return [User.objects.create_user(username=f'user{i}', password='testpass123') for i in range(n)]
+
+
+def client_for(user):
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.mark.django_db
+class TestIncrementalRatings:
+    def test_create_update_delete_keep_counters_in_step(self, product):
+        alice, bob = make_users(2)
+        client_for(alice).post('/api/reviews/', {'product': product.id, 'rating': 5})
+        response = client_for(bob).post('/api/reviews/', {'product': product.id, 'rating': 2})
+        product.refresh_from_db()
+        assert (product.rating_sum, product.num_reviews, product.rating) == (7, 2, 3.5)
+
+        client_for(bob).patch(f"/api/reviews/{response.data['id']}/", {'rating': 4})
+        product.refresh_from_db()
+        assert (product.rating_sum, product.num_reviews, product.rating) == (9, 2, 4.5)
+
+        client_for(bob).delete(f"/api/reviews/{response.data['id']}/")
+        product.refresh_from_db()
+        assert (product.rating_sum, product.num_reviews, product.rating) == (5, 1, 5.0)
+
+    def test_moving_review_to_another_product(self, product, category):
+        other = Product.objects.create(name='Other', description='x', price=1, category=category)
+        user, = make_users(1)
+        response = client_for(user).post('/api/reviews/', {'product': product.id, 'rating': 4})
+        client_for(user).patch(f"/api/reviews/{response.data['id']}/", {'product': other.id})
+        product.refresh_from_db()
+        other.refresh_from_db()
+        assert (product.num_reviews, product.rating) == (0, 0.0)
+        assert (other.num_reviews, other.rating) == (1, 4.0)
+
+    def test_delta_is_a_single_update(self, product):
+        with assert_max_queries(1):
+            apply_rating_delta(product.id, 3, 1)
+        product.refresh_from_db()
+        assert product.rating == 3.0
+
+    def test_orm_writes_keep_counters_in_step(self, product):
+        alice, bob = make_users(2)
+        review = Review.objects.create(user=alice, product=product, rating=2)
+        Review.objects.create(user=bob, product=product, rating=5)
+        review.rating = 3
+        review.save()
+        product.refresh_from_db()
+        assert (product.rating_sum, product.num_reviews, product.rating) == (8, 2, 4.0)
+
+    def test_reconcile_fixes_drift(self, product):
+        users = make_users(3)
+        Review.objects.bulk_create([
+            Review(user=user, product=product, rating=rating)
+            for user, rating in zip(users, (5, 4, 4))
+        ])
+        assert reconcile_ratings() == 1
+        product.refresh_from_db()
+        assert (product.rating_sum, product.num_reviews, product.rating) == (13, 3, 4.3)
+        assert reconcile_ratings() == 0
+
+    def test_stale_product_save_keeps_review_deltas(self, product):
+        stale = Product.objects.get(pk=product.pk)
+        alice, = make_users(1)
+        Review.objects.create(user=alice, product=product, rating=4)
+        stale.name = 'Renamed'
+        stale.save()
+        product.refresh_from_db()
+        assert (product.name, product.rating_sum, product.num_reviews, product.rating) == ('Renamed', 4, 1, 4.0)
+
+    def test_reconcile_fixes_rating_next_to_correct_counters(self, product):
+        alice, = make_users(1)
+        Review.objects.create(user=alice, product=product, rating=4)
+        Product.objects.filter(pk=product.pk).update(rating=1.0)
+        assert reconcile_ratings([product.id]) == 1
+        product.refresh_from_db()
+        assert product.rating == 4.0
+
+    def test_reconcile_resets_products_without_reviews(self, product):
+        Product.objects.filter(pk=product.pk).update(rating_sum=9, num_reviews=2, rating=4.5)
+        assert reconcile_ratings([product.id]) == 1
+        product.refresh_from_db()
+        assert (product.rating_sum, product.num_reviews, product.rating) == (0, 0, 0.0)
+
+    def test_import_reviews_updates_ratings_in_bulk(self, category):
+        products = [
+            Product.objects.create(name=f'P{i}', description='x', price=1, category=category)
+            for i in range(10)
+        ]
+        users = make_users(3)
+        rows = [
+            {'user_id': u.id, 'product_id': p.id, 'rating': 1 + (i % 5)}
+            for i, (u, p) in enumerate((u, p) for u in users for p in products)
+        ]
+        # insert + drift scan + one UPDATE for all products
+        with assert_max_queries(5):
+            assert import_reviews(rows) == 30
+        for p in products:
+            p.refresh_from_db()
+            assert p.num_reviews == 3
+            assert p.rating_sum == sum(r['rating'] for r in rows if r['product_id'] == p.id)
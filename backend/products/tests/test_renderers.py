@@ -0,0 +1,116 @@
+import datetime
+import io
+import json
+import uuid
+from decimal import Decimal
+
+import pytest
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework import status
+from ecommerce import parsers, renderers
+from ecommerce.parsers import FastJSONParser
+from ecommerce.renderers import FastJSONRenderer
+from products.management.commands.benchmark_json import product_page
+from products.models import Category, Product
+
+
+SAMPLE = {
+    'price': Decimal('19.99'),
+    'created_at': datetime.datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+    'offset': datetime.datetime(2025, 1, 2, 3, 4, 5, tzinfo=datetime.timezone(datetime.timedelta(hours=2))),
+    'day': datetime.date(2025, 1, 2),
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'label': gettext_lazy('Cancel'),
+    'duration': datetime.timedelta(minutes=1),
+    'text': 'line separator ünïcode',
+    'counts': {1: 'one'},
+    'nested': [{'rating': 4.5, 'active': True, 'none': None}],
+}
+
+
+class TestFastJSONRenderer:
+    def test_output_matches_drf_renderer(self):
+        fast = FastJSONRenderer().render(SAMPLE)
+        assert json.loads(fast) == json.loads(JSONRenderer().render(SAMPLE))
+        assert b'"2025-01-02T03:04:05.678901Z"' in fast
+        assert b'\\u2028' in fast
+
+    def test_product_page_matches_drf_renderer(self):
+        data = product_page(12)
+        assert json.loads(FastJSONRenderer().render(data)) == json.loads(JSONRenderer().render(data))
+
+    def test_indent_uses_stdlib_path(self):
+        rendered = FastJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        assert rendered == b'{\n  "a": 1\n}'
+
+    def test_none_renders_empty(self):
+        assert FastJSONRenderer().render(None) == b''
+
+    def test_values_orjson_rejects_fall_back(self):
+        assert FastJSONRenderer().render({'big': 2 ** 70}) == b'{"big":1180591620717411303424}'
+
+    def test_works_without_orjson(self, monkeypatch):
+        monkeypatch.setattr(renderers, 'orjson', None)
+        monkeypatch.setattr(parsers, 'orjson', None)
+        assert json.loads(FastJSONRenderer().render(SAMPLE)) == json.loads(JSONRenderer().render(SAMPLE))
+        assert FastJSONParser().parse(io.BytesIO(b'{"a": [1, 2]}')) == {'a': [1, 2]}
+
+
+class TestFastJSONParser:
+    def test_parses_utf8(self):
+        assert FastJSONParser().parse(io.BytesIO('{"name": "Café"}'.encode())) == {'name': 'Café'}
+
+    def test_invalid_json_raises_parse_error(self):
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"a": '))
+
+    def test_nan_is_rejected(self):
+        with pytest.raises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"a": NaN}'))
+
+    def test_other_encodings_use_stdlib_path(self):
+        body = '{"name": "Café"}'.encode('latin-1')
+        assert FastJSONParser().parse(io.BytesIO(body), parser_context={'encoding': 'latin-1'}) == {'name': 'Café'}
+
+
+@pytest.fixture
+def authenticated_client(db):
+    user = User.objects.create_user(username='testuser', password='testpass123')
+    client = APIClient()
+    client.force_authenticate(user=user)
+    return client
+
+
+@pytest.mark.django_db
+class TestJSONOverHTTP:
+    def test_api_round_trip(self, authenticated_client):
+        category = Category.objects.create(name='Electronics')
+        response = authenticated_client.post(
+            '/api/products/',
+            data=json.dumps({'name': 'Laptop', 'description': 'Fast', 'price': '999.99',
+                             'category_id': category.id, 'stock': 3}),
+            content_type='application/json',
+        )
+        assert response.status_code == status.HTTP_201_CREATED
+        body = json.loads(response.content)
+        assert body['price'] == '999.99'
+        assert body['created_at'].endswith('Z')
+        assert Product.objects.get(pk=body['id']).name == 'Laptop'
+
+    def test_malformed_body_is_400(self, authenticated_client):
+        response = authenticated_client.post('/api/products/', data='{"name": ', content_type='application/json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'JSON parse error' in response.json()['detail']
+
+
+def test_benchmark_command_reports_each_size():
+    out = io.StringIO()
+    call_command('benchmark_json', sizes='12,100', repeat=2, stdout=out)
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 1 + 2 * 2
+    assert 'fast' in lines[2]
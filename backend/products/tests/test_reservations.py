@@ -0,0 +1,191 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+from products.models import Cart, CartItem, Category, Order, Product, StockHold
+from products.reservations import (
+    reconcile_reserved, release_holds, reserve_cart, sweep_expired_holds
+)
+from products.services import EmptyCart, InsufficientStock, place_order
+from products.tasks import sweep_expired_stock_holds
+
+
+@pytest.fixture
+def product(db):
+    category = Category.objects.create(name='Electronics')
+    return Product.objects.create(name='Console', description='x', price=100, category=category, stock=3)
+
+
+def make_buyer(username, *lines):
+    user = User.objects.create_user(username=username, password='testpass123')
+    cart = Cart.objects.create(user=user)
+    for product, quantity in lines:
+        CartItem.objects.create(cart=cart, product=product, quantity=quantity)
+    return user
+
+
+def counters(product):
+    product.refresh_from_db()
+    return product.stock, product.reserved
+
+
+@pytest.mark.django_db
+class TestReserveCart:
+    def test_hold_sets_units_aside(self, product):
+        holds, expires_at = reserve_cart(make_buyer('a', (product, 2)))
+        assert holds == {product.id: 2}
+        assert expires_at > timezone.now()
+        assert counters(product) == (3, 2)
+        with pytest.raises(InsufficientStock):
+            reserve_cart(make_buyer('b', (product, 2)))
+        assert counters(product) == (3, 2)
+
+    def test_re_reserving_resizes_the_hold(self, product):
+        buyer = make_buyer('a', (product, 1))
+        reserve_cart(buyer)
+        CartItem.objects.filter(cart__user=buyer).update(quantity=3)
+        reserve_cart(buyer)
+        assert counters(product) == (3, 3)
+        assert StockHold.objects.get(user=buyer).quantity == 3
+
+    def test_failure_leaves_other_holds_untouched(self, product):
+        other = Product.objects.create(name='Pad', description='x', price=5, category=product.category, stock=10)
+        reserve_cart(make_buyer('a', (product, 3)))
+        with pytest.raises(InsufficientStock) as excinfo:
+            reserve_cart(make_buyer('b', (other, 2), (product, 1)))
+        assert [p['name'] for p in excinfo.value.products] == ['Console']
+        assert counters(other) == (10, 0)
+
+    def test_empty_cart(self, product):
+        with pytest.raises(EmptyCart):
+            reserve_cart(make_buyer('a'))
+
+    def test_release(self, product):
+        buyer = make_buyer('a', (product, 2))
+        reserve_cart(buyer)
+        assert release_holds(buyer) == 1
+        assert counters(product) == (3, 0)
+
+
+@pytest.mark.django_db
+class TestCheckoutWithHolds:
+    def test_checkout_converts_holds_into_sale(self, product):
+        buyer = make_buyer('a', (product, 2))
+        reserve_cart(buyer)
+        place_order(buyer)
+        assert counters(product) == (1, 0)
+        assert not StockHold.objects.exists()
+
+    def test_units_held_by_others_are_not_for_sale(self, product):
+        reserve_cart(make_buyer('a', (product, 2)))
+        with pytest.raises(InsufficientStock):
+            place_order(make_buyer('b', (product, 2)))
+        place_order(make_buyer('c', (product, 1)))
+        assert counters(product) == (2, 2)
+
+    def test_short_held_only_row_is_named(self, product):
+        other = Product.objects.create(name='Pad', description='x', price=5, category=product.category, stock=1)
+        buyer = make_buyer('a', (product, 1), (other, 1))
+        reserve_cart(buyer)
+        CartItem.objects.filter(product=other).delete()
+        # Another hold on the pad that stock no longer covers
+        Product.objects.filter(pk=other.pk).update(stock=0, reserved=2)
+        with pytest.raises(InsufficientStock) as excinfo:
+            place_order(buyer)
+        assert [p['name'] for p in excinfo.value.products] == ['Pad']
+
+    def test_admin_save_keeps_reserved(self, product):
+        stale = Product.objects.get(pk=product.pk)
+        reserve_cart(make_buyer('a', (product, 2)))
+        stale.stock = 10
+        stale.save()
+        assert counters(product) == (10, 2)
+
+
+@pytest.mark.django_db
+class TestCartAvailability:
+    def test_product_payload_reports_available(self, product):
+        reserve_cart(make_buyer('a', (product, 2)))
+        data = APIClient().get(f'/api/products/{product.id}/').data
+        assert (data['stock'], data['available']) == (3, 1)
+
+    def test_cart_refuses_units_held_by_others(self, product):
+        reserve_cart(make_buyer('a', (product, 2)))
+        client = APIClient()
+        client.force_authenticate(user=make_buyer('b'))
+        response = client.post('/api/cart-items/', {'product_id': product.id, 'quantity': 2})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'Only 1 items available' in str(response.data)
+        response = client.post('/api/cart-items/batch/', {'items': [{'product_id': product.id, 'quantity': 2}]}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_own_hold_counts_as_available(self, product):
+        buyer = make_buyer('a', (product, 2))
+        reserve_cart(buyer)
+        client = APIClient()
+        client.force_authenticate(user=buyer)
+        response = client.post('/api/cart-items/batch/', {'items': [{'product_id': product.id, 'quantity': 3}]}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        line = CartItem.objects.get(cart__user=buyer)
+        assert client.patch(f'/api/cart-items/{line.id}/', {'quantity': 3}).status_code == status.HTTP_200_OK
+
+
+@pytest.mark.django_db
+class TestSweep:
+    def test_expired_holds_are_released_in_batches(self, product, settings):
+        settings.STOCK_HOLD_SECONDS = 0
+        for i in range(3):
+            reserve_cart(make_buyer(f'b{i}', (product, 1)))
+        assert sweep_expired_holds(now=timezone.now() + timedelta(seconds=1), batch_size=2) == 3
+        assert counters(product) == (3, 0)
+        assert not StockHold.objects.exists()
+
+    def test_live_holds_are_kept(self, product):
+        reserve_cart(make_buyer('a', (product, 1)))
+        assert sweep_expired_stock_holds.delay().get() == 0
+        assert counters(product) == (3, 1)
+
+    def test_reconcile_reserved(self, product):
+        reserve_cart(make_buyer('a', (product, 2)))
+        Product.objects.update(reserved=0)
+        assert reconcile_reserved() == 1
+        assert counters(product) == (3, 2)
+
+
+@pytest.mark.django_db
+class TestReserveEndpoint:
+    def test_reserve_checkout_flow(self, product):
+        buyer = make_buyer('a', (product, 2))
+        client = APIClient()
+        client.force_authenticate(user=buyer)
+        response = client.post('/api/cart/reserve/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['holds'] == [{'product_id': product.id, 'quantity': 2}]
+
+        rival = APIClient()
+        rival.force_authenticate(user=make_buyer('b', (product, 2)))
+        refused = rival.post('/api/cart/reserve/')
+        assert refused.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'Console' in refused.data['error']
+
+        assert client.post('/api/orders/', {}, format='json').status_code == status.HTTP_201_CREATED
+        assert counters(product) == (1, 0)
+        assert Order.objects.count() == 1
+
+    def test_release_and_clear(self, product):
+        buyer = make_buyer('a', (product, 2))
+        client = APIClient()
+        client.force_authenticate(user=buyer)
+        client.post('/api/cart/reserve/')
+        assert client.delete('/api/cart/reserve/').status_code == status.HTTP_204_NO_CONTENT
+        client.post('/api/cart/reserve/')
+        client.delete('/api/cart/clear/')
+        assert counters(product) == (3, 0)
+
+    def test_cart_cannot_be_created_by_post(self, product):
+        client = APIClient()
+        client.force_authenticate(user=make_buyer('a'))
+        assert client.post('/api/cart/', {}, format='json').status_code == status.HTTP_405_METHOD_NOT_ALLOWED
@@ -0,0 +1,74 @@
+import pytest
+from rest_framework.test import APIClient
+from rest_framework import status
+from products.models import Category, Product
+from products.search import InMemorySearchBackend, tokenize, reset_index
+
+
+@pytest.fixture
+def api_client():
+    return APIClient()
+
+
+@pytest.fixture
+def catalog(db):
+    reset_index()
+    category = Category.objects.create(name='Electronics')
+
+    def make(name, brand='', description='Plain item'):
+        return Product.objects.create(
+            name=name, brand=brand, description=description,
+            price=10, category=category, stock=5
+        )
+
+    return {
+        'name_hit': make('Laptop Stand'),
+        'brand_hit': make('Ergonomic Mouse', brand='Laptop Gear'),
+        'description_hit': make('USB Hub', description='Works with any laptop'),
+        'miss': make('Desk Lamp'),
+    }
+
+
+@pytest.mark.django_db
+class TestProductSearch:
+    def test_q_matches_name_brand_and_description(self, api_client, catalog):
+        response = api_client.get('/api/products/?q=laptop')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['total'] == 3
+
+    def test_relevance_ranks_name_over_brand_over_description(self, api_client, catalog):
+        response = api_client.get('/api/products/?q=laptop&sort=relevance')
+        ids = [item['id'] for item in response.data['items']]
+        assert ids == [
+            catalog['name_hit'].id,
+            catalog['brand_hit'].id,
+            catalog['description_hit'].id,
+        ]
+
+    def test_all_terms_must_match(self, api_client, catalog):
+        response = api_client.get('/api/products/?q=laptop stand')
+        assert [item['id'] for item in response.data['items']] == [catalog['name_hit'].id]
+
+    def test_index_follows_updates_and_deletes(self, api_client, catalog):
+        api_client.get('/api/products/?q=laptop')  # build the index
+        lamp = catalog['miss']
+        lamp.name = 'Laptop Lamp'
+        lamp.save()
+        catalog['name_hit'].delete()
+        response = api_client.get('/api/products/?q=laptop&sort=relevance')
+        ids = [item['id'] for item in response.data['items']]
+        assert ids[0] == lamp.id
+        assert catalog['name_hit'].id not in ids
+
+    def test_no_match_returns_empty_page(self, api_client, catalog):
+        response = api_client.get('/api/products/?q=keyboard')
+        assert response.data['total'] == 0
+        assert response.data['items'] == []
+
+
+def test_tokenize_lowercases_and_splits():
+    assert tokenize('USB-C Hub, 4 ports') == ['usb', 'c', 'hub', '4', 'ports']
+
+
+def test_empty_query_matches_nothing():
+    assert InMemorySearchBackend().scores('  ') == {}
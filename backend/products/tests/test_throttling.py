@@ -0,0 +1,118 @@
+import pytest
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import status
+from rest_framework.test import APIClient
+from ecommerce import throttling
+from ecommerce.throttling import CacheBackend, RedisBackend, parse_rate
+
+
+@pytest.fixture
+def user(db):
+    return User.objects.create_user(username='testuser', password='testpass123')
+
+
+@pytest.fixture
+def rates(settings):
+    def set_rates(**overrides):
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], **overrides},
+        }
+    return set_rates
+
+
+@pytest.mark.parametrize('rate, expected', [
+    ('100/minute', (0.6, 100)),
+    ('5/s', (0.2, 5)),
+    ('2/hour', (1800, 2)),
+])
+def test_parse_rate(rate, expected):
+    assert parse_rate(rate) == expected
+
+
+@pytest.mark.parametrize('rate', ['100', 'ten/minute', '0/minute', '5/fortnight'])
+def test_parse_rate_rejects_garbage(rate):
+    with pytest.raises(ImproperlyConfigured):
+        parse_rate(rate)
+
+
+class TestCacheBackend:
+    def test_burst_then_steady_rate(self, monkeypatch):
+        cache.clear()
+        now = [1000.0]
+        monkeypatch.setattr(throttling.time, 'time', lambda: now[0])
+        backend = CacheBackend(cache)
+        # 3/minute: three at once, then one every 20 seconds
+        assert [backend.hit('k', 20, 3) for _ in range(3)] == [0, 0, 0]
+        assert backend.hit('k', 20, 3) == pytest.approx(20)
+        now[0] += 19
+        assert backend.hit('k', 20, 3) == pytest.approx(1)
+        now[0] += 1
+        assert backend.hit('k', 20, 3) == 0
+        assert backend.hit('k', 20, 3) == pytest.approx(20)
+
+    def test_refused_requests_do_not_use_up_budget(self, monkeypatch):
+        cache.clear()
+        now = [1000.0]
+        monkeypatch.setattr(throttling.time, 'time', lambda: now[0])
+        backend = CacheBackend(cache)
+        backend.hit('k', 10, 1)
+        for _ in range(5):
+            backend.hit('k', 10, 1)
+        now[0] += 10
+        assert backend.hit('k', 10, 1) == 0
+
+
+@pytest.mark.django_db
+class TestThrottledViews:
+    def test_anonymous_burst_is_refused_with_retry_after(self, rates):
+        rates(catalog='2/minute')
+        client = APIClient()
+        codes = [client.get('/api/products/').status_code for _ in range(3)]
+        assert codes == [200, 200, status.HTTP_429_TOO_MANY_REQUESTS]
+        response = client.get('/api/products/')
+        assert 25 <= int(response['Retry-After']) <= 30
+
+    def test_scopes_have_separate_budgets(self, user, rates):
+        rates(catalog='1/minute', user='1/minute')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        assert client.get('/api/products/').status_code == status.HTTP_200_OK
+        assert client.get('/api/products/').status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        # Unscoped views fall back to the user rate
+        assert client.get('/api/addresses/').status_code == status.HTTP_200_OK
+        assert client.get('/api/addresses/').status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_users_are_limited_independently(self, user, rates):
+        rates(catalog='1/minute')
+        other = User.objects.create_user(username='other', password='testpass123')
+        for who in (user, other):
+            client = APIClient()
+            client.force_authenticate(user=who)
+            assert client.get('/api/categories/').status_code == status.HTTP_200_OK
+        assert APIClient().get('/api/categories/').status_code == status.HTTP_200_OK
+
+    def test_checkout_only_throttles_order_creation(self, user, rates):
+        rates(checkout='1/minute')
+        client = APIClient()
+        client.force_authenticate(user=user)
+        assert client.post('/api/orders/', {}, format='json').status_code != status.HTTP_429_TOO_MANY_REQUESTS
+        assert client.post('/api/orders/', {}, format='json').status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert client.get('/api/orders/').status_code == status.HTTP_200_OK
+
+
+def test_redis_backend_runs_gcra_script(monkeypatch):
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    from django.core.cache.backends.redis import RedisCache
+
+    server = fakeredis.FakeRedis()
+    backend = RedisBackend(RedisCache('redis://unused', {}))
+    monkeypatch.setattr(backend, '_client', lambda key: server)
+    assert [backend.hit('k', 20, 3) for _ in range(3)] == [0, 0, 0]
+    assert 19 < backend.hit('k', 20, 3) <= 20
+    key = backend.cache.make_key('k')
+    assert 0 < server.pttl(key) <= 60_000
+    assert backend.hit('other', 20, 3) == 0
@@ -266,6 +266,8 @@ class TestOrderViewSet:
 
     def test_update_order_status(self, authenticated_client, user, product):
         order = Order.objects.create(user=user, total=99.99, status='pending')
+        user.is_staff = True
+        user.save()
         
         response = authenticated_client.patch(f'/api/orders/{order.id}/update_status/', {'status': 'shipped'})
         assert response.status_code == status.HTTP_200_OK
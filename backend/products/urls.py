@@ -3,8 +3,9 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     ProductViewSet, CategoryViewSet, AddressViewSet,
     CartViewSet, CartItemViewSet, OrderViewSet, 
-    ReviewViewSet, AsyncProductListView
+    ReviewViewSet
 )
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'products', ProductViewSet, basename='product')
@@ -17,5 +18,10 @@ router.register(r'reviews', ReviewViewSet, basename='review')
 
 urlpatterns = [
     path('', include(router.urls)),
-    path('products/async/', AsyncProductListView.as_view(), name='async-products'),
+    # Native async read path (products/async_views.py)
+    path('async/products/', async_views.product_list, name='async-product-list'),
+    path('async/products/<int:pk>/', async_views.product_detail, name='async-product-detail'),
+    path('async/products/<int:pk>/reviews/', async_views.product_reviews, name='async-product-reviews'),
+    path('async/categories/', async_views.category_list, name='async-category-list'),
+    path('async/categories/<int:pk>/', async_views.category_detail, name='async-category-detail'),
 ]
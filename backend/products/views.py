@@ -1,23 +1,46 @@
 from rest_framework import viewsets, filters, status
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.exceptions import MethodNotAllowed
+from rest_framework.parsers import MultiPartParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
-from rest_framework.views import APIView
-from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Avg, Q, QuerySet
+from django.db import transaction
+from django.db.models import Q, QuerySet, Prefetch, prefetch_related_objects
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 
+from ecommerce.parsers import FastJSONParser
+from users.tasks import dispatch_order_processing
+
 from .models import (
     Product, Category, Address, Cart, CartItem, 
     Order, OrderItem, Review
 )
+from .cache import cached_response, product_namespace
+from .category_stats import STATS_NAMESPACE
+from .exports import (
+    FORMATS as EXPORT_FORMATS, ExportError, export_rows, iter_export, parse_bool, parse_updated_since
+)
+from .facets import FILTER_PARAMS as FACET_PARAMS, compute_facets
+from .imports import ProductImportError, import_products, open_upload, read_rows
+from .order_status import InvalidTransition, transition_orders
+from .pagination import (
+    DEFAULT_CURSOR_SORT, TOTAL_MODES, InvalidCursor, KeysetPaginator, count_rows
+)
+from .reservations import release_holds, reserve_cart
+from .search import search_products
+from .services import CheckoutError, add_to_cart, place_order, set_cart_quantities
 from .serializers import (
     ProductSerializer, CategorySerializer, AddressSerializer,
     CartSerializer, CartItemSerializer, OrderSerializer, 
-    OrderItemSerializer, ReviewSerializer
+    OrderItemSerializer, OrderSummarySerializer, OrderTransitionSerializer, ReviewSerializer, ProductCardEncoder, CartBatchSerializer
 )
 
+MAX_PAGE_SIZE = 100
+ORDER_PAGE_SIZE = 20
+CATEGORY_NAMESPACES = ['categories', STATS_NAMESPACE]
+
 
 class CategoryViewSet(viewsets.ModelViewSet):
     """
@@ -28,12 +51,19 @@ class CategoryViewSet(viewsets.ModelViewSet):
     - Update category (authenticated users)
     - Delete category (authenticated users)
     """
-    queryset = Category.objects.all().order_by('name')
+    queryset = Category.objects.order_by('name')
     serializer_class = CategorySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'created_at']
+    throttle_scope = 'catalog'
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(request, CATEGORY_NAMESPACES, lambda: super(CategoryViewSet, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_response(request, CATEGORY_NAMESPACES, lambda: super(CategoryViewSet, self).retrieve(request, *args, **kwargs))
 
 
 class ProductViewSet(viewsets.ModelViewSet):
@@ -45,15 +75,14 @@ class ProductViewSet(viewsets.ModelViewSet):
     - Update product (authenticated users)
     - Delete product (authenticated users)
     """
-    queryset = Product.objects.all().order_by('-created_at')
+    queryset = Product.objects.with_related().order_by('-created_at')
     serializer_class = ProductSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_fields = ['category', 'brand', 'is_active', 'price']
-    search_fields = ['name', 'description', 'brand']
     ordering_fields = ['price', 'created_at', 'rating', 'stock']
     ordering = ['-created_at']
-    throttle_classes = [UserRateThrottle, AnonRateThrottle]
+    throttle_scope = 'catalog'
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -67,40 +96,168 @@ class ProductViewSet(viewsets.ModelViewSet):
             else:
                 queryset = queryset.filter(category__name__iexact=category)
         
-        # Support search via 'q'
-        q = params.get('q')
+        # Full-text search via 'q' (or DRF-style 'search'), ranked by relevance
+        q = params.get('q') or params.get('search')
         if q:
-            queryset = queryset.filter(Q(name__icontains=q) | Q(description__icontains=q))
+            queryset = search_products(queryset, q)
         
-        # Support sort=price or -price
-        sort = params.get('sort')
+        return queryset
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        # Support sort=price or -price; applied after OrderingFilter so the
+        # default ordering does not override it.
+        sort = self.request.query_params.get('sort')
         if sort in ['price', '-price', 'rating', '-rating']:
-            queryset = queryset.order_by(sort)
-        
+            queryset = queryset.order_by(sort, 'id')
+        elif sort == 'relevance' and 'relevance' in queryset.query.annotations:
+            queryset = queryset.order_by('-relevance', 'id')
         return queryset
 
     def list(self, request, *args, **kwargs):
+        return cached_response(request, 'products', lambda: self._list(request))
+
+    def retrieve(self, request, *args, **kwargs):
+        namespaces = [product_namespace(kwargs['pk']), 'categories']
+        return cached_response(request, namespaces, lambda: super(ProductViewSet, self).retrieve(request, *args, **kwargs))
+
+    def _list(self, request):
         queryset = self.filter_queryset(self.get_queryset())
-        # Simple pagination compatible with frontend 'page' and 'limit'
+        params = request.query_params
         try:
-            page = int(request.query_params.get('page', '1'))
+            limit = int(params.get('limit', '12'))
         except ValueError:
-            page = 1
+            limit = 12
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        # Card mode (?view=card or ?fields=a,b): flat rows read with
+        # .values() and encoded without the nested ModelSerializer.
+        cards = None
+        if params.get('view') == 'card' or 'fields' in params:
+            try:
+                cards = ProductCardEncoder.from_param(params.get('fields'))
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Cursor (keyset) mode: opt in with ?pagination=cursor or by
+        # passing a cursor returned from a previous page.
+        if params.get('pagination') == 'cursor' or params.get('cursor'):
+            return self._cursor_list(queryset, limit, cards)
+
+        # Simple pagination compatible with frontend 'page' and 'limit'
         try:
-            limit = int(request.query_params.get('limit', '12'))
+            page = int(params.get('page', '1'))
         except ValueError:
-            limit = 12
+            page = 1
+        page = max(page, 1)
+        total_mode = params.get('total', 'exact')
+        if total_mode not in TOTAL_MODES:
+            total_mode = 'exact'
         start = (page - 1) * limit
         end = start + limit
-        total = queryset.count()
-        serializer = self.get_serializer(queryset[start:end], many=True)
-        return Response({'items': serializer.data, 'total': total})
+        if cards:
+            rows = queryset.prefetch_related(None).values(*cards.columns())
+            data = {'items': cards.encode(rows[start:end])}
+        else:
+            serializer = self.get_serializer(queryset[start:end], many=True)
+            data = {'items': serializer.data}
+        if total_mode != 'none':
+            data['total'] = count_rows(queryset, total_mode)
+        return Response(data)
+
+    def _cursor_list(self, queryset, limit, cards=None):
+        params = self.request.query_params
+        sort = params.get('sort') or params.get('ordering') or DEFAULT_CURSOR_SORT
+        total_mode = params.get('total', 'none')
+        if total_mode not in TOTAL_MODES:
+            total_mode = 'none'
+        try:
+            paginator = KeysetPaginator(sort=sort, limit=limit)
+            page_queryset = queryset
+            if cards:
+                # The sort column is needed to build the next cursor
+                page_queryset = queryset.prefetch_related(None).values(*cards.columns(paginator.field))
+            rows, next_cursor, prev_cursor = paginator.paginate(page_queryset, params.get('cursor'))
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        items = cards.encode(rows) if cards else self.get_serializer(rows, many=True).data
+        data = {'items': items, 'next': next_cursor, 'prev': prev_cursor}
+        if total_mode != 'none':
+            data['total'] = count_rows(queryset, total_mode)
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Counts by category, brand, price bucket and rating band for the
+        products the same query string would list (paging and sort ignored).
+        """
+        params = request.query_params.copy()
+        for key in list(params):
+            if key not in FACET_PARAMS:
+                del params[key]
+        return cached_response(
+            request, 'products',
+            lambda: Response(compute_facets(self.filter_queryset(self.get_queryset()))),
+            query_params=params,
+        )
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def export(self, request):
+        """
+        Stream the catalogue as CSV or NDJSON (?fmt=csv|ndjson).
+        Filters: category (id or name), is_active, updated_since (ISO date/datetime).
+        """
+        params = request.query_params
+        fmt = params.get('fmt', 'csv')
+        try:
+            rows = export_rows(
+                category=params.get('category'),
+                is_active=parse_bool(params['is_active']) if params.get('is_active') else None,
+                updated_since=parse_updated_since(params['updated_since']) if params.get('updated_since') else None,
+            )
+            chunks = iter_export(fmt, rows)
+        except ExportError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[fmt])
+        response['Content-Disposition'] = f'attachment; filename="products.{fmt}"'
+        return response
+
+    @action(
+        detail=False, methods=['post'], url_path='import',
+        permission_classes=[IsAdminUser], parser_classes=[MultiPartParser, FastJSONParser],
+    )
+    def bulk_import(self, request):
+        """
+        Upsert products keyed on SKU (staff only).
+        Send a CSV/NDJSON `file` upload (format from ?fmt= or the file extension),
+        or a JSON list of row objects. Returns per-row errors.
+        """
+        try:
+            if 'file' in request.FILES:
+                upload = request.FILES['file']
+                fmt = request.query_params.get('fmt') or upload.name.rsplit('.', 1)[-1].lower()
+                rows = read_rows(open_upload(upload), fmt)
+            elif isinstance(request.data, list):
+                rows = enumerate(request.data, start=1)
+            else:
+                return Response(
+                    {'error': 'Upload a file or send a JSON list of rows'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            report = import_products(rows)
+        except ProductImportError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report.as_dict())
 
     @action(detail=True, methods=['get'])
     def reviews(self, request, pk=None):
         """Get all reviews for a specific product"""
+        return cached_response(request, product_namespace(pk), lambda: self._reviews())
+
+    def _reviews(self):
         product = self.get_object()
-        reviews = product.reviews.all().order_by('-created_at')
+        reviews = product.reviews.with_related().order_by('-created_at')
         serializer = ReviewSerializer(reviews, many=True)
         return Response(serializer.data)
 
@@ -130,11 +287,12 @@ class AddressViewSet(viewsets.ModelViewSet):
     def set_default(self, request, pk=None):
         """Set an address as the default"""
         address = self.get_object()
-        # Remove default from all other addresses
-        Address.objects.filter(user=request.user, is_default=True).update(is_default=False)
-        # Set this address as default
-        address.is_default = True
-        address.save()
+        # At most one default per user is enforced by a unique partial
+        # constraint, so clear the old default first, in the same transaction
+        with transaction.atomic():
+            Address.objects.filter(user=request.user, is_default=True).update(is_default=False)
+            address.is_default = True
+            address.save()
         return Response({'status': 'default address set'})
 
 
@@ -142,11 +300,13 @@ class CartViewSet(viewsets.ModelViewSet):
     """
     ViewSet for Cart operations.
     - Retrieve user's cart
+    - Totals-only summary
     - Clear cart
     """
     serializer_class = CartSerializer
     permission_classes = [IsAuthenticated]
-    http_method_names = ['get', 'delete']
+    # POST only routes to the reserve action; carts are created on first use
+    http_method_names = ['get', 'post', 'delete']
 
     def get_queryset(self) -> QuerySet[Cart]:
         # Users can only see their own cart
@@ -154,23 +314,54 @@ class CartViewSet(viewsets.ModelViewSet):
 
     def retrieve(self, request, *args, **kwargs):
         # Get or create cart for the user
-        cart, created = Cart.objects.get_or_create(user=request.user)
+        cart = self.get_queryset().with_summary().first() or Cart.objects.get_or_create(user=request.user)[0]
+        prefetch_related_objects([cart], Prefetch('items', queryset=CartItem.objects.with_product()))
         serializer = self.get_serializer(cart)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def summary(self, request):
+        """Cart total and item count from one aggregate query"""
+        summary = self.get_queryset().with_summary().values('items_total', 'items_count').first()
+        if summary is None:
+            return Response({'total': 0, 'items_count': 0})
+        return Response({'total': summary['items_total'], 'items_count': summary['items_count']})
+
+    def create(self, request, *args, **kwargs):
+        raise MethodNotAllowed(request.method)
+
     @action(detail=False, methods=['delete'])
     def clear(self, request):
         """Clear all items from the cart"""
-        cart, created = Cart.objects.get_or_create(user=request.user)
-        cart.items.all().delete()
+        CartItem.objects.filter(cart__user=request.user).delete()
+        release_holds(request.user)
         return Response({'status': 'cart cleared'}, status=status.HTTP_204_NO_CONTENT)
 
+    @action(detail=False, methods=['post', 'delete'])
+    def reserve(self, request):
+        """
+        POST: hold the cart's stock for checkout (renews the hold).
+        DELETE: give the holds back.
+        """
+        if request.method == 'DELETE':
+            release_holds(request.user)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        try:
+            holds, expires_at = reserve_cart(request.user)
+        except CheckoutError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'holds': [{'product_id': pk, 'quantity': qty} for pk, qty in holds.items()],
+            'expires_at': expires_at,
+        })
+
 
 class CartItemViewSet(viewsets.ModelViewSet):
     """
     ViewSet for CartItem CRUD operations.
     - List items in user's cart
     - Add item to cart
+    - Set several line quantities at once
     - Update item quantity
     - Remove item from cart
     """
@@ -178,31 +369,36 @@ class CartItemViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self) -> QuerySet[CartItem]:
-        # Get or create cart for the user
-        cart, created = Cart.objects.get_or_create(user=self.request.user)
-        return CartItem.objects.filter(cart=cart).order_by('-added_at')
+        return CartItem.objects.with_product().filter(cart__user=self.request.user).order_by('-added_at')
 
     def create(self, request, *args, **kwargs):
-        # Get or create cart for the user
-        cart, created = Cart.objects.get_or_create(user=request.user)
-        product_id = request.data.get('product_id')
-        quantity = int(request.data.get('quantity', 1))
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            line_id, created = add_to_cart(
+                request.user,
+                serializer.validated_data['product'],
+                serializer.validated_data.get('quantity', 1),
+            )
+        except CheckoutError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Check if item already exists in cart
-        cart_item = CartItem.objects.filter(cart=cart, product_id=product_id).first()
-        
-        if cart_item:
-            # Update quantity if item exists
-            cart_item.quantity += quantity
-            cart_item.save()
-            serializer = self.get_serializer(cart_item)
-            return Response(serializer.data)
-        else:
-            # Create new cart item
-            serializer = self.get_serializer(data=request.data)
-            serializer.is_valid(raise_exception=True)
-            serializer.save(cart=cart)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+        serializer = self.get_serializer(self.get_queryset().get(pk=line_id))
+        return Response(serializer.data, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'])
+    def batch(self, request):
+        """Set absolute quantities for several products; 0 removes the line"""
+        payload = CartBatchSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        try:
+            set_cart_quantities(request.user, payload.validated_data['items'])
+        except CheckoutError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        cart = Cart.objects.with_summary().get(user=request.user)
+        prefetch_related_objects([cart], Prefetch('items', queryset=CartItem.objects.with_product()))
+        return Response(CartSerializer(cart, context=self.get_serializer_context()).data)
 
     def update(self, request, *args, **kwargs):
         """Update cart item quantity"""
@@ -217,68 +413,68 @@ class CartItemViewSet(viewsets.ModelViewSet):
 class OrderViewSet(viewsets.ModelViewSet):
     """
     ViewSet for Order CRUD operations.
-    - List user's orders
+    - List user's orders as summaries, newest first, with cursor pagination
     - Create order from cart
     - Retrieve single order with items
     - Update order status
     - Cancel order
+    - Move many orders to a status at once (staff)
     """
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated]
     http_method_names = ['get', 'post', 'patch', 'delete']
 
+    @property
+    def throttle_scope(self):
+        # Placing orders gets its own, tighter budget
+        return 'checkout' if self.action == 'create' else None
+
     def get_queryset(self) -> QuerySet[Order]:
-        # Users can only see their own orders
-        return Order.objects.filter(user=self.request.user).order_by('-created_at')
+        # Users can only see their own orders; staff set any order's status
+        orders = Order.objects.order_by('-created_at')
+        if self.action != 'update_status':
+            orders = orders.filter(user=self.request.user)
+        if self.action == 'list':
+            return orders.with_summary()
+        return orders.with_related()
+
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return OrderSummarySerializer
+        return OrderSerializer
+
+    def list(self, request, *args, **kwargs):
+        """Order history: summary rows paged by a (created_at, id) cursor"""
+        try:
+            limit = int(request.query_params.get('limit', ORDER_PAGE_SIZE))
+        except ValueError:
+            limit = ORDER_PAGE_SIZE
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        try:
+            paginator = KeysetPaginator(sort='-created_at', limit=limit)
+            rows, next_cursor, prev_cursor = paginator.paginate(self.get_queryset(), request.query_params.get('cursor'))
+        except InvalidCursor as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'items': self.get_serializer(rows, many=True).data,
+            'next': next_cursor,
+            'prev': prev_cursor,
+        })
 
     def create(self, request, *args, **kwargs):
         """Create order from user's cart"""
-        cart = Cart.objects.filter(user=request.user).first()
-        
-        if not cart or not cart.items.exists():
-            return Response(
-                {'error': 'Cart is empty'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # Calculate total
-        total = sum(item.product.price * item.quantity for item in cart.items.all())
-
-        # Get address if provided
-        address_id = request.data.get('address_id')
-        address = None
-        if address_id:
-            address = Address.objects.filter(id=address_id, user=request.user).first()
-
-        # Create order
-        order = Order.objects.create(
-            user=request.user,
-            address=address,
-            total=total,
-            status='pending'
-        )
-
-        # Create order items from cart items
-        for cart_item in cart.items.all():
-            OrderItem.objects.create(
-                order=order,
-                product=cart_item.product,
-                quantity=cart_item.quantity,
-                price=cart_item.product.price
-            )
-            # Reduce stock
-            cart_item.product.stock -= cart_item.quantity
-            cart_item.product.save()
-
-        # Clear cart
-        cart.items.all().delete()
+        try:
+            order = place_order(request.user, request.data.get('address_id'))
+        except CheckoutError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        dispatch_order_processing(order)
 
-        serializer = self.get_serializer(order)
+        serializer = self.get_serializer(self.get_queryset().get(pk=order.pk))
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-    @action(detail=True, methods=['patch'])
+    @action(detail=True, methods=['patch'], permission_classes=[IsAdminUser])
     def update_status(self, request, pk=None):
-        """Update order status"""
+        """Update order status (staff; owners use `cancel`)"""
         order = self.get_object()
         new_status = request.data.get('status')
         
@@ -288,33 +484,49 @@ class OrderViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        order.status = new_status
-        order.save()
-        serializer = self.get_serializer(order)
+        try:
+            moved = transition_orders([order.pk], new_status, actor=request.user)
+        except InvalidTransition as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if not moved:
+            return Response(
+                {'error': f'Cannot change order status from {order.status} to {new_status}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        serializer = self.get_serializer(self.get_queryset().get(pk=order.pk))
         return Response(serializer.data)
 
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
         """Cancel an order and restore stock"""
         order = self.get_object()
-        
-        if order.status in ['delivered', 'cancelled']:
+
+        if not transition_orders([order.pk], 'cancelled', actor=request.user):
             return Response(
                 {'error': f'Cannot cancel order with status: {order.status}'}, 
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Restore stock
-        for item in order.items.all():
-            item.product.stock += item.quantity
-            item.product.save()
-
-        order.status = 'cancelled'
-        order.save()
-        
-        serializer = self.get_serializer(order)
+        serializer = self.get_serializer(self.get_queryset().get(pk=order.pk))
         return Response(serializer.data)
 
+    @action(detail=False, methods=['post'], permission_classes=[IsAdminUser])
+    def transition(self, request):
+        """
+        Move any orders (not only the caller's) to one status. Orders whose
+        current status does not allow it are skipped and listed.
+        """
+        serializer = OrderTransitionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        target = serializer.validated_data['status']
+        moved = transition_orders(ids, target, actor=request.user, note=serializer.validated_data['note'])
+        return Response({
+            'status': target,
+            'updated': len(moved),
+            'skipped': [pk for pk in dict.fromkeys(ids) if pk not in moved],
+        })
+
 
 class ReviewViewSet(viewsets.ModelViewSet):
     """
@@ -328,7 +540,7 @@ class ReviewViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
     def get_queryset(self) -> QuerySet[Review]:
-        queryset = Review.objects.all().order_by('-created_at')
+        queryset = Review.objects.with_related().order_by('-created_at')
         
         # Filter by product if provided
         product_id = self.request.query_params.get('product')  # type: ignore
@@ -342,41 +554,20 @@ class ReviewViewSet(viewsets.ModelViewSet):
         
         return queryset
 
+    # Product rating counters are adjusted by the Review signals
+    # (products/signals.py); the transaction keeps review and counters in step.
+
     def perform_create(self, serializer):
         """Create review and update product rating"""
-        review = serializer.save(user=self.request.user)
-        self._update_product_rating(review.product)
+        with transaction.atomic():
+            serializer.save(user=self.request.user)
 
     def perform_update(self, serializer):
-        """Update review and recalculate product rating"""
-        review = serializer.save()
-        self._update_product_rating(review.product)
+        """Update review and adjust product rating by the difference"""
+        with transaction.atomic():
+            serializer.save()
 
     def perform_destroy(self, instance):
-        """Delete review and recalculate product rating"""
-        product = instance.product
-        instance.delete()
-        self._update_product_rating(product)
-
-    def _update_product_rating(self, product):
-        """Calculate and update product's average rating"""
-        reviews = product.reviews.all()
-        if reviews.exists():
-            avg_rating = reviews.aggregate(Avg('rating'))['rating__avg']
-            product.rating = round(avg_rating, 1)
-            product.num_reviews = reviews.count()
-        else:
-            product.rating = 0.0
-            product.num_reviews = 0
-        product.save()
-
-
-class AsyncProductListView(APIView):
-    """Async endpoint for product listing (demo)"""
-    permission_classes = [IsAuthenticatedOrReadOnly]
-
-    async def get(self, request):
-        from asgiref.sync import sync_to_async
-        products = await sync_to_async(list)(Product.objects.all().order_by('-created_at'))
-        serializer = ProductSerializer(products, many=True)
-        return Response(serializer.data)
+        """Delete review and remove it from product rating"""
+        with transaction.atomic():
+            instance.delete()
@@ -0,0 +1,115 @@
+"""
+JWT authentication without a user query per request.
+
+`StatelessJWTAuthentication` turns the claims in tokens from `users.tokens`
+(id, email, is_staff) into a `TokenClaimsUser`. That is a real `User`
+instance, so ``filter(user=request.user)`` and FK assignment work
+unchanged. Any other field loads the row on first access.
+
+Tokens stay valid until they expire, so some users are still loaded from
+the DB on every request, which enforces ``is_active`` and returns current
+data:
+- users deleted or saved within the last access-token lifetime; the
+  signals in `users.signals` set an ``auth:stale:<id>`` key with that TTL
+  in the ``AUTH_CACHE_ALIAS`` cache, and each request reads its user's key
+- inactive users, including ones deactivated with ``QuerySet.update()``
+  (no signal); each process re-reads their ids every
+  ``JWT_STALE_USERS_REFRESH`` seconds (default 30)
+
+The stale keys only work if every process sees the same cache. When
+``AUTH_CACHE_ALIAS`` is local memory, every request takes the DB path
+unless ``AUTH_CACHE_SHARED = True`` says there is only one process (tests,
+``runserver``).
+
+Tokens without the claims (issued before this module existed) also take
+the DB path.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ValidationError
+from django.db import router
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .models import TokenClaimsUser
+from .tokens import CLAIM_FIELDS
+
+STALE_USER_KEY = 'auth:stale:%s'
+DEFAULT_REFRESH = 30
+
+_lock = threading.Lock()
+_snapshot = {'expires': 0.0, 'ids': frozenset()}
+
+
+def _cache():
+    return caches[getattr(settings, 'AUTH_CACHE_ALIAS', 'default')]
+
+
+def cache_is_shared():
+    shared = getattr(settings, 'AUTH_CACHE_SHARED', None)
+    if shared is not None:
+        return shared
+    return not isinstance(_cache(), (LocMemCache, DummyCache))
+
+
+def mark_stale(user_id):
+    """Send tokens already issued to `user_id` through the DB until they expire."""
+    lifetime = jwt_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+    _cache().set(STALE_USER_KEY % user_id, True, lifetime)
+
+
+def is_stale(user_id):
+    return bool(_cache().get(STALE_USER_KEY % user_id))
+
+
+def forget_inactive_users():
+    """Drop this process's copy so the next request reloads it."""
+    with _lock:
+        _snapshot['expires'] = 0.0
+
+
+def inactive_user_ids():
+    if time.monotonic() < _snapshot['expires']:
+        return _snapshot['ids']
+    ids = frozenset(User.objects.filter(is_active=False).values_list('pk', flat=True))
+    with _lock:
+        _snapshot['ids'] = ids
+        _snapshot['expires'] = time.monotonic() + getattr(settings, 'JWT_STALE_USERS_REFRESH', DEFAULT_REFRESH)
+    return ids
+
+
+def user_from_claims(token):
+    known = {
+        # simplejwt writes the id claim as a string
+        'id': User._meta.pk.to_python(token[jwt_settings.USER_ID_CLAIM]),
+        'is_active': True,
+        **{field: token[field] for field in CLAIM_FIELDS},
+    }
+    # from_db takes values in concrete-field order and defers the rest
+    names = [f.attname for f in User._meta.concrete_fields if f.attname in known]
+    return TokenClaimsUser.from_db(router.db_for_read(User), names, [known[name] for name in names])
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if (
+            jwt_settings.CHECK_REVOKE_TOKEN
+            or not cache_is_shared()
+            or jwt_settings.USER_ID_FIELD != 'id'
+            or jwt_settings.USER_ID_CLAIM not in validated_token
+            or not all(claim in validated_token for claim in CLAIM_FIELDS)
+        ):
+            return super().get_user(validated_token)
+        try:
+            user = user_from_claims(validated_token)
+        except ValidationError:
+            return super().get_user(validated_token)
+        if user.pk in inactive_user_ids() or is_stale(user.pk):
+            return super().get_user(validated_token)
+        return user
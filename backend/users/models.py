@@ -1,3 +1,18 @@
-from django.db import models
+from django.contrib.auth.models import User
 
-# Create your models here.
+
+class TokenClaimsUser(User):
+	"""
+	A `User` built from access-token claims by `users.authentication`.
+	Fields the token does not carry are deferred; the first one a view
+	touches loads the rest of the row in a single query.
+	"""
+
+	class Meta:
+		proxy = True
+
+	def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+		deferred = self.get_deferred_fields()
+		if fields and deferred.issuperset(fields):
+			fields = deferred
+		super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
@@ -0,0 +1,21 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import mark_stale
+from .models import TokenClaimsUser
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=TokenClaimsUser)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Logins only touch last_login, which no token claim depends on
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    mark_stale(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=TokenClaimsUser)
+def user_deleted(sender, instance, **kwargs):
+    mark_stale(instance.pk)
@@ -1,46 +1,109 @@
+from smtplib import SMTPException
+
 from celery import shared_task
-from django.core.mail import send_mail
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
 
-@shared_task
+DEFAULT_FROM_EMAIL = 'noreply@ecommerce.com'
+
+# Transient mail/network failures are retried with exponential backoff
+# (2s, 4s, 8s, ... capped at 10 minutes, with jitter).
+RETRY_OPTIONS = {
+    'autoretry_for': (SMTPException, ConnectionError, OSError),
+    'retry_backoff': 2,
+    'retry_backoff_max': 600,
+    'retry_jitter': True,
+    'max_retries': 5,
+}
+
+
+def _batches(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+@shared_task(**RETRY_OPTIONS)
+def send_email_batch(messages):
+    """
+    Send `[(subject, body, recipient), ...]` over a single SMTP connection.
+
+    A retry resends every message in the task, so queue long lists with
+    `queue_email_batches`, which gives each chunk its own task.
+    """
+    from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', DEFAULT_FROM_EMAIL)
+    with get_connection(fail_silently=False) as connection:
+        return connection.send_messages([
+            EmailMessage(subject, body, from_email, [recipient])
+            for subject, body, recipient in messages
+        ]) or 0
+
+
+def queue_email_batches(messages):
+    """
+    Queue one `send_email_batch` task per EMAIL_BATCH_SIZE chunk, so one
+    slow server does not hold a connection open indefinitely and a failed
+    chunk is retried without resending the others.
+    """
+    batch_size = getattr(settings, 'EMAIL_BATCH_SIZE', 100)
+    for chunk in _batches(list(messages), batch_size):
+        send_email_batch.delay(chunk)
+
+
+@shared_task(**RETRY_OPTIONS)
 def send_welcome_email(user_email):
-    send_mail(
-        'Welcome to E-Commerce!',
-        'Thank you for registering with us.',
-        'noreply@ecommerce.com',
-        [user_email],
-        fail_silently=False,
-    )
+    return send_email_batch([
+        ('Welcome to E-Commerce!', 'Thank you for registering with us.', user_email),
+    ])
+
+
+@shared_task(**RETRY_OPTIONS)
+def send_password_reset_email(user_email, reset_link):
+    return send_email_batch([
+        ('Reset your password', f'Click the link to reset your password: {reset_link}', user_email),
+    ])
+
+
+def order_task_id(order_id):
+    # A predictable id so an order's processing task can be looked up or
+    # revoked. Celery does not dedupe on it; duplicates are harmless
+    # because process_orders only claims orders that are still pending.
+    return f'order:{order_id}:processing'
+
 
 @shared_task
-def process_order(order_id):
-    # Simulate order processing logic
+def process_orders(order_ids):
+    """
+    Move pending orders to 'processing' and send their confirmations.
+
+    Each order is claimed through `transition_orders` with a row lock
+    (skipping rows another worker holds) and a status check, so
+    redelivered or duplicated tasks are no-ops for orders already
+    claimed. Confirmations go out through `queue_email_batches`.
+    """
     from products.models import Order
-    try:
-        order = Order.objects.get(id=order_id)
-        # Example: update status, send confirmation, etc.
-        order.status = 'processed'
-        order.save()
-        send_mail(
-            'Order Processed',
-            f'Your order #{order_id} has been processed.',
-            'noreply@ecommerce.com',
-            [order.user.email],
-            fail_silently=True,
-        )
-    except Exception as e:
-        # Log error or send notification
-        pass
+    from products.order_status import transition_orders
+
+    moved = transition_orders(order_ids, 'processing', source='task', skip_locked=True)
+    claimed = list(Order.objects.filter(pk__in=list(moved)).values_list('pk', 'user__email'))
+
+    messages = [
+        ('Order Processed', f'Your order #{pk} has been processed.', email)
+        for pk, email in claimed if email
+    ]
+    queue_email_batches(messages)
+    return [pk for pk, _ in claimed]
+
 
 @shared_task
-def send_password_reset_email(user_email, reset_link):
-    try:
-        send_mail(
-            'Reset your password',
-            f'Click the link to reset your password: {reset_link}',
-            'noreply@ecommerce.com',
-            [user_email],
-            fail_silently=False,
+def process_order(order_id):
+    return process_orders([order_id])
+
+
+def dispatch_order_processing(order):
+    """Queue `order` for processing once the surrounding transaction commits."""
+    transaction.on_commit(
+        lambda: process_order.apply_async(
+            (order.pk,), task_id=order_task_id(order.pk)
         )
-    except Exception:
-        # Optionally log
-        pass
+    )
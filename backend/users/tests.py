@@ -1,7 +1,19 @@
-from django.test import TestCase
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from ecommerce.celery import app as celery_app
+from .authentication import STALE_USER_KEY, forget_inactive_users, user_from_claims
+from .tasks import process_orders, send_email_batch
 
 User = get_user_model()
 
@@ -52,3 +64,152 @@ class ExchangeEndpointsTests(TestCase):
 		self.assertIn('id', user)
 		self.assertIn('email', user)
 		self.assertTrue(User.objects.filter(email=user['email']).exists())
+
+
+class EagerCeleryMixin:
+	"""Run Celery tasks inline so tests need no broker."""
+
+	@classmethod
+	def setUpClass(cls):
+		super().setUpClass()
+		# Settings are read with the CELERY_ namespace, so override those keys
+		cls._celery_conf = {key: celery_app.conf.get(key) for key in ('CELERY_TASK_ALWAYS_EAGER', 'CELERY_TASK_EAGER_PROPAGATES')}
+		celery_app.conf.update(CELERY_TASK_ALWAYS_EAGER=True, CELERY_TASK_EAGER_PROPAGATES=True)
+
+	@classmethod
+	def tearDownClass(cls):
+		celery_app.conf.update(cls._celery_conf)
+		super().tearDownClass()
+
+
+class AsyncMailTests(EagerCeleryMixin, TestCase):
+	def setUp(self):
+		self.client = APIClient()
+
+	def test_register_queues_welcome_email_after_commit(self):
+		with self.captureOnCommitCallbacks(execute=False) as callbacks:
+			resp = self.client.post(reverse('register_user'), data={'email': 'new@example.com', 'password': 'Str0ngPass!'}, format='json', secure=True)
+		self.assertEqual(resp.status_code, 201)
+		self.assertEqual(len(mail.outbox), 0)
+		self.assertEqual(len(callbacks), 1)
+		callbacks[0]()
+		self.assertEqual(len(mail.outbox), 1)
+		self.assertEqual(mail.outbox[0].to, ['new@example.com'])
+
+	def test_email_batch_uses_one_connection(self):
+		with patch('users.tasks.get_connection', wraps=get_connection) as connections:
+			sent = send_email_batch([('Hi', 'Body', f'user{i}@example.com') for i in range(5)])
+		self.assertEqual(sent, 5)
+		self.assertEqual(connections.call_count, 1)
+		self.assertEqual(len(mail.outbox), 5)
+
+
+class ProcessOrdersTaskTests(EagerCeleryMixin, TestCase):
+	def setUp(self):
+		from products.models import Order
+		user = User.objects.create_user(username='buyer', email='buyer@example.com', password='testpass')
+		self.orders = [Order.objects.create(user=user, total=10) for _ in range(3)]
+
+	def test_claims_pending_orders_and_sends_one_batch(self):
+		ids = [o.pk for o in self.orders]
+		with patch('users.tasks.send_email_batch.delay') as delay:
+			processed = process_orders(ids)
+		self.assertEqual(sorted(processed), sorted(ids))
+		delay.assert_called_once()
+		self.assertEqual(len(delay.call_args.args[0]), 3)
+		for order in self.orders:
+			order.refresh_from_db()
+			self.assertEqual(order.status, 'processing')
+
+	@override_settings(EMAIL_BATCH_SIZE=2)
+	def test_each_email_chunk_is_its_own_task(self):
+		with patch('users.tasks.send_email_batch.delay') as delay:
+			process_orders([o.pk for o in self.orders])
+		self.assertEqual([len(call.args[0]) for call in delay.call_args_list], [2, 1])
+
+	def test_redelivery_is_a_no_op(self):
+		process_orders([self.orders[0].pk])
+		mail.outbox.clear()
+		self.assertEqual(process_orders([self.orders[0].pk]), [])
+		self.assertEqual(len(mail.outbox), 0)
+
+
+@override_settings(AUTH_CACHE_SHARED=True)
+class StatelessJWTAuthenticationTests(TestCase):
+	def setUp(self):
+		cache.clear()
+		forget_inactive_users()
+		self.user = User.objects.create_user(username='shopper', email='shopper@example.com', password='testpass')
+		self.client = APIClient()
+
+	def login(self):
+		resp = self.client.post(reverse('token_obtain_pair'), {'username': 'shopper', 'password': 'testpass'}, format='json', secure=True)
+		self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {resp.json()['access']}")
+		return resp.json()
+
+	def user_queries(self):
+		with CaptureQueriesContext(connection) as ctx:
+			resp = self.client.get('/api/addresses/', secure=True)
+		self.assertEqual(resp.status_code, 200)
+		return [q['sql'] for q in ctx.captured_queries if 'FROM "auth_user"' in q['sql']]
+
+	def test_tokens_carry_claims(self):
+		access = AccessToken(self.login()['access'])
+		self.assertEqual(access['email'], 'shopper@example.com')
+		self.assertFalse(access['is_staff'])
+
+	def test_authenticated_requests_do_not_load_the_user(self):
+		self.login()
+		self.user_queries()  # first request builds the inactive-user set
+		self.assertEqual(self.user_queries(), [])
+
+	def test_tokens_without_claims_fall_back_to_the_database(self):
+		self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+		self.user_queries()
+		self.assertEqual(len(self.user_queries()), 1)
+
+	def test_deactivated_and_deleted_users_are_refused(self):
+		self.login()
+		self.user.is_active = False
+		self.user.save()
+		self.assertEqual(self.client.get('/api/addresses/', secure=True).status_code, 401)
+		self.user.delete()
+		self.assertEqual(self.client.get('/api/addresses/', secure=True).status_code, 401)
+
+	def test_changes_mark_only_that_user_stale(self):
+		other = User.objects.create_user(username='other', password='testpass')
+		self.login()
+		self.user_queries()
+		other.save()
+		self.assertTrue(cache.get(STALE_USER_KEY % other.pk))
+		self.assertEqual(self.user_queries(), [])
+		self.user.save()
+		self.assertEqual(len(self.user_queries()), 1)
+
+	@override_settings(JWT_STALE_USERS_REFRESH=0)
+	def test_bulk_deactivation_is_seen_after_the_refresh(self):
+		self.login()
+		self.user_queries()
+		User.objects.filter(pk=self.user.pk).update(is_active=False)
+		self.assertEqual(self.client.get('/api/addresses/', secure=True).status_code, 401)
+
+	def test_local_memory_cache_is_not_trusted_for_claims(self):
+		self.login()
+		with override_settings(AUTH_CACHE_SHARED=None):
+			self.user_queries()
+			self.assertEqual(len(self.user_queries()), 1)
+
+	def test_other_fields_load_the_row_once(self):
+		self.user.first_name = 'Sam'
+		self.user.save()
+		user = user_from_claims(AccessToken(self.login()['access']))
+		self.assertTrue(user.is_authenticated)
+		with self.assertNumQueries(1):
+			self.assertEqual(user.first_name, 'Sam')
+			self.assertEqual(user.username, 'shopper')
+
+	def test_refresh_restamps_claims(self):
+		refresh = self.login()['refresh']
+		User.objects.filter(pk=self.user.pk).update(is_staff=True)
+		resp = self.client.post(reverse('token_refresh'), {'refresh': refresh}, format='json', secure=True)
+		self.assertTrue(AccessToken(resp.json()['access'])['is_staff'])
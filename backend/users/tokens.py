@@ -0,0 +1,45 @@
+"""
+JWTs that carry enough claims to authenticate without loading the user.
+
+Every token pair the API issues (``/api/users/token/``, the Google and
+Facebook exchanges, and refreshes) is stamped with `CLAIM_FIELDS`.
+`users.authentication.StatelessJWTAuthentication` reads them back.
+"""
+from django.contrib.auth.models import User
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+CLAIM_FIELDS = ('email', 'is_staff')
+
+
+def add_user_claims(token, user):
+    for field in CLAIM_FIELDS:
+        token[field] = getattr(user, field)
+
+
+class ClaimsRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        add_user_claims(token, user)
+        return token
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        # Claims copied from the refresh token may be a day old; restamp them
+        # so an access token never outlives the user data it carries
+        access = AccessToken(data['access'])
+        user = User.objects.filter(pk=access[api_settings.USER_ID_CLAIM]).first()
+        if user is not None:
+            add_user_claims(access, user)
+            data['access'] = str(access)
+        return data
@@ -3,11 +3,12 @@ from rest_framework.response import Response
 from rest_framework import status
 from django.urls import reverse
 from django.conf import settings
+from django.db import transaction
 from .tasks import send_welcome_email, send_password_reset_email
 from rest_framework.permissions import AllowAny
 
 from django.contrib.auth.models import User
-from rest_framework_simplejwt.tokens import RefreshToken
+from .tokens import ClaimsRefreshToken
 
 class RegisterUserView(APIView):
     permission_classes = [AllowAny]
@@ -21,7 +22,7 @@ class RegisterUserView(APIView):
             if User.objects.filter(email=email).exists():
                 return Response({'error': 'User with this email already exists.'}, status=status.HTTP_400_BAD_REQUEST)
             user = User.objects.create_user(username=email, email=email, password=password)
-            send_welcome_email(email)
+            transaction.on_commit(lambda: send_welcome_email.delay(email))
             return Response({'message': 'User registered and welcome email sent.'}, status=status.HTTP_201_CREATED)
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -43,8 +44,7 @@ class ForgotPasswordView(APIView):
                 token = 'dummy-reset-token'
                 frontend_base = getattr(settings, 'FRONTEND_BASE_URL', 'http://localhost:8082')
                 reset_link = f"{frontend_base}/reset-password?token={token}&email={email}"
-                # If Celery is configured, prefer: send_password_reset_email.delay(email, reset_link)
-                send_password_reset_email(email, reset_link)
+                send_password_reset_email.delay(email, reset_link)
             return Response({'message': 'If the email exists, a reset link will be sent.'})
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -66,7 +66,7 @@ class GoogleExchangeView(APIView):
             if created:
                 user.first_name = name
                 user.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
             return Response({
                 'token': str(refresh.access_token),
                 'user': {'id': user.pk, 'name': user.first_name or user.username, 'email': user.email, 'role': 'user'}
@@ -90,7 +90,7 @@ class FacebookExchangeView(APIView):
             if created:
                 user.first_name = name
                 user.save()
-            refresh = RefreshToken.for_user(user)
+            refresh = ClaimsRefreshToken.for_user(user)
             return Response({
                 'token': str(refresh.access_token),
                 'user': {'id': user.pk, 'name': user.first_name or user.username, 'email': user.email, 'role': 'user'}
@@ -5,4 +5,5 @@ export const ENDPOINTS = {
   user: '/api/user/',
   wishlist: '/api/wishlist/',
   orders: '/api/orders/',
+  batch: '/api/batch/',
 };
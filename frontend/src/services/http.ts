@@ -1,3 +1,4 @@
+import { ENDPOINTS } from '@config/api';
 import ENV from '@config/env';
 
 // Hooks configured by the app after the store is created to avoid circular deps
@@ -51,3 +52,17 @@ export async function apiFetchJson<T = any>(input: RequestInfo | URL, init: Requ
   }
   return res.json() as Promise<T>;
 }
+
+export type BatchRequest = { method?: string; path: string; body?: unknown; headers?: Record<string, string> };
+export type BatchResponse<T = any> = { status: number; body: T; headers?: Record<string, string> };
+
+// Several API calls in one round trip (POST /api/batch/); results keep request order
+export async function apiBatch(requests: BatchRequest[]): Promise<BatchResponse[]> {
+  const url = new URL(ENDPOINTS.batch, ENV.API_URL).toString();
+  const data = await apiFetchJson<{ responses: BatchResponse[] }>(url, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ requests }),
+  });
+  return data.responses;
+}